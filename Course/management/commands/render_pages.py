@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from Course.models import Page
+
+
+class Command(BaseCommand):
+    help = 'Fills in or refreshes the stored rendered HTML, plain text and title of lesson pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render every page, even if its content hash matches.')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch = []
+        checked = rendered = 0
+        for page in Page.objects.only('id', 'content', *Page.RENDERED_FIELDS).iterator(chunk_size=options['batch_size']):
+            checked += 1
+            if options['force']:
+                page.content_hash = ''
+            if page.render():
+                batch.append(page)
+            if len(batch) >= options['batch_size']:
+                Page.objects.bulk_update(batch, Page.RENDERED_FIELDS)
+                rendered += len(batch)
+                batch = []
+        if batch:
+            Page.objects.bulk_update(batch, Page.RENDERED_FIELDS)
+            rendered += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} of {checked} page(s) in {time.perf_counter() - started:.1f} s.'
+        ))
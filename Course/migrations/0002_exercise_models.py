@@ -0,0 +1,96 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_missing_tables(apps, schema_editor):
+    # The exercise tables already exist in production, created before they had migrations;
+    # only a fresh database needs them.
+    existing = set(schema_editor.connection.introspection.table_names())
+    for name in ('Exercise', 'ExerciseQuestions', 'ExerciseScores', 'CorrectExerciseQuestions'):
+        model = apps.get_model('Course', name)
+        if model._meta.db_table not in existing:
+            schema_editor.create_model(model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0001_initial'),
+        ('Course', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='CorrectExerciseQuestions',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='Exercise',
+                    fields=[
+                        ('exerciseID', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('exerciseName', models.CharField(max_length=200)),
+                        ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='Course.lesson')),
+                        ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='student_exercises', to='User.student')),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='ExerciseQuestions',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('question', models.TextField(max_length=512)),
+                        ('choiceA', models.CharField(max_length=255, verbose_name='A')),
+                        ('choiceB', models.CharField(max_length=255, verbose_name='B')),
+                        ('choiceC', models.CharField(max_length=255, verbose_name='C')),
+                        ('choiceD', models.CharField(max_length=255, verbose_name='D')),
+                        ('subject', models.CharField(max_length=255)),
+                        ('correctAnswer', models.CharField(max_length=255, verbose_name='Correct Answer')),
+                        ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercisequestions', to='Course.exercise')),
+                        ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='student_exercisequestions', to='User.student')),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name='ExerciseScores',
+                    fields=[
+                        ('exerciseScoreID', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('score', models.FloatField()),
+                        ('feedback', models.TextField()),
+                        ('exerciseDateTaken', models.DateField(auto_now_add=True)),
+                        ('totalQuestions', models.IntegerField(default=0)),
+                        ('hasFinished', models.BooleanField(default=False)),
+                        ('correct_questions', models.ManyToManyField(related_name='correct_in_exercises', through='Course.CorrectExerciseQuestions', to='Course.exercisequestions')),
+                        ('exercise_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_scores', to='Course.exercise')),
+                        ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='studentexercise_scores', to='User.student')),
+                    ],
+                    options={
+                        'unique_together': {('exercise_id', 'student')},
+                    },
+                ),
+                migrations.AddField(
+                    model_name='correctexercisequestions',
+                    name='exercise_score',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Course.exercisescores'),
+                ),
+                migrations.AddField(
+                    model_name='correctexercisequestions',
+                    name='exercisequestion',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Course.exercisequestions'),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='correctexercisequestions',
+                    unique_together={('exercise_score', 'exercisequestion')},
+                ),
+            ],
+        ),
+        migrations.RunPython(create_missing_tables, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='exercisescores',
+            name='correct_bitmap',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:06
+
+import hashlib
+from django.db import migrations
+
+
+# Same layout as Mocktest.bitmaps.encode_bitmap, frozen here for the migration.
+def question_set_id(QuestionSet, sets, question_ids):
+    if not question_ids:
+        return 0
+    digest = hashlib.sha1(','.join(str(question_id) for question_id in question_ids).encode()).hexdigest()
+    if digest not in sets:
+        sets[digest] = QuestionSet.objects.get_or_create(digest=digest, defaults={'question_ids': question_ids})[0].pk
+    return sets[digest]
+
+
+def encode(correct_ids, set_id, question_ids):
+    position = {question_id: i for i, question_id in enumerate(question_ids)}
+    bits = bytearray((len(question_ids) + 7) // 8)
+    for question_id in correct_ids:
+        bits[position[question_id] // 8] |= 1 << (position[question_id] % 8)
+    return set_id.to_bytes(8, 'big') + bytes(bits)
+
+
+def backfill_bitmaps(apps, schema_editor):
+    ExerciseQuestions = apps.get_model('Course', 'ExerciseQuestions')
+    ExerciseScores = apps.get_model('Course', 'ExerciseScores')
+    CorrectExerciseQuestions = apps.get_model('Course', 'CorrectExerciseQuestions')
+    QuestionSet = apps.get_model('Mocktest', 'QuestionSet')
+
+    # As for mock tests, the exercise's current questions stand in for those it was graded on.
+    questions = {}
+    for exercise_id, question_id in ExerciseQuestions.objects.values_list('exercise_id', 'id').iterator():
+        questions.setdefault(exercise_id, set()).add(question_id)
+
+    correct = {}
+    for score_id, question_id in CorrectExerciseQuestions.objects.values_list(
+            'exercise_score_id', 'exercisequestion_id').iterator():
+        correct.setdefault(score_id, []).append(question_id)
+
+    sets = {}
+    scores = []
+    for score in ExerciseScores.objects.only('exerciseScoreID', 'exercise_id').iterator():
+        score_correct = correct.get(score.pk, [])
+        question_ids = sorted(questions.get(score.exercise_id_id, set()).union(score_correct))
+        score.correct_bitmap = encode(score_correct, question_set_id(QuestionSet, sets, question_ids), question_ids)
+        scores.append(score)
+    ExerciseScores.objects.bulk_update(scores, ['correct_bitmap'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Course', '0002_exercise_models'),
+        ('Mocktest', '0010_mocktestscores_correct_bitmap'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_bitmaps, migrations.RunPython.noop),
+    ]
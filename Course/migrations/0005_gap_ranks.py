@@ -0,0 +1,52 @@
+# Generated by Django 4.2.4 on 2026-10-18 11:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Course.ordering.GAP, frozen here for the migration.
+GAP = 1024
+
+
+def renumber(model, parent, rank, step):
+    """Respace every parent's rows to step, 2 * step, ... keeping their order."""
+    rows = model.objects.order_by(parent, rank, 'pk').values_list('pk', parent)
+    ranks = {}
+    counts = {}
+    for pk, parent_id in rows.iterator():
+        counts[parent_id] = counts.get(parent_id, 0) + 1
+        ranks[pk] = counts[parent_id] * step
+    # Move everything out of the way first, so (lesson, page_number) stays unique throughout.
+    model.objects.update(**{rank: -F(rank) - 1})
+    objs = [model(pk=pk, **{rank: value}) for pk, value in ranks.items()]
+    model.objects.bulk_update(objs, [rank], batch_size=1000)
+
+
+def spread(apps, schema_editor):
+    renumber(apps.get_model('Course', 'Lesson'), 'syllabus_id', 'order', GAP)
+    renumber(apps.get_model('Course', 'Page'), 'lesson_id', 'page_number', GAP)
+
+
+def compact(apps, schema_editor):
+    renumber(apps.get_model('Course', 'Lesson'), 'syllabus_id', 'order', 1)
+    renumber(apps.get_model('Course', 'Page'), 'lesson_id', 'page_number', 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Course', '0004_page_rendering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='order',
+            field=models.IntegerField(help_text='Rank of the lesson in the syllabus (sparse; see Course.ordering)'),
+        ),
+        migrations.AlterField(
+            model_name='page',
+            name='page_number',
+            field=models.IntegerField(help_text='Rank of the page within the lesson (sparse; see Course.ordering)'),
+        ),
+        migrations.RunPython(spread, compact),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django_ckeditor_5.fields import CKEditor5Field
+from .rendering import rendering_hash, render_content
 
 class Course(models.Model):
     course_id = models.CharField(max_length=10, primary_key=True)
@@ -26,7 +27,7 @@ class Lesson(models.Model):
     syllabus = models.ForeignKey(Syllabus, on_delete=models.CASCADE, related_name='lessons')
     lesson_id = models.CharField(max_length=10, primary_key=True)
     lesson_title = models.CharField(max_length=200)
-    order = models.IntegerField(help_text="Order of the lesson in the syllabus")
+    order = models.IntegerField(help_text="Rank of the lesson in the syllabus (sparse; see Course.ordering)")
 
     def __str__(self):
         return f"{self.lesson_title} - {self.syllabus.course.course_title}"
@@ -34,15 +35,40 @@ class Lesson(models.Model):
 class Page(models.Model):
     syllabus = models.ForeignKey(Syllabus, on_delete=models.CASCADE, related_name='pages_by_syllabus')
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='pages')
-    page_number = models.IntegerField(help_text="Page number within the lesson")
+    page_number = models.IntegerField(help_text="Rank of the page within the lesson (sparse; see Course.ordering)")
     content = CKEditor5Field('Content', config_name='extends')
+    # Derived from content on save so read paths never parse HTML; see Course.rendering.
+    rendered_html = models.TextField(blank=True, default='', editable=False)
+    plain_text = models.TextField(blank=True, default='', editable=False)
+    title = models.CharField(max_length=255, blank=True, default='', editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+
+    RENDERED_FIELDS = ['rendered_html', 'plain_text', 'title', 'content_hash']
 
     class Meta:
         ordering = ['page_number']
         unique_together = ('lesson', 'page_number')
 
     def __str__(self):
-        return f"Page {self.page_number} - {self.lesson.lesson_title}"
+        # page_number is a sparse rank, so show the position only when it was annotated.
+        position = getattr(self, 'position', None)
+        label = f"Page {position}" if position else self.title or f"Page (rank {self.page_number})"
+        return f"{label} - {self.lesson.lesson_title}"
+
+    def render(self):
+        """Refresh the derived fields if the content (or SITE_URL, or the renderer) changed. Returns whether it did."""
+        content_hash = rendering_hash(self.content)
+        if content_hash == self.content_hash:
+            return False
+        self.rendered_html, self.plain_text, self.title = render_content(self.content)
+        self.content_hash = content_hash
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.render() and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *self.RENDERED_FIELDS}
+        super().save(*args, **kwargs)
 
 class FileUpload(models.Model):
     file = models.FileField(upload_to='uploads/')
@@ -67,6 +93,8 @@ class ExerciseQuestions(models.Model):
     subject = models.CharField(max_length=255)
     correctAnswer = models.CharField(max_length=255, verbose_name="Correct Answer")
     student = models.ForeignKey('User.Student', on_delete=models.CASCADE, related_name='student_exercisequestions', blank=True, null=True)
+    # Lets the duplicate index catch up on edited questions, see Mocktest.dedup.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def __str__(self):
         return f"{self.question} - {self.subject}"
@@ -79,6 +107,8 @@ class ExerciseScores(models.Model):
     feedback = models.TextField(null=False)
     exerciseDateTaken = models.DateField(auto_now_add=True)
     totalQuestions = models.IntegerField(default=0)
+    # Which questions were answered correctly, see Mocktest.bitmaps.
+    correct_bitmap = models.BinaryField(null=True, blank=True)
     correct_questions = models.ManyToManyField(
         'ExerciseQuestions',
         through='CorrectExerciseQuestions',
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from django.db.models import Case, Count, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from .models import Lesson, Page
+
+# Lesson.order and Page.page_number hold sparse ranks spaced GAP apart, so inserting or
+# moving a row takes a free rank between its neighbours instead of shifting every later
+# row. The API still reads and writes dense 1-based positions; these helpers translate.
+GAP = 1024
+
+# model -> (parent field, rank field)
+ORDERINGS = {
+    Lesson: ('syllabus_id', 'order'),
+    Page: ('lesson_id', 'page_number'),
+}
+
+
+def with_positions(queryset):
+    """Annotate each row's 1-based position among its siblings, counted by a correlated subquery."""
+    parent, rank = ORDERINGS[queryset.model]
+    before = queryset.model.objects.filter(**{parent: OuterRef(parent), f'{rank}__lt': OuterRef(rank)}).order_by()
+    before = before.values(parent).annotate(count=Count('pk')).values('count')
+    return queryset.annotate(position=Coalesce(Subquery(before, output_field=IntegerField()), 0) + 1)
+
+
+def assign_positions(objects):
+    """
+    Number listed rows 1, 2, 3... within their parent by rank. Every sibling of each parent
+    must be in the list; rows annotated by with_positions keep their position.
+    """
+    groups = defaultdict(list)
+    for obj in objects:
+        parent, rank = ORDERINGS[type(obj)]
+        if getattr(obj, 'position', None) is None:
+            groups[getattr(obj, parent)].append(obj)
+    for siblings in groups.values():
+        rank = ORDERINGS[type(siblings[0])][1]
+        siblings.sort(key=lambda obj: (getattr(obj, rank), str(obj.pk)))
+        for position, obj in enumerate(siblings, start=1):
+            obj.position = position
+
+
+def position_of(obj):
+    """The row's 1-based position among its siblings, queried unless already known."""
+    position = getattr(obj, 'position', None)
+    if position is None:
+        parent, rank = ORDERINGS[type(obj)]
+        siblings = type(obj).objects.filter(**{parent: getattr(obj, parent)})
+        position = obj.position = siblings.filter(**{f'{rank}__lt': getattr(obj, rank)}).count() + 1
+    return position
+
+
+def nth(queryset, position):
+    """The row at a 1-based position of an ordered queryset, or None."""
+    try:
+        position = int(position)
+    except (TypeError, ValueError):
+        return None
+    if position < 1:
+        return None
+    obj = queryset.order_by(ORDERINGS[queryset.model][1], 'pk')[position - 1:position].first()
+    if obj is not None:
+        obj.position = position
+    return obj
+
+
+def _siblings(model, parent_id):
+    parent, rank = ORDERINGS[model]
+    return list(model.objects.select_for_update().filter(**{parent: parent_id}).order_by(rank, 'pk').values_list('pk', rank))
+
+
+def _write_ranks(model, parent_id, pks, existing):
+    """
+    Rank the rows in the given order with one UPDATE. The new ranks are GAP apart and
+    offset so none equals a rank in use, so the statement can't trip over (lesson,
+    page_number) uniqueness half way through, whatever order the rows are written in.
+    """
+    parent, rank = ORDERINGS[model]
+    used = {value % GAP for value in existing}
+    offset = next((value for value in range(GAP) if value not in used), None)
+    if offset is None:
+        offset = max(existing)
+    ranks = {pk: offset + (number + 1) * GAP for number, pk in enumerate(pks)}
+    if ranks:
+        model.objects.filter(**{parent: parent_id}, pk__in=ranks).update(**{rank: Case(
+            *[When(pk=pk, then=Value(value)) for pk, value in ranks.items()], output_field=IntegerField(),
+        )})
+    return ranks
+
+
+def place(model, parent_id, position, instance=None):
+    """
+    The rank that puts a new row, or instance (moved, possibly from another parent), at a
+    1-based position among parent_id's rows; past the end appends. Call in a transaction:
+    the siblings are locked, and respaced first if there's no free rank at that spot.
+    """
+    siblings = _siblings(model, parent_id)
+    others = [(pk, value) for pk, value in siblings if instance is None or pk != instance.pk]
+    position = min(max(int(position), 1), len(others) + 1)
+    if instance is not None and len(others) < len(siblings) and siblings[position - 1][0] == instance.pk:
+        # Already there.
+        return getattr(instance, ORDERINGS[model][1])
+
+    before = others[position - 2][1] if position > 1 else 0
+    after = others[position - 1][1] if position <= len(others) else None
+    if after is None:
+        return before + GAP
+    if after - before > 1:
+        return (before + after) // 2
+    ranks = _write_ranks(model, parent_id, [pk for pk, _ in others], [value for _, value in siblings])
+    before = ranks[others[position - 2][0]] if position > 1 else 0
+    return before + GAP // 2
+
+
+def reorder(model, parent_id, pks):
+    """
+    Apply a parent's complete new order, given as primary keys, in one UPDATE. Raises
+    ValueError unless every row of the parent is listed exactly once. Returns {pk: position}.
+    """
+    siblings = _siblings(model, parent_id)
+    current = {str(pk): pk for pk, _ in siblings}
+    requested = [str(pk) for pk in pks]
+    if len(set(requested)) != len(requested):
+        raise ValueError('Each row may only be listed once.')
+    missing = current.keys() - set(requested)
+    unknown = [pk for pk in requested if pk not in current]
+    if missing or unknown:
+        raise ValueError(f'The new order must list exactly the current rows. Missing: {sorted(missing)}; unknown: {unknown}.')
+    ordered = [current[pk] for pk in requested]
+    _write_ranks(model, parent_id, ordered, [value for _, value in siblings])
+    return {pk: position for position, pk in enumerate(ordered, start=1)}
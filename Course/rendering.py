@@ -0,0 +1,21 @@
+import hashlib
+from bs4 import BeautifulSoup
+from django.conf import settings
+
+# Bump when render_content changes, so render_pages re-renders every stored page.
+RENDER_VERSION = 1
+
+
+def rendering_hash(content):
+    """Hash of everything the derived page fields depend on: the content, SITE_URL and the renderer."""
+    return hashlib.sha256(f'{RENDER_VERSION}:{settings.SITE_URL}:{content or ""}'.encode()).hexdigest()
+
+
+def render_content(content):
+    """(rendered html, plain text, title) of a page's editor HTML, parsed once."""
+    soup = BeautifulSoup(content or '', 'html.parser')
+    for img in soup.find_all('img'):
+        if img.get('src', '').startswith('/'):
+            img['src'] = settings.SITE_URL + img['src']
+    title = soup.title.string if soup.title and soup.title.string else ''
+    return str(soup), soup.get_text(), title.strip()[:255]
@@ -1,14 +1,73 @@
 from rest_framework import serializers
-from bs4 import BeautifulSoup
-from django.conf import settings
+from django.db import transaction
 from Course.models import Course, Syllabus, Lesson,  Page, FileUpload, Exercise, ExerciseQuestions, ExerciseScores, CorrectExerciseQuestions
+from Course.ordering import assign_positions, position_of, place
+from Mocktest.bitmaps import decode_bitmap
 from datetime import datetime
 import time
 
+class PositionListSerializer(serializers.ListSerializer):
+    """Lists lessons or pages numbered by position; each parent's rows must all be listed."""
+
+    def to_representation(self, data):
+        data = list(data.all() if hasattr(data, 'all') else data)
+        assign_positions(data)
+        return super().to_representation(data)
+
+
 class PageSerializer(serializers.ModelSerializer):
+    """page_number is read and written as the page's 1-based position in its lesson."""
+
     class Meta:
         model = Page
-        fields = "__all__"
+        exclude = ('plain_text', 'content_hash')
+        list_serializer_class = PositionListSerializer
+        # page_number is a position here, not the stored rank the unique check would compare.
+        validators = []
+
+    def validate_page_number(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Page numbers start at 1.')
+        return value
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            validated_data['page_number'] = place(Page, validated_data['lesson'].pk, validated_data['page_number'])
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        lesson = validated_data.get('lesson', instance.lesson)
+        with transaction.atomic():
+            if 'page_number' in validated_data or lesson.pk != instance.lesson_id:
+                position = validated_data.get('page_number', position_of(instance))
+                validated_data['page_number'] = place(Page, lesson.pk, position, instance)
+            instance.position = None
+            return super().update(instance, validated_data)
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation['page_number'] = position_of(instance)
+        return representation
+
+
+class PageContentSerializer(serializers.ModelSerializer):
+    """A page for reading: only the pre-rendered body, served as its content."""
+    content = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Page
+        fields = ('id', 'page_number', 'title', 'content')
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation['page_number'] = position_of(instance)
+        return representation
+
+    def get_content(self, obj):
+        if not obj.content_hash:
+            # Not backfilled by render_pages yet.
+            obj.render()
+        return obj.rendered_html
 
 
 class ExerciseQuestionsSerializer(serializers.ModelSerializer):
@@ -26,6 +85,7 @@ class CorrectExerciseQuestionsSerializer(serializers.ModelSerializer):
 class ExerciseScoresSerializer(serializers.ModelSerializer):
     studentName = serializers.SerializerMethodField()
     correctquestions = CorrectExerciseQuestionsSerializer(many=True, read_only=True)
+    correct_question_ids = serializers.SerializerMethodField()
 
     class Meta:
         model = ExerciseScores
@@ -39,6 +99,7 @@ class ExerciseScoresSerializer(serializers.ModelSerializer):
             'studentName',
             'feedback',
             'correctquestions',
+            'correct_question_ids',
             'hasFinished',
         )
 
@@ -51,6 +112,9 @@ class ExerciseScoresSerializer(serializers.ModelSerializer):
     def get_studentName(self, obj):
         return f"{obj.student.first_name} {obj.student.last_name}"
 
+    def get_correct_question_ids(self, obj):
+        return decode_bitmap(obj.correct_bitmap)
+
 
 class ExerciseSerializer(serializers.ModelSerializer):
     exercisequestions = ExerciseQuestionsSerializer(many=True, read_only=True)
@@ -61,6 +125,7 @@ class ExerciseSerializer(serializers.ModelSerializer):
 
 
 class LessonSerializer(serializers.ModelSerializer):
+    """order is read and written as the lesson's 1-based position in its syllabus."""
     pages = PageSerializer(many=True, read_only=True)
     exercises = ExerciseSerializer(many=True, read_only=True)
 
@@ -68,37 +133,33 @@ class LessonSerializer(serializers.ModelSerializer):
         model = Lesson
         fields = "__all__"
         read_only_fields = ('lesson_id',)  # Set lesson_id as read-only
+        list_serializer_class = PositionListSerializer
+
+    def validate_order(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Lesson order starts at 1.')
+        return value
 
     def create(self, validated_data):
         lesson_id = self.generate_lesson_id()
-        order = validated_data.get('order')
-        syllabus_id = validated_data.get('syllabus')
-
-        # Check if any existing lesson has the same order
-        existing_lesson = Lesson.objects.filter(syllabus=syllabus_id, order=order).first()
-
-        if existing_lesson:
-            # Increment the order of the existing lesson and any subsequent lessons
-            lessons_to_update = Lesson.objects.filter(syllabus=syllabus_id, order__gte=order)
-            for lesson in lessons_to_update:
-                lesson.order += 1
-                lesson.save()
-
-        return Lesson.objects.create(lesson_id=lesson_id, **validated_data)
+        # An order already taken pushes that lesson and the ones after it down.
+        with transaction.atomic():
+            validated_data['order'] = place(Lesson, validated_data['syllabus'].pk, validated_data['order'])
+            return Lesson.objects.create(lesson_id=lesson_id, **validated_data)
+
+    def update(self, instance, validated_data):
+        syllabus = validated_data.get('syllabus', instance.syllabus)
+        with transaction.atomic():
+            if 'order' in validated_data or syllabus.pk != instance.syllabus_id:
+                position = validated_data.get('order', position_of(instance))
+                validated_data['order'] = place(Lesson, syllabus.pk, position, instance)
+            instance.position = None
+            return super().update(instance, validated_data)
 
     def to_representation(self, instance):
-        data = super().to_representation(instance)
-        content = data.get('content')
-
-        if content:
-            soup = BeautifulSoup(content, 'html.parser')
-            images = soup.find_all('img')
-            for img in images:
-                if img['src'].startswith('/'):
-                    img['src'] = settings.SITE_URL + img['src']
-
-            data['content'] = str(soup)
-        return data
+        representation = super().to_representation(instance)
+        representation['order'] = position_of(instance)
+        return representation
 
     @staticmethod
     def generate_lesson_id():
@@ -150,7 +211,22 @@ class CourseListSerializer(serializers.ModelSerializer):
         return course
 
     def get_hasMocktest(self, obj):
-        return obj.has_mock_test()
+        # CourseListViewSet annotates the flag; only other callers pay a query per course.
+        has_mocktest = getattr(obj, 'hasMocktest', None)
+        return obj.has_mock_test() if has_mocktest is None else has_mocktest
+
+
+class CourseCatalogSerializer(serializers.ModelSerializer):
+    """Catalog card for a course, read from the annotations of CourseListViewSet.get_queryset."""
+    syllabus_id = serializers.CharField(read_only=True)
+    lesson_count = serializers.IntegerField(read_only=True)
+    page_count = serializers.IntegerField(read_only=True)
+    hasMocktest = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['course_id', 'course_title', 'short_description', 'image', 'is_published', 'syllabus_id',
+                  'lesson_count', 'page_count', 'hasMocktest']
 
 
 def generate_syllabus_id(course):
@@ -1,14 +1,22 @@
 import os
 import environ
-from django.db.models import Exists, OuterRef, F
+from django.db.models import Exists, OuterRef, F, Count, Subquery, IntegerField
+from django.db.models.functions import Coalesce, Length
+from django.conf import settings
 from rest_framework import viewsets, status, parsers
 from rest_framework.decorators import action, api_view, permission_classes, parser_classes
+from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
 from .models import Course, Lesson, Syllabus, Page, FileUpload, Exercise, ExerciseQuestions, ExerciseScores, CorrectExerciseQuestions
 from Mocktest.models import MockTest
+from Mocktest.bitmaps import encode_bitmap
+from Mocktest.dedup import EXERCISE, find_duplicates
 from User.models import Student, User
-from Course.serializer import CourseListSerializer, CourseDetailSerializer, SyllabusSerializer, LessonSerializer, FileUploadSerializer, PageSerializer, ExerciseSerializer, ExerciseQuestionsSerializer, ExerciseScoresSerializer
+from User.mastery import record_mastery
+from Course.ordering import with_positions, position_of, nth, place, reorder
+from Course.serializer import CourseListSerializer, CourseCatalogSerializer, CourseDetailSerializer, SyllabusSerializer, LessonSerializer, FileUploadSerializer, PageSerializer, PageContentSerializer, ExerciseSerializer, ExerciseQuestionsSerializer, ExerciseScoresSerializer
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
@@ -17,7 +25,6 @@ from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from storages.backends.azure_storage import AzureStorage
 from openai import OpenAI
-from bs4 import BeautifulSoup
 
 
 @api_view(['POST'])
@@ -31,14 +38,47 @@ def upload_image(request):
         return JsonResponse({'url': uploaded_file_url})
     return JsonResponse({'error': 'Failed to upload file'}, status=400)
 
+def _count_by_course(queryset, course_field):
+    counts = queryset.filter(**{course_field: OuterRef('pk')}).order_by().values(course_field).annotate(
+        count=Count('pk')
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 class CourseListViewSet(viewsets.ModelViewSet):
+    """
+    The course list is a lightweight catalog by default; ?expand=syllabus returns the full
+    syllabus, lesson and page tree of every course instead.
+    """
     queryset = Course.objects.all()
     serializer_class = CourseListSerializer
+    expansions = ('syllabus',)
+
+    def get_expand(self):
+        expand = {value for value in self.request.query_params.get('expand', '').split(',') if value}
+        unknown = expand.difference(self.expansions)
+        if unknown:
+            raise ValidationError({'expand': f"Unknown expansion(s): {', '.join(sorted(unknown))}."})
+        return expand
+
+    def get_serializer_class(self):
+        if self.action == 'list' and 'syllabus' not in self.get_expand():
+            return CourseCatalogSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         queryset = super().get_queryset()
         queryset = queryset.annotate(hasMocktest=Exists(MockTest.objects.filter(course=OuterRef('pk'))))
-        return queryset
+        if self.action != 'list':
+            return queryset
+        if 'syllabus' in self.get_expand():
+            return queryset.select_related('syllabus').prefetch_related('syllabus__lessons__pages')
+        # Counted with correlated subqueries rather than joins, so lessons x pages rows aren't multiplied.
+        return queryset.annotate(
+            syllabus_id=F('syllabus__syllabus_id'),
+            lesson_count=_count_by_course(Lesson.objects.all(), 'syllabus__course'),
+            page_count=_count_by_course(Page.objects.all(), 'syllabus__course'),
+        )
 
     @action(detail=False, methods=['get'], url_path='check_id/(?P<course_id>[^/.]+)')
     def check_course_id(self, request, course_id=None):
@@ -68,16 +108,89 @@ class SyllabusViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+class LessonPagePagination(CursorPagination):
+    ordering = 'page_number'
+    page_size = settings.LESSON_PAGE_WINDOW
+    page_size_query_param = 'window'
+    max_page_size = settings.LESSON_PAGE_WINDOW_MAX
+
+
+def lesson_outlines(lessons):
+    """Lesson id, title, order and page numbers, titles and sizes, from one query with no page bodies."""
+    rows = with_positions(lessons).order_by('order', 'lesson_id', 'pages__page_number').values(
+        'lesson_id', 'lesson_title', 'position', 'pages__id', 'pages__title',
+        size=Length('pages__content'),
+    )
+    outlines = {}
+    for row in rows:
+        outline = outlines.setdefault(row['lesson_id'], {
+            'lesson_id': row['lesson_id'],
+            'lesson_title': row['lesson_title'],
+            'order': row['position'],
+            'pages': [],
+        })
+        if row['pages__id'] is not None:
+            outline['pages'].append({
+                'id': row['pages__id'],
+                'page_number': len(outline['pages']) + 1,
+                'title': row['pages__title'],
+                'size': row['size'],
+            })
+    return list(outlines.values())
+
+
 class LessonViewSet(viewsets.ModelViewSet):
     queryset = Lesson.objects.all().prefetch_related('pages')
     serializer_class = LessonSerializer
 
     @action(detail=True, methods=['get'], url_path='pages')
     def get_lesson_pages(self, request, pk=None):
-        lesson = self.get_object()  # This should fetch the lesson based on the provided lesson_id
-        pages = Page.objects.filter(lesson=lesson)
-        serializer = PageSerializer(pages, many=True)
-        return Response(serializer.data)
+        # Page bodies a window at a time; ?window= sets the size and the next/previous links carry the cursor.
+        if not Lesson.objects.filter(pk=pk).exists():
+            return Response({'error': 'Lesson not found.'}, status=status.HTTP_404_NOT_FOUND)
+        pages = with_positions(Page.objects.filter(lesson_id=pk).defer('content', 'plain_text'))
+        paginator = LessonPagePagination()
+        window = paginator.paginate_queryset(pages, request, view=self)
+        return paginator.get_paginated_response(PageContentSerializer(window, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def outline(self, request, pk=None):
+        outlines = lesson_outlines(Lesson.objects.filter(pk=pk))
+        if not outlines:
+            return Response({'error': 'Lesson not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(outlines[0])
+
+    @action(detail=False, methods=['get'], url_path='by_syllabus/(?P<syllabus_id>[^/.]+)/outline')
+    def syllabus_outline(self, request, syllabus_id=None):
+        return Response(lesson_outlines(Lesson.objects.filter(syllabus=syllabus_id)))
+
+    @action(detail=False, methods=['post'], url_path='by_syllabus/(?P<syllabus_id>[^/.]+)/reorder')
+    def reorder_lessons(self, request, syllabus_id=None):
+        # {"lessons": [every lesson id of the syllabus, in the new order]}, applied in one UPDATE.
+        lesson_ids = request.data.get('lessons')
+        if not isinstance(lesson_ids, list):
+            return Response({'error': 'lessons must be a list of lesson ids in the new order.'}, status=status.HTTP_400_BAD_REQUEST)
+        get_object_or_404(Syllabus, pk=syllabus_id)
+        try:
+            with transaction.atomic():
+                positions = reorder(Lesson, syllabus_id, lesson_ids)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response([{'lesson_id': lesson_id, 'order': order} for lesson_id, order in positions.items()])
+
+    @action(detail=True, methods=['post'], url_path='pages/reorder')
+    def reorder_pages(self, request, pk=None):
+        # {"pages": [every page id of the lesson, in the new order]}, applied in one UPDATE.
+        page_ids = request.data.get('pages')
+        if not isinstance(page_ids, list):
+            return Response({'error': 'pages must be a list of page ids in the new order.'}, status=status.HTTP_400_BAD_REQUEST)
+        get_object_or_404(Lesson, pk=pk)
+        try:
+            with transaction.atomic():
+                positions = reorder(Page, pk, page_ids)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response([{'id': page_id, 'page_number': page_number} for page_id, page_number in positions.items()])
 
     def by_syllabus(self, request, syllabus_id=None):
         queryset = self.get_queryset().filter(syllabus=syllabus_id)
@@ -93,27 +206,12 @@ class LessonViewSet(viewsets.ModelViewSet):
     def update_lesson(self, request, pk):
         try:
             lesson = get_object_or_404(Lesson, pk=pk)
-            new_order = int(request.data.get('order', lesson.order))
+            new_order = int(request.data.get('order', position_of(lesson)))
             new_title = request.data.get('lesson_title', lesson.lesson_title)
 
             with transaction.atomic():
-                # Update the order of lessons
-                if new_order != lesson.order:
-                    if new_order < lesson.order:
-                        Lesson.objects.filter(
-                            syllabus=lesson.syllabus,
-                            order__lt=lesson.order,
-                            order__gte=new_order
-                        ).update(order=F('order') + 1)
-                    else:
-                        Lesson.objects.filter(
-                            syllabus=lesson.syllabus,
-                            order__gt=lesson.order,
-                            order__lte=new_order
-                        ).update(order=F('order') - 1)
-
-                # Update the lesson's order and title
-                lesson.order = new_order
+                # The lesson takes a free rank between its new neighbours; the others keep theirs.
+                lesson.order = place(Lesson, lesson.syllabus_id, new_order, lesson)
                 lesson.lesson_title = new_title
                 lesson.save()
 
@@ -134,6 +232,13 @@ class PageViewSet(viewsets.ModelViewSet):
     serializer_class = PageSerializer
     lookup_field = 'page_number'  # Specify the lookup field
 
+    def get_lesson_page(self, lesson_id, page_number):
+        # Page numbers in URLs and requests are positions in the lesson, not stored ranks.
+        page = nth(self.queryset.filter(lesson_id=lesson_id), page_number)
+        if page is None:
+            raise NotFound()
+        return page
+
     @action(detail=False, methods=['get', 'post', 'put'], url_path='(?P<lesson_id>[^/.]+)')
     def by_lesson(self, request, lesson_id=None):
         if request.method == 'GET':
@@ -153,7 +258,7 @@ class PageViewSet(viewsets.ModelViewSet):
             # You need to extract 'page_number' from the request data or URL, for example:
             page_number = request.data.get('page_number')  # Adjust this based on your data structure
             # Then, you can update the specific page
-            page = Page.objects.filter(lesson_id=lesson_id, page_number=page_number).first()
+            page = nth(Page.objects.filter(lesson_id=lesson_id), page_number)
             if page:
                 serializer = self.get_serializer(page, data=request.data)
                 if serializer.is_valid():
@@ -169,12 +274,12 @@ class PageViewSet(viewsets.ModelViewSet):
     def by_lesson_and_page(self, request, lesson_id=None, page_number=None):
         if request.method == 'GET':
             # Handle GET requests
-            page = get_object_or_404(self.queryset, lesson_id=lesson_id, page_number=page_number)
+            page = self.get_lesson_page(lesson_id, page_number)
             serializer = self.serializer_class(page)
             return Response(serializer.data)
         elif request.method == 'PUT':
             # Handle PUT requests
-            page = get_object_or_404(self.queryset, lesson_id=lesson_id, page_number=page_number)
+            page = self.get_lesson_page(lesson_id, page_number)
             serializer = self.serializer_class(page, data=request.data)
             if serializer.is_valid():
                 serializer.save()
@@ -182,7 +287,7 @@ class PageViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         elif request.method == 'DELETE':
             # Handle DELETE requests
-            page = get_object_or_404(self.queryset, lesson_id=lesson_id, page_number=page_number)
+            page = self.get_lesson_page(lesson_id, page_number)
             page.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
@@ -213,8 +318,7 @@ class ExerciseViewSet(viewsets.ModelViewSet):
 
         course_title = course.course_title
         print(course_title)
-        content = page.content
-        content_title, content_content = self.extract_title_and_content(content)
+        content_title, content_content = self.extract_title_and_content(page)
         print(content_content)
         if not content_title or not content_content:
             return Response({"error": "Invalid content format"}, status=status.HTTP_400_BAD_REQUEST)
@@ -258,8 +362,9 @@ class ExerciseViewSet(viewsets.ModelViewSet):
             questions_text = questions_text.replace(' \)', '')
         print('shi:' +  questions_text)
         questions = self.process_openai_response(questions_text)
+        duplicates = {}
         for question_data in questions:
-            ExerciseQuestions.objects.create(
+            question = ExerciseQuestions.objects.create(
                 exercise=exercise,
                 question=question_data['question'],
                 choiceA=question_data['choiceA'],
@@ -269,17 +374,19 @@ class ExerciseViewSet(viewsets.ModelViewSet):
                 correctAnswer=question_data['correctAnswer'],
                 student=student,
             )
+            matches = find_duplicates(question.question, exclude=(EXERCISE, question.pk))
+            if matches:
+                duplicates[question.pk] = matches
 
-        return Response({'status': 'questions generated', 'exercise_id': exercise.exerciseID}, status=status.HTTP_201_CREATED)
+        return Response({'status': 'questions generated', 'exercise_id': exercise.exerciseID, 'duplicates': duplicates}, status=status.HTTP_201_CREATED)
         #except Exception as e:
         return Response({"Error in generating questions": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @staticmethod
-    def extract_title_and_content(html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        title = soup.title.string if soup.title else 'No title'
-        content = soup.get_text()
-        return title, content
+    def extract_title_and_content(page):
+        # Pages saved before rendering was stored are rendered in memory until render_pages backfills them.
+        page.render()
+        return page.title or 'No title', page.plain_text
     
     @staticmethod
     def process_openai_response(response_text):
@@ -376,6 +483,15 @@ class ExerciseViewSet(viewsets.ModelViewSet):
 class ExerciseQuestionsViewSet(viewsets.ModelViewSet):
     queryset = ExerciseQuestions.objects.all()
     serializer_class = ExerciseQuestionsSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        data = dict(serializer.data)
+        data['duplicates'] = find_duplicates(serializer.instance.question, exclude=(EXERCISE, serializer.instance.pk))
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
     
     @action(detail=False, methods=['get', 'delete'], url_path='(?P<exercise_id>[^/.]+)')
     def by_exercise(self, request, exercise_id=None):
@@ -392,6 +508,22 @@ class ExerciseQuestionsViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+def exercise_mastery(subjects, correct_question_ids, score, total_questions):
+    """
+    {subject: (correct, total)} for an exercise submission. Without per-question results
+    only a single-subject exercise can be attributed, from its score.
+    """
+    if correct_question_ids is not None:
+        correct_question_ids = set(correct_question_ids)
+        results = {}
+        for question_id, subject in subjects.items():
+            correct, total = results.get(subject, (0, 0))
+            results[subject] = (correct + (question_id in correct_question_ids), total + 1)
+        return results
+    if len(set(subjects.values())) == 1 and total_questions:
+        return {next(iter(subjects.values())): (min(int(float(score)), int(total_questions)), int(total_questions))}
+    return {}
+
 class ExerciseScoresViewSet(viewsets.ModelViewSet):
     queryset = ExerciseScores.objects.all()
     serializer_class = ExerciseScoresSerializer
@@ -419,18 +551,35 @@ class ExerciseScoresViewSet(viewsets.ModelViewSet):
             passing_score = 0.8 * total_questions 
 
             has_finished = float(score) >= passing_score
+            correct_question_ids = request.data.get('correct_question_ids')
+            subjects = dict(ExerciseQuestions.objects.filter(exercise=exercise).values_list('id', 'subject'))
+            extra = {}
+            if isinstance(correct_question_ids, list):
+                try:
+                    correct_question_ids = [int(question_id) for question_id in correct_question_ids]
+                except (TypeError, ValueError):
+                    return Response({'error': 'correct_question_ids must be a list of question ids.'}, status=400)
+                try:
+                    extra['correct_bitmap'] = encode_bitmap(correct_question_ids, subjects)
+                except ValueError:
+                    return Response({'error': 'correct_question_ids must only list questions of this exercise.'}, status=400)
+            mastery = exercise_mastery(subjects, correct_question_ids, score, total_questions)
             existing_score = ExerciseScores.objects.filter(student=student, exercise_id=exercise).first()
             if existing_score:
                 existing_score.score = score
                 existing_score.hasFinished = has_finished
+                for field, value in extra.items():
+                    setattr(existing_score, field, value)
                 existing_score.save()
+                record_mastery({student.user_name: mastery})
             else:
                 request.data['student'] = student.user_name
                 request.data['exercise'] = exercise.exerciseID
                 request.data['hasFinished'] = has_finished
                 serializer = self.get_serializer(data=request.data)
                 if serializer.is_valid():
-                    serializer.save()
+                    serializer.save(**extra)
+                    record_mastery({student.user_name: mastery})
                     return Response(serializer.data, status=status.HTTP_201_CREATED)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,175 @@
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .models import AdaptiveSession, MockQuestions, MockTest
+from .caching import TieredCache
+
+# Where uncalibrated items start on the ability scale.
+PRIOR_DIFFICULTY = {'Easy': -1.0, 'Medium': 0.0, 'Hard': 1.0}
+
+# Abilities are tracked as a log posterior over a fixed grid with a standard normal prior,
+# so an update is one vector add and an estimate two dot products.
+GRID = np.linspace(-4.0, 4.0, 81)
+LOG_PRIOR = -0.5 * GRID ** 2
+
+QUESTION_FIELDS = ('id', 'question', 'choiceA', 'choiceB', 'choiceC', 'choiceD', 'subject')
+
+item_banks = TieredCache(
+    'mocktest-item-bank',
+    maxsize=64,
+    ttl=settings.MOCKTEST_ANSWER_KEY_CACHE_TTL,
+    shared_alias=settings.MOCKTEST_SHARED_CACHE,
+)
+
+
+def probability(discrimination, difficulty, theta):
+    """2PL probability of a correct answer; Rasch items have discrimination 1."""
+    return 1.0 / (1.0 + np.exp(-discrimination * (theta - difficulty)))
+
+
+class ItemBank:
+    """The questions of one course as parallel arrays, for scoring and item selection."""
+
+    def __init__(self, rows):
+        self.question_ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        self.difficulty = np.array([
+            row['calibration__difficulty'] if row['calibration__difficulty'] is not None
+            else PRIOR_DIFFICULTY.get(row['difficulty__name'], 0.0)
+            for row in rows
+        ], dtype=np.float64)
+        self.discrimination = np.array([
+            row['calibration__discrimination'] if row['calibration__discrimination'] is not None else 1.0
+            for row in rows
+        ], dtype=np.float64)
+        self.subject_labels, self.subjects = np.unique([row['subject'] for row in rows], return_inverse=True)
+        self.levels = [row['difficulty__name'] for row in rows]
+        self.questions = [{field: row[field] for field in QUESTION_FIELDS} for row in rows]
+        self.answers = [row['correctAnswer'] for row in rows]
+        self.index = {int(question_id): position for position, question_id in enumerate(self.question_ids)}
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def next_item(self, theta, administered, subject=None):
+        """Position of the unused item with the most Fisher information at theta, or None."""
+        p = probability(self.discrimination, self.difficulty, theta)
+        information = self.discrimination ** 2 * p * (1 - p)
+        information[[self.index[question_id] for question_id in administered if question_id in self.index]] = -np.inf
+        if subject is not None:
+            if subject not in self.subject_labels:
+                return None
+            information[self.subjects != np.searchsorted(self.subject_labels, subject)] = -np.inf
+        position = int(np.argmax(information)) if len(information) else None
+        if position is None or information[position] == -np.inf:
+            return None
+        return position
+
+    def question(self, position):
+        question = dict(self.questions[position])
+        question['difficulty'] = self.levels[position]
+        return question
+
+
+def fetch_item_bank(course_id):
+    rows = list(MockQuestions.objects.filter(mocktest__course_id=course_id).order_by('id').values(
+        *QUESTION_FIELDS, 'difficulty__name', 'correctAnswer', 'calibration__difficulty', 'calibration__discrimination'
+    ))
+    return ItemBank(rows)
+
+
+def load_item_bank(course_id):
+    return item_banks.get_or_load(str(course_id), lambda: fetch_item_bank(course_id))
+
+
+def invalidate_item_bank(course_id):
+    item_banks.invalidate(str(course_id))
+
+
+def invalidate_item_bank_for_mocktest(mocktest_id):
+    course_id = MockTest.objects.filter(pk=mocktest_id).values_list('course_id', flat=True).first()
+    if course_id:
+        invalidate_item_bank(course_id)
+
+
+def update_log_posterior(log_posterior, discrimination, difficulty, correct):
+    p = probability(discrimination, difficulty, GRID)
+    return log_posterior + np.log(p if correct else 1 - p)
+
+
+def estimate_ability(log_posterior):
+    """Expected a posteriori ability and its standard error."""
+    weights = np.exp(log_posterior - log_posterior.max())
+    weights /= weights.sum()
+    theta = float(weights @ GRID)
+    return theta, float(np.sqrt(weights @ (GRID - theta) ** 2))
+
+
+def _expired_before():
+    return timezone.now() - timezone.timedelta(seconds=settings.MOCKTEST_ADAPTIVE_SESSION_TTL)
+
+
+def start_session(course_id, student_id, subject=None, length=None):
+    """Open an adaptive session and pick its first item. Returns (session, question) or None."""
+    bank = load_item_bank(course_id)
+    position = bank.next_item(0.0, [], subject)
+    if position is None:
+        return None
+    # The student's expired sessions go as a new one starts, so the table doesn't grow.
+    AdaptiveSession.objects.filter(student_id=student_id, updated_at__lt=_expired_before()).delete()
+    session = AdaptiveSession.objects.create(
+        course_id=course_id,
+        student_id=student_id,
+        subject=subject,
+        length=min(length or settings.MOCKTEST_ADAPTIVE_LENGTH, len(bank)),
+        log_posterior=LOG_PRIOR.tolist(),
+        current=int(bank.question_ids[position]),
+    )
+    return session, bank.question(position)
+
+
+def load_session(session_id):
+    """The session, or None if it doesn't exist or has expired."""
+    try:
+        return AdaptiveSession.objects.filter(pk=session_id, updated_at__gte=_expired_before()).first()
+    except ValidationError:
+        return None
+
+
+def answer_item(session, answer):
+    """
+    Score the answer to the session's current item, update the ability estimate and pick
+    the next item. Returns (correct, theta, standard error, next question or None when done),
+    or None if another request answered the item first.
+    """
+    bank = load_item_bank(session.course_id)
+    question_id = session.current
+    position = bank.index.get(question_id)
+    correct = position is not None and answer == bank.answers[position]
+    log_posterior = np.asarray(session.log_posterior, dtype=np.float64)
+    if position is not None:
+        log_posterior = update_log_posterior(
+            log_posterior, bank.discrimination[position], bank.difficulty[position], correct
+        )
+    session.log_posterior = log_posterior.tolist()
+    session.administered.append(question_id)
+    session.responses.append(bool(correct))
+    theta, standard_error = estimate_ability(log_posterior)
+
+    next_question = None
+    finished = (len(session.administered) >= session.length
+                or standard_error < settings.MOCKTEST_ADAPTIVE_MIN_STANDARD_ERROR)
+    if not finished:
+        position = bank.next_item(theta, session.administered, session.subject)
+        if position is not None:
+            next_question = bank.question(position)
+    session.current = next_question['id'] if next_question else None
+    session.updated_at = timezone.now()
+    # Only written if the item is still the current one, so a repeated answer can't count twice.
+    updated = AdaptiveSession.objects.filter(pk=session.pk, current=question_id).update(
+        log_posterior=session.log_posterior, administered=session.administered, responses=session.responses,
+        current=session.current, updated_at=session.updated_at,
+    )
+    if not updated:
+        return None
+    return correct, theta, standard_error, next_question
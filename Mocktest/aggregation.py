@@ -0,0 +1,113 @@
+from django.db.models import Aggregate, CharField, Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+from .models import MockQuestions, CorrectQuestions, MockTestScoreBreakdown
+from .bitmaps import QuestionMasks
+
+
+def aggregate_breakdowns(scores):
+    """
+    Rebuild breakdown rows for many scores from their correctness bitmaps, with one query
+    for the questions of their tests. Returns {score id: [unsaved MockTestScoreBreakdown]}.
+    """
+    score_tests = {score.pk: score.mocktest_id_id for score in scores}
+    if not score_tests:
+        return {}
+
+    questions = {}
+    rows = MockQuestions.objects.filter(mocktest_id__in=set(score_tests.values())).values_list(
+        'mocktest', 'id', 'difficulty__name', 'subject'
+    )
+    for mocktest_id, question_id, difficulty, subject in rows:
+        questions.setdefault(mocktest_id, []).append((question_id, difficulty, subject))
+
+    breakdowns = {}
+    for mocktest_id in set(score_tests.values()):
+        test_scores = [score for score in scores if score.mocktest_id_id == mocktest_id]
+        test_questions = questions.get(mocktest_id, [])
+        question_ids = [question_id for question_id, _, _ in test_questions]
+        bitmaps = [score.correct_bitmap for score in test_scores]
+        counted = []
+        for category, labels in ((MockTestScoreBreakdown.DIFFICULTY, [row[1] for row in test_questions]),
+                                 (MockTestScoreBreakdown.SUBJECT, [row[2] for row in test_questions])):
+            masks = QuestionMasks(question_ids, labels)
+            counted.append((category, masks, masks.count(bitmaps)))
+
+        for row, score in enumerate(test_scores):
+            breakdowns[score.pk] = [
+                MockTestScoreBreakdown(mocktest_score_id=score.pk, category=category, label=label,
+                                       total=int(masks.totals[column]), correct=int(correct[row, column]))
+                for category, masks, correct in counted
+                for column, label in enumerate(masks.labels)
+            ]
+    return breakdowns
+
+
+class GroupConcatWithCount(Aggregate):
+    # MySQL only; kept as the reference the portable path is benchmarked against.
+    function = 'GROUP_CONCAT'
+    template = '%(function)s(DISTINCT CONCAT(%(expressions)s))'
+
+    def __init__(self, expression, **extra):
+        super(GroupConcatWithCount, self).__init__(
+            expression,
+            output_field=CharField(),
+            **extra
+        )
+
+
+def annotate_group_concat(queryset):
+    """
+    The scores annotations the endpoint used before the breakdown table (MySQL only), with
+    distinct difficulty counts so the join fan-out doesn't inflate them.
+    """
+    def correct_questions_count(difficulty_name):
+        return Coalesce(
+            Subquery(
+                CorrectQuestions.objects.filter(
+                    mocktest_score_id=OuterRef('pk'),
+                    mockquestion__difficulty__name=difficulty_name
+                ).values('mocktest_score_id')
+                .annotate(count=Count('pk')).values('count'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+    correct_per_subject = Subquery(
+        CorrectQuestions.objects.filter(
+            mocktest_score_id=OuterRef('pk'),
+            mockquestion__subject=OuterRef('correct_questions__subject')
+        ).values('mockquestion__subject')
+        .annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField()
+    )
+
+    return queryset.annotate(
+        easy_count=Count('mocktest_id__mockquestions__id',
+                         filter=Q(mocktest_id__mockquestions__difficulty__name='Easy'), distinct=True),
+        medium_count=Count('mocktest_id__mockquestions__id',
+                           filter=Q(mocktest_id__mockquestions__difficulty__name='Medium'), distinct=True),
+        hard_count=Count('mocktest_id__mockquestions__id',
+                         filter=Q(mocktest_id__mockquestions__difficulty__name='Hard'), distinct=True),
+        easy_correct=correct_questions_count('Easy'),
+        medium_correct=correct_questions_count('Medium'),
+        hard_correct=correct_questions_count('Hard'),
+        subjects_count=Count('mocktest_id__mockquestions__subject', distinct=True),
+        subjects=GroupConcatWithCount(
+            Concat(
+                'mocktest_id__mockquestions__subject',
+                Value(':'),
+                Subquery(
+                    MockQuestions.objects.filter(
+                        subject=OuterRef('mocktest_id__mockquestions__subject'),
+                        mocktest=OuterRef('mocktest_id')
+                    ).order_by().values('subject')
+                    .annotate(count=Count('pk')).values('count'),
+                    output_field=IntegerField()
+                )
+            )
+        ),
+        subjects_correct=GroupConcatWithCount(
+            Concat('correct_questions__subject', Value(':'), Coalesce(correct_per_subject, Value(0)))
+        ),
+    )
@@ -0,0 +1,107 @@
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from .models import MockTest, MockTestAttempt, MockTestScores
+from .matrix import encode_sheets, UNANSWERED
+
+TOO_EASY = 0.9
+TOO_HARD = 0.2
+LOW_DISCRIMINATION = 0.2
+
+
+def _cache():
+    return caches[settings.MOCKTEST_SHARED_CACHE or 'default']
+
+
+def _data_version(mocktest_id):
+    """
+    What the analysis is computed from, read from the database in one query: the questions'
+    version, the latest attempt (every submission appends one) and the number of scores.
+    """
+    def subquery(queryset, aggregate):
+        queryset = queryset.filter(mocktest_id=OuterRef('pk')).order_by().values('mocktest_id')
+        return Subquery(queryset.annotate(value=aggregate).values('value'), output_field=IntegerField())
+
+    return MockTest.objects.filter(pk=mocktest_id).annotate(
+        latest_attempt=subquery(MockTestAttempt.objects, Max('pk')),
+        scores=subquery(MockTestScores.objects, Count('pk')),
+    ).values_list('version', 'latest_attempt', 'scores').first()
+
+
+def _cache_key(mocktest_id, data_version):
+    return 'mocktest-item-analysis:{}:{}:{}:{}'.format(mocktest_id, *data_version)
+
+
+def _rounded(values):
+    return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+
+def compute_item_analysis(answer_key, sheets):
+    question_ids, codes, key_codes, submitted = encode_sheets(answer_key, sheets)
+    students = len(sheets)
+    labels = {code: answer for answer, code in codes.items()}
+
+    correct = (submitted == key_codes).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p_values = correct.mean(axis=0) if students else np.full(len(question_ids), np.nan)
+
+        # Point-biserial between each item and the rest score (total minus the item itself).
+        rest = correct.sum(axis=1, keepdims=True) - correct
+        covariance = (correct * rest).mean(axis=0) - p_values * rest.mean(axis=0)
+        spread = np.sqrt(p_values * (1 - p_values)) * rest.std(axis=0)
+        discrimination = np.where(spread > 0, covariance / spread, np.nan)
+
+    # One bincount over (question, answer code) pairs gives every choice distribution.
+    answered = submitted != UNANSWERED
+    columns = np.nonzero(answered)[1]
+    counts = np.bincount(
+        columns * len(codes) + submitted[answered], minlength=len(question_ids) * len(codes)
+    ).reshape(len(question_ids), len(codes)) if len(codes) else np.zeros((len(question_ids), 0), dtype=np.int64)
+    unanswered = students - answered.sum(axis=0)
+
+    items = []
+    for j, (question_id, p_value, r_pb) in enumerate(zip(question_ids, _rounded(p_values), _rounded(discrimination))):
+        flags = []
+        if p_value is not None and p_value > TOO_EASY:
+            flags.append('too_easy')
+        if p_value is not None and p_value < TOO_HARD:
+            flags.append('too_hard')
+        if r_pb is None or r_pb < LOW_DISCRIMINATION:
+            flags.append('non_discriminating')
+
+        entry = answer_key[question_id]
+        items.append({
+            'question_id': int(question_id),
+            'subject': entry['subject'],
+            'difficulty': entry['difficulty'],
+            'correctAnswer': entry['correctAnswer'],
+            'p_value': p_value,
+            'discrimination': r_pb,
+            'choices': {labels[code]: int(count) for code, count in enumerate(counts[j]) if count},
+            'unanswered': int(unanswered[j]),
+            'flags': flags,
+        })
+    return {'students': students, 'questions': items}
+
+
+def get_item_analysis(mocktest_id, answer_key):
+    """
+    Cached item analysis, keyed on the data it is computed from, so a submission or edit
+    through any worker is seen by all and old entries just expire.
+    """
+    data_version = _data_version(mocktest_id)
+    if data_version is None:
+        return compute_item_analysis(answer_key, [])
+    cache = _cache()
+    key = _cache_key(mocktest_id, data_version)
+    data = cache.get(key)
+    if data is None:
+        # Attempts saved before answers were stored can't contribute and are skipped.
+        sheets = [
+            answers for answers in MockTestScores.objects.filter(mocktest_id=mocktest_id).values_list('answers', flat=True)
+            if answers
+        ]
+        data = compute_item_analysis(answer_key, sheets)
+        cache.set(key, data, settings.MOCKTEST_ITEM_ANALYSIS_CACHE_TTL)
+    return data
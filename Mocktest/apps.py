@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MocktestConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Mocktest'
+
+    def ready(self):
+        from . import signals
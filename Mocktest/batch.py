@@ -0,0 +1,143 @@
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from User.mastery import record_mastery
+from .models import MockTestScores, MockTestScoreBreakdown
+from .breakdown import subject_results
+from .matrix import encode_sheets, label_masks
+from .bitmaps import encode_bitmap_rows
+from .history import record_attempts
+
+
+class BatchGrade:
+    """Students x questions grading of many answer sheets against one answer key."""
+
+    def __init__(self, question_ids, correct, difficulty_labels, difficulty_masks, subject_labels, subject_masks):
+        self.question_ids = question_ids
+        self.correct = correct
+        self.scores = correct.sum(axis=1)
+        self.difficulty_labels = difficulty_labels
+        self.difficulty_totals = difficulty_masks.sum(axis=0)
+        self.difficulty_correct = correct.astype(np.int32) @ difficulty_masks
+        self.subject_labels = subject_labels
+        self.subject_totals = subject_masks.sum(axis=0)
+        self.subject_correct = correct.astype(np.int32) @ subject_masks
+
+    def bitmaps(self):
+        return encode_bitmap_rows(self.correct, self.question_ids)
+
+    def breakdown(self, row):
+        rows = [
+            MockTestScoreBreakdown(category=MockTestScoreBreakdown.DIFFICULTY, label=label,
+                                   total=int(total), correct=int(correct))
+            for label, total, correct in zip(self.difficulty_labels, self.difficulty_totals, self.difficulty_correct[row])
+        ]
+        rows.extend(
+            MockTestScoreBreakdown(category=MockTestScoreBreakdown.SUBJECT, label=label,
+                                   total=int(total), correct=int(correct))
+            for label, total, correct in zip(self.subject_labels, self.subject_totals, self.subject_correct[row])
+        )
+        return rows
+
+
+def grade_sheets(answer_key, sheets):
+    """
+    Grade a list of answer dicts at once. Answers are encoded as integer codes so the
+    whole batch is compared against the key with one vectorized equality.
+    """
+    question_ids, _, key_codes, submitted = encode_sheets(answer_key, sheets)
+    difficulty_labels, difficulty_masks = label_masks([answer_key[q]['difficulty'] for q in question_ids])
+    subject_labels, subject_masks = label_masks([answer_key[q]['subject'] for q in question_ids])
+    return BatchGrade(
+        question_ids=np.array([int(question_id) for question_id in question_ids], dtype=np.int64),
+        correct=submitted == key_codes,
+        difficulty_labels=difficulty_labels,
+        difficulty_masks=difficulty_masks,
+        subject_labels=subject_labels,
+        subject_masks=subject_masks,
+    )
+
+
+def validate_sheets(answer_key, sheets, known_students):
+    """Split the posted sheets into gradable (user_name, answers) pairs and per-sheet errors."""
+    valid = []
+    errors = []
+    seen = set()
+    for index, sheet in enumerate(sheets):
+        user_name = sheet.get('user_name') if isinstance(sheet, dict) else None
+        answers = sheet.get('answers') if isinstance(sheet, dict) else None
+        if not user_name or not isinstance(answers, dict):
+            errors.append({'index': index, 'error': 'Each sheet needs a user_name and an answers object.'})
+        elif user_name not in known_students:
+            errors.append({'index': index, 'user_name': user_name, 'error': 'Student does not exist.'})
+        elif user_name in seen:
+            errors.append({'index': index, 'user_name': user_name, 'error': 'Duplicate sheet for this student.'})
+        else:
+            unknown = [question_id for question_id in answers if str(question_id) not in answer_key]
+            if unknown:
+                errors.append({'index': index, 'user_name': user_name,
+                               'error': f"Questions {unknown} are not part of this mock test."})
+                continue
+            if any(answer is not None and not isinstance(answer, str) for answer in answers.values()):
+                errors.append({'index': index, 'user_name': user_name, 'error': 'Answers must be strings.'})
+                continue
+            seen.add(user_name)
+            valid.append((user_name, answers))
+    return valid, errors
+
+
+def save_batch(mocktest, user_names, sheets, graded, pending_feedback=False):
+    """Upsert one MockTestScores row per student, with its correctness bitmap and breakdown rows."""
+    now = timezone.now()
+    total_questions = len(graded.question_ids)
+    feedback_status = MockTestScores.FEEDBACK_PENDING if pending_feedback else MockTestScores.FEEDBACK_READY
+
+    with transaction.atomic():
+        existing = {
+            score.student_id: score
+            for score in MockTestScores.objects.select_for_update().filter(mocktest_id=mocktest, student_id__in=user_names)
+        }
+        to_create = []
+        to_update = []
+        bitmaps = graded.bitmaps()
+        for row, user_name in enumerate(user_names):
+            score = existing.get(user_name) or MockTestScores(mocktest_id=mocktest, student_id=user_name)
+            score.score = int(graded.scores[row])
+            score.correct_bitmap = bitmaps[row]
+            score.totalQuestions = total_questions
+            score.mocktestDateTaken = now
+            score.answers = sheets[row]
+            score.feedback = ''
+            score.feedback_status = feedback_status
+            score.feedback_requested_at = now if pending_feedback else None
+            (to_update if score.pk else to_create).append(score)
+
+        MockTestScores.objects.bulk_update(
+            to_update,
+            ['score', 'totalQuestions', 'mocktestDateTaken', 'answers', 'correct_bitmap', 'feedback', 'feedback_status',
+             'feedback_requested_at'],
+            batch_size=500
+        )
+        MockTestScores.objects.bulk_create(to_create)
+
+        # bulk_create doesn't return primary keys on MySQL, so read them back in one query.
+        score_ids = dict(
+            MockTestScores.objects.filter(mocktest_id=mocktest, student_id__in=user_names).values_list('student_id', 'pk')
+        )
+        MockTestScoreBreakdown.objects.filter(mocktest_score_id__in=list(score_ids.values())).delete()
+
+        breakdown_rows = []
+        attempts = []
+        mastery = {}
+        for row, user_name in enumerate(user_names):
+            rows = graded.breakdown(row)
+            for breakdown in rows:
+                breakdown.mocktest_score_id = score_ids[user_name]
+            breakdown_rows.extend(rows)
+            attempts.append((mocktest.pk, user_name, int(graded.scores[row]), total_questions, bitmaps[row], rows, now))
+            mastery[user_name] = subject_results(rows)
+        MockTestScoreBreakdown.objects.bulk_create(breakdown_rows, batch_size=5000)
+        record_attempts(attempts)
+        record_mastery(mastery)
+
+    return score_ids, now
@@ -0,0 +1,173 @@
+import hashlib
+from functools import lru_cache
+import numpy as np
+from django.db import transaction
+from .models import QuestionSet
+
+# A correctness bitmap is the 8-byte big-endian id of a QuestionSet, the ids of the test's
+# questions in ascending order when it was graded, followed by bits (little-endian within
+# each byte) where bit i means the i-th question of that set was answered correctly. Rows
+# graded against the same questions share a set and line up byte for byte; a question
+# added later only widens the rows graded after it. Set 0 is the empty set.
+HEADER_SIZE = 8
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+MAX_CACHED_SETS = 4096
+
+_set_ids = {}
+
+
+def question_set_digest(question_ids):
+    return hashlib.sha1(','.join(str(question_id) for question_id in question_ids).encode()).hexdigest()
+
+
+def question_set_id(question_ids):
+    """The id of the set of these (ascending) question ids, created the first time it's seen."""
+    if not question_ids:
+        return 0
+    digest = question_set_digest(question_ids)
+    set_id = _set_ids.get(digest)
+    if set_id is None:
+        set_id = QuestionSet.objects.get_or_create(digest=digest, defaults={'question_ids': list(question_ids)})[0].pk
+
+        def remember():
+            if len(_set_ids) >= MAX_CACHED_SETS:
+                _set_ids.clear()
+            _set_ids[digest] = set_id
+        # Sets are never changed, but one created in a transaction that rolls back is gone.
+        transaction.on_commit(remember)
+    return set_id
+
+
+@lru_cache(maxsize=MAX_CACHED_SETS)
+def load_question_set(set_id):
+    if not set_id:
+        return ()
+    question_ids = QuestionSet.objects.filter(pk=set_id).values_list('question_ids', flat=True).first()
+    return tuple(question_ids or ())
+
+
+def _sorted_ids(question_ids):
+    return tuple(sorted(int(question_id) for question_id in question_ids))
+
+
+def encode_bitmap(correct_ids, question_ids):
+    """Bitmap of the correct ids over a test's questions; raises ValueError for ids not among them."""
+    question_ids = _sorted_ids(question_ids)
+    position = {question_id: i for i, question_id in enumerate(question_ids)}
+    bits = np.zeros(len(question_ids), dtype=bool)
+    for question_id in correct_ids:
+        if int(question_id) not in position:
+            raise ValueError(f"Question {question_id} is not part of this test.")
+        bits[position[int(question_id)]] = True
+    header = question_set_id(question_ids).to_bytes(HEADER_SIZE, 'big')
+    return header + np.packbits(bits, bitorder='little').tobytes()
+
+
+def encode_bitmap_rows(correct, question_ids):
+    """Bitmaps for every row of a students x questions boolean matrix, all sharing one question set."""
+    question_ids = np.asarray(question_ids, dtype=np.int64)
+    order = np.argsort(question_ids, kind='stable')
+    header = question_set_id(tuple(question_ids[order].tolist())).to_bytes(HEADER_SIZE, 'big')
+    packed = np.packbits(np.asarray(correct, dtype=bool)[:, order], axis=1, bitorder='little')
+    return [header + row.tobytes() for row in packed]
+
+
+def bitmap_question_ids(bitmap):
+    """The question ids the bitmap was graded over, ascending."""
+    if not bitmap:
+        return ()
+    return load_question_set(int.from_bytes(bytes(bitmap[:HEADER_SIZE]), 'big'))
+
+
+def _unpack(bitmap):
+    bitmap = bytes(bitmap)
+    question_ids = bitmap_question_ids(bitmap)
+    bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8, offset=HEADER_SIZE), bitorder='little')
+    return question_ids, bits[:len(question_ids)]
+
+
+def decode_bitmap(bitmap):
+    if not bitmap:
+        return []
+    question_ids, bits = _unpack(bitmap)
+    return [question_ids[position] for position in np.flatnonzero(bits).tolist()]
+
+
+def _by_set(bitmaps):
+    # Row numbers of the non-empty bitmaps, grouped by question set.
+    groups = {}
+    for row, bitmap in enumerate(bitmaps):
+        if bitmap:
+            groups.setdefault(int.from_bytes(bytes(bitmap[:HEADER_SIZE]), 'big'), []).append(row)
+    return groups
+
+
+def bitmap_matrix(bitmaps, question_ids):
+    """Bitmaps x questions boolean matrix of which of the given question ids each bitmap marks correct."""
+    column = {int(question_id): j for j, question_id in enumerate(question_ids)}
+    matrix = np.zeros((len(bitmaps), len(column)), dtype=bool)
+    for set_id, rows in _by_set(bitmaps).items():
+        set_ids = load_question_set(set_id)
+        nbytes = (len(set_ids) + 7) // 8
+        packed = np.zeros((len(rows), nbytes), dtype=np.uint8)
+        for i, row in enumerate(rows):
+            data = np.frombuffer(bytes(bitmaps[row]), dtype=np.uint8, offset=HEADER_SIZE)[:nbytes]
+            packed[i, :len(data)] = data
+        bits = np.unpackbits(packed, axis=1, bitorder='little')
+        source = [position for position, question_id in enumerate(set_ids) if question_id in column]
+        target = [column[set_ids[position]] for position in source]
+        matrix[np.ix_(rows, target)] = bits[:, source]
+    return matrix
+
+
+def covering(bitmaps, question_ids):
+    """The bitmaps graded over every one of the given questions, so a clear bit is a wrong answer."""
+    wanted = set(int(question_id) for question_id in question_ids)
+    kept = set()
+    for set_id, rows in _by_set(bitmaps).items():
+        if wanted <= set(load_question_set(set_id)):
+            kept.update(rows)
+    return [bitmap for row, bitmap in enumerate(bitmaps) if row in kept]
+
+
+class QuestionMasks:
+    """
+    Per-label masks over the questions of one test, so correct counts by difficulty or
+    subject for many bitmaps are an AND plus a popcount lookup per byte.
+    """
+
+    def __init__(self, question_ids, labels):
+        questions = sorted(zip((int(question_id) for question_id in question_ids), labels))
+        self.question_ids = tuple(question_id for question_id, _ in questions)
+        self.nbytes = (len(questions) + 7) // 8
+        self.labels = sorted(set(labels))
+        bits = np.zeros((len(self.labels), self.nbytes * 8), dtype=bool)
+        index = {label: row for row, label in enumerate(self.labels)}
+        for position, (_, label) in enumerate(questions):
+            bits[index[label], position] = True
+        self.masks = np.packbits(bits, axis=1, bitorder='little')
+        self.totals = bits.sum(axis=1)
+
+    def _aligned(self, bitmaps):
+        # Bitmaps graded against the test's current questions are used as they are; others
+        # (graded before a question was added or removed) are remapped by question id.
+        rows = np.zeros((len(bitmaps), self.nbytes), dtype=np.uint8)
+        remapped = []
+        for set_id, members in _by_set(bitmaps).items():
+            if load_question_set(set_id) != self.question_ids:
+                remapped.extend(members)
+                continue
+            for row in members:
+                data = np.frombuffer(bytes(bitmaps[row]), dtype=np.uint8, offset=HEADER_SIZE)[:self.nbytes]
+                rows[row, :len(data)] = data
+        if remapped:
+            matrix = bitmap_matrix([bitmaps[row] for row in remapped], self.question_ids)
+            rows[remapped] = np.packbits(matrix, axis=1, bitorder='little').reshape(len(remapped), self.nbytes)
+        return rows
+
+    def count(self, bitmaps):
+        """Correct answers per bitmap and label, as a bitmaps x labels array."""
+        if not self.labels:
+            return np.zeros((len(bitmaps), 0), dtype=np.int64)
+        rows = self._aligned(bitmaps)
+        return POPCOUNT[rows[:, None, :] & self.masks[None, :, :]].sum(axis=2, dtype=np.int64)
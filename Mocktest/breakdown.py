@@ -0,0 +1,48 @@
+from .models import MockTestScoreBreakdown
+
+
+def build_breakdown(answer_key, correct_ids):
+    """Per-difficulty and per-subject total/correct rows for one graded attempt (unsaved)."""
+    correct_ids = {str(question_id) for question_id in correct_ids}
+    counts = {}
+    for question_id, entry in answer_key.items():
+        is_correct = question_id in correct_ids
+        for category, label in ((MockTestScoreBreakdown.DIFFICULTY, entry['difficulty']),
+                                (MockTestScoreBreakdown.SUBJECT, entry['subject'])):
+            total, correct = counts.get((category, label), (0, 0))
+            counts[(category, label)] = (total + 1, correct + is_correct)
+
+    return [
+        MockTestScoreBreakdown(category=category, label=label, total=total, correct=correct)
+        for (category, label), (total, correct) in sorted(counts.items())
+    ]
+
+
+def subject_results(rows):
+    """{subject: (correct, total)} from an attempt's breakdown rows, as recorded for mastery."""
+    return {row.label: (row.correct, row.total) for row in rows if row.category == MockTestScoreBreakdown.SUBJECT}
+
+
+def summarize_breakdown(rows):
+    summary = {
+        'easy_count': 0,
+        'medium_count': 0,
+        'hard_count': 0,
+        'easy_correct': 0,
+        'medium_correct': 0,
+        'hard_correct': 0,
+        'subjects_count': 0,
+        'difficulties': [],
+        'subjects': [],
+    }
+    for row in sorted(rows, key=lambda row: (row.category, row.label)):
+        if row.category == MockTestScoreBreakdown.DIFFICULTY:
+            summary['difficulties'].append({'difficulty': row.label, 'total': row.total, 'correct': row.correct})
+            prefix = row.label.lower()
+            if f'{prefix}_count' in summary:
+                summary[f'{prefix}_count'] = row.total
+                summary[f'{prefix}_correct'] = row.correct
+        else:
+            summary['subjects'].append({'subject': row.label, 'total': row.total, 'correct': row.correct})
+    summary['subjects_count'] = len(summary['subjects'])
+    return summary
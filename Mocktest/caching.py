@@ -0,0 +1,118 @@
+import threading
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
+
+# Backends whose entries only the current process sees.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _visible_to_all(alias):
+    return bool(alias) and settings.CACHES.get(alias, {}).get('BACKEND') not in PROCESS_LOCAL_BACKENDS
+
+
+def shared_cache():
+    """The cache named by MOCKTEST_SHARED_CACHE, or None if there is none every worker can see."""
+    alias = settings.MOCKTEST_SHARED_CACHE
+    return caches[alias] if _visible_to_all(alias) else None
+
+
+class TieredCache:
+    """
+    Per-worker LRU (with a TTL safety net) in front of an optional shared Django cache.
+
+    With a shared tier configured, invalidation bumps a version key there, so every
+    worker drops its local copy on the next lookup instead of waiting for the TTL.
+    Without one, version_loader (key -> version stored in the database) is checked on
+    every lookup instead, so other workers' writes are seen without a shared cache.
+    """
+
+    def __init__(self, name, maxsize, ttl, shared_alias=None, version_loader=None):
+        self.name = name
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.version_loader = version_loader
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _shared(self):
+        # A per-process backend would only add a second local tier.
+        return caches[self.shared_alias] if _visible_to_all(self.shared_alias) else None
+
+    def _version_key(self, key):
+        return f'{self.name}:version:{key}'
+
+    def _value_key(self, key, version):
+        return f'{self.name}:{key}:{version}'
+
+    def _version(self, key):
+        shared = self._shared()
+        if shared:
+            return shared.get(self._version_key(key), 0)
+        return self.version_loader(key) if self.version_loader else 0
+
+    def _lookup(self, key, version):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+
+        shared = self._shared()
+        value = shared.get(self._value_key(key, version)) if shared else None
+        with self._lock:
+            if value is not None:
+                self.shared_hits += 1
+                self._local[key] = (version, value)
+            else:
+                self.misses += 1
+        return value
+
+    def _store(self, key, version, value):
+        shared = self._shared()
+        if shared:
+            shared.set(self._value_key(key, version), value, self.ttl)
+        with self._lock:
+            self._local[key] = (version, value)
+
+    def get(self, key):
+        return self._lookup(key, self._version(key))
+
+    def set(self, key, value):
+        self._store(key, self._version(key), value)
+
+    def get_or_load(self, key, loader):
+        version = self._version(key)
+        value = self._lookup(key, version)
+        if value is None:
+            value = loader()
+            self._store(key, version, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        shared = self._shared()
+        if shared:
+            version_key = self._version_key(key)
+            shared.add(version_key, 0, None)
+            shared.incr(version_key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else None,
+                'size': len(self._local),
+                'maxsize': self._local.maxsize,
+                'shared_cache': self.shared_alias,
+            }
@@ -0,0 +1,80 @@
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from .models import MockQuestions, MockTestAttempt, ItemCalibration
+from .bitmaps import bitmap_matrix, covering
+from .adaptive import PRIOR_DIFFICULTY, probability
+
+# Priors keep items with few responses close to their Difficulty level and a = 1.
+DIFFICULTY_PRIOR_SD = 1.0
+DISCRIMINATION_PRIOR_SD = 0.5
+
+
+def fit_items(correct, prior_difficulty, iterations=50, rasch=False):
+    """
+    Joint maximum a posteriori fit of a 2PL (or Rasch) model to a persons x items boolean
+    matrix, alternating one Newton step for the abilities and one for the item parameters.
+    Returns (difficulty, discrimination, theta).
+    """
+    correct = correct.astype(np.float64)
+    theta = np.zeros(correct.shape[0])
+    difficulty = np.asarray(prior_difficulty, dtype=np.float64).copy()
+    discrimination = np.ones(correct.shape[1])
+
+    for _ in range(iterations):
+        p = probability(discrimination, difficulty, theta[:, None])
+        residual = correct - p
+        theta += (residual @ discrimination - theta) / ((p * (1 - p)) @ discrimination ** 2 + 1)
+        theta = np.clip(theta, -4, 4)
+
+        p = probability(discrimination, difficulty, theta[:, None])
+        residual = correct - p
+        variance = p * (1 - p)
+        gradient = -discrimination * residual.sum(axis=0) - (difficulty - prior_difficulty) / DIFFICULTY_PRIOR_SD ** 2
+        difficulty += gradient / (discrimination ** 2 * variance.sum(axis=0) + 1 / DIFFICULTY_PRIOR_SD ** 2)
+        difficulty = np.clip(difficulty, -4, 4)
+
+        if not rasch:
+            distance = theta[:, None] - difficulty
+            gradient = (residual * distance).sum(axis=0) - (discrimination - 1) / DISCRIMINATION_PRIOR_SD ** 2
+            information = (variance * distance ** 2).sum(axis=0) + 1 / DISCRIMINATION_PRIOR_SD ** 2
+            discrimination = np.clip(discrimination + gradient / information, 0.2, 3.0)
+
+    return difficulty, discrimination, theta
+
+
+def calibrate_mocktest(mocktest_id, min_responses=30, iterations=50, rasch=False):
+    """
+    Fit the questions of one mock test from its attempt history and store the parameters.
+    Only attempts graded over every current question are used, since a bitmap can't tell
+    a wrong answer from a question that didn't exist yet. Returns the number of attempts used.
+    """
+    questions = list(MockQuestions.objects.filter(mocktest_id=mocktest_id).order_by('id').values_list('id', 'difficulty__name'))
+    if not questions:
+        return 0
+    question_ids = [question_id for question_id, _ in questions]
+    bitmaps = covering(list(MockTestAttempt.objects.filter(
+        mocktest_id=mocktest_id, totalQuestions__gte=len(questions)
+    ).values_list('correct_bitmap', flat=True)), question_ids)
+    if len(bitmaps) < min_responses:
+        return 0
+
+    prior = np.array([PRIOR_DIFFICULTY.get(level, 0.0) for _, level in questions])
+    difficulty, discrimination, _ = fit_items(bitmap_matrix(bitmaps, question_ids), prior, iterations, rasch)
+
+    existing = {row.question_id: row for row in ItemCalibration.objects.filter(question_id__in=question_ids)}
+    to_create = []
+    to_update = []
+    now = timezone.now()
+    for position, question_id in enumerate(question_ids):
+        row = existing.get(question_id) or ItemCalibration(question_id=question_id)
+        row.difficulty = float(difficulty[position])
+        row.discrimination = float(discrimination[position])
+        row.responses = len(bitmaps)
+        # bulk_update skips auto_now, so the timestamp is set by hand.
+        row.calibrated_at = now
+        (to_update if row.pk else to_create).append(row)
+    with transaction.atomic():
+        ItemCalibration.objects.bulk_update(to_update, ['difficulty', 'discrimination', 'responses', 'calibrated_at'])
+        ItemCalibration.objects.bulk_create(to_create)
+    return len(bitmaps)
@@ -0,0 +1,284 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+from django.conf import settings
+from Course.models import ExerciseQuestions
+from .models import MockQuestions
+
+# Questions are compared as sets of character shingles of their normalized text. A MinHash
+# signature estimates the Jaccard similarity of two sets, and LSH banding (signatures that
+# agree on every row of some band share a bucket) finds candidate pairs without a scan:
+# with 16 bands of 8 rows, pairs above ~0.7 similarity are very likely to collide.
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SEED = 1729
+_rng = np.random.default_rng(SEED)
+PERM_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+PERM_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+
+KINDS = ('mocktest', 'exercise')
+MOCKTEST, EXERCISE = range(len(KINDS))
+MODELS = {MOCKTEST: MockQuestions, EXERCISE: ExerciseQuestions}
+
+
+def normalize(text):
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', re.sub(r'<[^>]+>', ' ', (text or '').lower())).split())
+
+
+def signature(text):
+    text = normalize(text)
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    # Multiply-shift hashing, one permutation per column; uint64 overflow wraps on purpose.
+    return ((hashes[:, None] * PERM_A + PERM_B) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+
+def _band_keys(signature):
+    return [signature[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+
+# Catching up re-reads rows changed this long before the watermark, so an edit committed a
+# little after its updated_at is still picked up. Bump FORMAT when the saved file changes.
+CATCH_UP_OVERLAP = timedelta(seconds=60)
+FORMAT = 2
+
+
+class DuplicateIndex:
+    """
+    In-memory LSH index of question signatures keyed by (kind, question id). Removed or
+    replaced entries are only dropped from the lookup until they outnumber the live ones,
+    then the arrays are compacted; save() writes the live ones.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.signatures = []
+        self.positions = {}
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        # Per kind, the latest updated_at caught up to, or None before the first catch_up.
+        self.watermarks = [None] * len(KINDS)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _append(self, key, signature):
+        position = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(signature)
+        self.positions[key] = position
+        for band, band_key in enumerate(_band_keys(signature)):
+            self.buckets[band][band_key].append(position)
+
+    def _compact(self):
+        live = sorted(self.positions.items(), key=lambda item: item[1])
+        signatures = self.signatures
+        self.keys = []
+        self.signatures = []
+        self.positions = {}
+        self.buckets = [defaultdict(list) for _ in range(BANDS)]
+        for key, position in live:
+            self._append(key, signatures[position])
+
+    def add(self, kind, question_id, signature, updated_at=None):
+        """Index a question's signature; updated_at (as read from the table) advances the watermark."""
+        key = (kind, question_id)
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None or not np.array_equal(self.signatures[position], signature):
+                self._append(key, signature)
+                if len(self.keys) > 2 * len(self.positions) + 1024:
+                    self._compact()
+            if updated_at is not None and (self.watermarks[kind] is None or updated_at > self.watermarks[kind]):
+                self.watermarks[kind] = updated_at
+
+    def remove(self, kind, question_id):
+        with self.lock:
+            self.positions.pop((kind, question_id), None)
+
+    def query(self, signature, threshold, exclude=None):
+        """[((kind, question id), estimated similarity)] of live entries at or above threshold, best first."""
+        matches = []
+        with self.lock:
+            candidates = set()
+            for band, key in enumerate(_band_keys(signature)):
+                candidates.update(self.buckets[band].get(key, ()))
+            for position in candidates:
+                key = self.keys[position]
+                if key == exclude or self.positions.get(key) != position:
+                    continue
+                similarity = float(np.count_nonzero(self.signatures[position] == signature)) / NUM_PERM
+                if similarity >= threshold:
+                    matches.append((key, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+    def catch_up(self):
+        """
+        Index questions added or edited since the watermarks, e.g. by other workers or bulk
+        writes, and drop deleted ones. The ids are compared with the table when rows changed
+        since the watermark, as an add can hide a delete from the row count, or when the
+        table holds fewer rows than the index.
+        """
+        for kind, model in MODELS.items():
+            rows = model.objects.all()
+            if self.watermarks[kind] is not None:
+                rows = rows.filter(updated_at__gte=self.watermarks[kind] - CATCH_UP_OVERLAP)
+            changed = False
+            for question_id, text, updated_at in rows.values_list('pk', 'question', 'updated_at').iterator():
+                self.add(kind, question_id, signature(text), updated_at)
+                changed = True
+
+            with self.lock:
+                indexed = [question_id for entry_kind, question_id in self.positions if entry_kind == kind]
+            if changed or model.objects.count() < len(indexed):
+                existing = set(model.objects.values_list('pk', flat=True))
+                for question_id in indexed:
+                    if question_id not in existing:
+                        self.remove(kind, question_id)
+
+    def save(self, path):
+        with self.lock:
+            live = sorted(self.positions.items())
+            kinds = np.array([kind for (kind, _), _ in live], dtype=np.int8)
+            ids = np.array([question_id for (_, question_id), _ in live], dtype=np.int64)
+            signatures = np.array([self.signatures[position] for _, position in live], dtype=np.uint32).reshape(len(live), NUM_PERM)
+            watermarks = np.array([watermark.isoformat() if watermark else '' for watermark in self.watermarks])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so workers never load a half-written file.
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as stream:
+            np.savez(stream, kinds=kinds, ids=ids, signatures=signatures, watermarks=watermarks,
+                     params=np.array([FORMAT, SHINGLE_SIZE, NUM_PERM, BANDS, SEED], dtype=np.int64))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """The saved index, or None if it was built with different parameters or format."""
+        with np.load(path) as data:
+            if data['params'].tolist() != [FORMAT, SHINGLE_SIZE, NUM_PERM, BANDS, SEED]:
+                return None
+            index = cls()
+            for kind, question_id, signature in zip(data['kinds'].tolist(), data['ids'].tolist(), data['signatures']):
+                index.add(kind, question_id, signature)
+            index.watermarks = [datetime.fromisoformat(watermark) if watermark else None
+                                for watermark in data['watermarks'].tolist()]
+        return index
+
+
+def build_index():
+    index = DuplicateIndex()
+    index.catch_up()
+    return index
+
+
+_index = None
+_index_mtime = None
+_refreshed_at = 0.0
+_state_lock = threading.Lock()
+
+
+def _saved_mtime():
+    try:
+        return os.stat(settings.QUESTION_DEDUP_INDEX_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get_index():
+    """
+    This worker's index: loaded from the saved file (rebuilt from the tables only if there
+    is none), reloaded when the file is replaced and caught up on new rows periodically.
+    """
+    global _index, _index_mtime, _refreshed_at
+    with _state_lock:
+        mtime = _saved_mtime()
+        if _index is None or (mtime is not None and mtime != _index_mtime):
+            index = DuplicateIndex.load(settings.QUESTION_DEDUP_INDEX_PATH) if mtime is not None else None
+            if index is None:
+                index = build_index()
+                index.save(settings.QUESTION_DEDUP_INDEX_PATH)
+                mtime = _saved_mtime()
+            _index, _index_mtime = index, mtime
+            _index.catch_up()
+            _refreshed_at = time.monotonic()
+        elif time.monotonic() - _refreshed_at > settings.QUESTION_DEDUP_REFRESH_INTERVAL:
+            _index.catch_up()
+            _refreshed_at = time.monotonic()
+        return _index
+
+
+def index_question(kind, question_id, text):
+    # Only keeps an already loaded index current; an unloaded one catches up when loaded.
+    # The watermark isn't advanced, so rows other workers wrote before this one are still caught up.
+    if _index is not None:
+        _index.add(kind, question_id, signature(text))
+
+
+def unindex_question(kind, question_id):
+    if _index is not None:
+        _index.remove(kind, question_id)
+
+
+def find_duplicates(text, exclude=None, threshold=None, limit=10):
+    """Indexed questions similar to the text, as [{'type', 'id', 'similarity'}]."""
+    threshold = settings.QUESTION_DEDUP_THRESHOLD if threshold is None else threshold
+    matches = get_index().query(signature(text), threshold, exclude)[:limit]
+    return [{'type': KINDS[kind], 'id': question_id, 'similarity': round(similarity, 3)}
+            for (kind, question_id), similarity in matches]
+
+
+def course_duplicates(course_id, threshold=None):
+    """
+    Groups of near-duplicate questions among a course's mock test and exercise questions,
+    largest first. Signatures are computed from the current text, not the shared index.
+    """
+    threshold = settings.QUESTION_DEDUP_THRESHOLD if threshold is None else threshold
+    texts = {}
+    index = DuplicateIndex()
+    querysets = {
+        MOCKTEST: MockQuestions.objects.filter(mocktest__course_id=course_id),
+        EXERCISE: ExerciseQuestions.objects.filter(exercise__lesson__syllabus__course_id=course_id),
+    }
+    for kind, queryset in querysets.items():
+        for question_id, text in queryset.values_list('pk', 'question').iterator():
+            texts[(kind, question_id)] = text
+            index.add(kind, question_id, signature(text))
+
+    # Union-find over every matching pair.
+    parent = {key: key for key in texts}
+
+    def root(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    similarities = defaultdict(float)
+    for key, position in index.positions.items():
+        for other, similarity in index.query(index.signatures[position], threshold, exclude=key):
+            a, b = root(key), root(other)
+            if a != b:
+                parent[b] = a
+            similarities[key] = max(similarities[key], similarity)
+
+    groups = defaultdict(list)
+    for key in texts:
+        groups[root(key)].append(key)
+    report = [
+        {
+            'similarity': round(max(similarities[key] for key in keys), 3),
+            'questions': [{'type': KINDS[kind], 'id': question_id, 'question': texts[(kind, question_id)]}
+                          for kind, question_id in sorted(keys)],
+        }
+        for keys in groups.values() if len(keys) > 1
+    ]
+    report.sort(key=lambda group: (-len(group['questions']), -group['similarity']))
+    return report
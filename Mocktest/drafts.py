@@ -0,0 +1,183 @@
+import atexit
+import logging
+import threading
+import time
+from cachetools import TTLCache
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from User.models import Student
+from .models import MockTestAttemptDraft
+
+logger = logging.getLogger(__name__)
+
+
+class DraftBuffer:
+    """
+    Per-worker write-behind buffer for autosaved answers. Saves only touch memory; the
+    buffer is written to MockTestAttemptDraft in one batch every flush interval, or as
+    soon as it holds flush_size attempts.
+
+    Every answer keeps the time it was received, and flushes merge newest-wins into the
+    stored draft, so workers flushing the same attempt out of order don't lose answers.
+    """
+
+    def __init__(self, flush_interval, flush_size):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def save(self, mocktest_id, student_id, answers):
+        received_at = time.time()
+        with self._lock:
+            entry = self._pending.setdefault((mocktest_id, student_id), {})
+            for question_id, answer in answers.items():
+                entry[str(question_id)] = (answer, received_at)
+            full = len(self._pending) >= self.flush_size
+            self._start_timer()
+        if full:
+            self.flush()
+
+    def _start_timer(self):
+        if self._timer is None or not self._timer.is_alive():
+            self._timer = threading.Thread(target=self._run_timer, name='mocktest-draft-flush', daemon=True)
+            self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Draft flush failed')
+            finally:
+                close_old_connections()
+            with self._lock:
+                if not self._pending:
+                    self._timer = None
+                    return
+
+    def _take(self, keys=None):
+        with self._lock:
+            if keys is None:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {key: self._pending.pop(key) for key in keys if key in self._pending}
+        return pending
+
+    def _restore(self, pending):
+        # Put entries back after a failed flush without overwriting newer saves.
+        with self._lock:
+            for key, entry in pending.items():
+                current = self._pending.setdefault(key, {})
+                for question_id, value in entry.items():
+                    if question_id not in current or current[question_id][1] < value[1]:
+                        current[question_id] = value
+
+    def flush(self, keys=None):
+        """Write buffered answers (all, or only the given (mocktest id, student id) keys) to the database."""
+        with self._flush_lock:
+            pending = self._take(keys)
+            if not pending:
+                return 0
+            try:
+                write_drafts(pending)
+            except Exception:
+                self._restore(pending)
+                raise
+            return len(pending)
+
+    def peek(self, mocktest_id, student_id):
+        with self._lock:
+            return dict(self._pending.get((mocktest_id, student_id), {}))
+
+    def discard(self, mocktest_id, student_id):
+        with self._lock:
+            self._pending.pop((mocktest_id, student_id), None)
+
+
+def _merge(answers, answered_at, entry, submitted_at=None):
+    # Answers received before the attempt was submitted belong to it and are dropped.
+    cutoff = submitted_at.timestamp() if submitted_at else 0
+    for question_id, (answer, received_at) in entry.items():
+        if received_at > cutoff and answered_at.get(question_id, 0) <= received_at:
+            answers[question_id] = answer
+            answered_at[question_id] = received_at
+
+
+def write_drafts(pending):
+    """
+    Merge {(mocktest id, student id): {question id: (answer, received at)}} into the drafts:
+    one insert for missing rows, one locking read and one bulk update. A submitted draft
+    only takes answers received after the submission, which start the next attempt, so a
+    late flush from another worker can't change an attempt that was already graded.
+    """
+    lookup = Q()
+    for mocktest_id, student_id in pending:
+        lookup |= Q(mocktest_id=mocktest_id, student_id=student_id)
+
+    with transaction.atomic():
+        MockTestAttemptDraft.objects.bulk_create(
+            [MockTestAttemptDraft(mocktest_id=mocktest_id, student_id=student_id) for mocktest_id, student_id in pending],
+            ignore_conflicts=True
+        )
+        drafts = list(MockTestAttemptDraft.objects.select_for_update().filter(lookup))
+        now = timezone.now()
+        for draft in drafts:
+            _merge(draft.answers, draft.answered_at, pending[(draft.mocktest_id, draft.student_id)], draft.submitted_at)
+            draft.updated_at = now
+        MockTestAttemptDraft.objects.bulk_update(drafts, ['answers', 'answered_at', 'updated_at'], batch_size=500)
+
+
+buffer = DraftBuffer(settings.MOCKTEST_DRAFT_FLUSH_INTERVAL, settings.MOCKTEST_DRAFT_FLUSH_SIZE)
+atexit.register(buffer.flush)
+
+_known_students = TTLCache(maxsize=10000, ttl=60 * 10)
+_known_students_lock = threading.Lock()
+
+
+def student_exists(user_name):
+    # Autosaves arrive every few seconds, so only the first one per student hits the database.
+    with _known_students_lock:
+        if user_name in _known_students:
+            return True
+    exists = Student.objects.filter(user_name=user_name).exists()
+    if exists:
+        with _known_students_lock:
+            _known_students[user_name] = True
+    return exists
+
+
+def load_draft(mocktest_id, student_id):
+    """
+    The student's saved answers: the stored draft plus anything still buffered in this
+    worker. Answers other workers haven't flushed yet aren't included; once the attempt is
+    submitted they are dropped by write_drafts rather than added to the graded attempt.
+    """
+    draft = MockTestAttemptDraft.objects.filter(mocktest_id=mocktest_id, student_id=student_id).values(
+        'answers', 'answered_at', 'submitted_at'
+    ).first() or {'answers': {}, 'answered_at': {}, 'submitted_at': None}
+    answers, answered_at = draft['answers'], draft['answered_at']
+    _merge(answers, answered_at, buffer.peek(mocktest_id, student_id), draft['submitted_at'])
+    return answers
+
+
+def discard_draft(mocktest_id, student_id):
+    """
+    Empty the draft of a submitted attempt. The row stays, marked submitted, so a flush of
+    answers another worker buffered before the submission can't bring the draft back or
+    change what was graded.
+    """
+    buffer.discard(mocktest_id, student_id)
+    now = timezone.now()
+    MockTestAttemptDraft.objects.bulk_create(
+        [MockTestAttemptDraft(mocktest_id=mocktest_id, student_id=student_id)], ignore_conflicts=True
+    )
+    MockTestAttemptDraft.objects.filter(mocktest_id=mocktest_id, student_id=student_id).update(
+        answers={}, answered_at={}, submitted_at=now, updated_at=now
+    )
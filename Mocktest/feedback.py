@@ -0,0 +1,298 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import environ
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from openai import OpenAI
+from .models import MockTestScores
+from .caching import TieredCache
+from .grading import grade_answers, load_answer_key
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_MODEL = "gpt-4-turbo"
+
+# The prompt never contains the student's name: the model writes this placeholder and the
+# name is put in when the text is shown, so memoized feedback can be shared between
+# students without carrying anyone's name.
+NAME_PLACEHOLDER = '[[name]]'
+
+SYSTEM_PROMPT = "You are Preppy, BoardPrep's Engineering Companion and an excellent and critical engineer, tasked with providing constructive feedback on mock test performances of your students. In giving a feedback, you don't thank the student for sharing the details, instead you congratulate the student first for finishing the mock test, then you provide your feedbacks. After providing your feedbacks, you then put your signature at the end of your response"
+
+
+def build_feedback_messages(specialization_name, result):
+    if len(result.correct_answers) > 0:
+        correct_answers_paragraph = "Here are the questions where I got the correct answer:\n"
+    else:
+        correct_answers_paragraph = "I got all the questions wrong.\n"
+    for item in result.correct_answers:
+        correct_answers_paragraph += f"Question: {item['question']} - Submitted Answer: {item['submittedAnswer']}, Subject: {item['subject']}\n"
+
+    if len(result.wrong_answers) > 0:
+        wrong_answers_paragraph = "Here are the questions where I got the wrong answer:\n"
+    else:
+        wrong_answers_paragraph = "I got all the questions correct.\n"
+    for item in result.wrong_answers:
+        wrong_answers_paragraph += f"Question: {item['question']} - Submitted Answer: {item['submittedAnswer']}, Correct Answer: {item['correctAnswer']}, Subject: {item['subject']}\n"
+
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"I am {NAME_PLACEHOLDER}, a {specialization_name} major, and here are the details of my test. {correct_answers_paragraph}\n\n{wrong_answers_paragraph}\n\nBased on these results, can you provide some feedback and suggestions for improvement, like what subjects to focus on, which field i excel, and some strategies? Address me directly, and don't put any other placeholders as this will be displayed directly in unformatted text form. Whenever you use my name, write exactly {NAME_PLACEHOLDER}; it is replaced with my name before your answer is shown."}
+    ]
+
+
+class _FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class _FakeChoice:
+    def __init__(self, content):
+        self.message = _FakeMessage(content)
+
+
+class _FakeCompletion:
+    def __init__(self, content):
+        self.choices = [_FakeChoice(content)]
+
+
+class _FakeDelta:
+    def __init__(self, content):
+        self.content = content
+
+
+class _FakeChunkChoice:
+    def __init__(self, content):
+        self.delta = _FakeDelta(content)
+
+
+class _FakeChunk:
+    def __init__(self, content):
+        self.choices = [_FakeChunkChoice(content)]
+
+
+class _FakeCompletions:
+    def create(self, model, messages, stream=False, **kwargs):
+        completion = self._complete(messages)
+        if stream:
+            content = completion.choices[0].message.content
+            return (_FakeChunk(token) for token in re.findall(r'\S+\s*|\s+', content))
+        return completion
+
+    def _complete(self, messages):
+        prompt = messages[-1]['content']
+        correct = prompt.count('Submitted Answer:') - prompt.count('Correct Answer:')
+        wrong = prompt.count('Correct Answer:')
+        name = prompt.split('I am ', 1)[-1].split(', a ', 1)[0]
+        return _FakeCompletion(
+            f"Congratulations {name} on finishing the mock test! You answered {correct} question(s) correctly "
+            f"and missed {wrong}. Keep practicing.\n\n- Preppy"
+        )
+
+
+class _FakeChat:
+    def __init__(self):
+        self.completions = _FakeCompletions()
+
+
+class FakeOpenAI:
+    """Offline stand-in for the OpenAI client, selected with MOCKTEST_FEEDBACK_BACKEND = 'fake'."""
+
+    def __init__(self, **kwargs):
+        self.chat = _FakeChat()
+
+
+def get_client():
+    if settings.MOCKTEST_FEEDBACK_BACKEND == 'fake':
+        return FakeOpenAI()
+
+    env = environ.Env(DEBUG=(bool, False))
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
+    return OpenAI(api_key=env('OPENAI_API_KEY'))
+
+
+def request_completion(messages):
+    completion = get_client().chat.completions.create(model=FEEDBACK_MODEL, messages=messages)
+    return completion.choices[0].message.content
+
+
+def stream_completion(messages):
+    stream = get_client().chat.completions.create(model=FEEDBACK_MODEL, messages=messages, stream=True)
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+feedback_memo = TieredCache(
+    'mocktest-feedback-v2',
+    maxsize=settings.MOCKTEST_FEEDBACK_MEMO_SIZE,
+    ttl=settings.MOCKTEST_FEEDBACK_MEMO_TTL,
+    shared_alias=settings.MOCKTEST_SHARED_CACHE,
+)
+
+
+def feedback_fingerprint(mocktest_id, specialization_name, answer_key, answers):
+    """
+    Everything the feedback prompt depends on apart from the student's name and wrong
+    answer letters: the test, the specialization and, per subject, which questions were
+    answered right or wrong. Question text and keys are hashed in, so edits change it.
+    """
+    submitted = {str(question_id): answer for question_id, answer in answers.items()}
+    pattern = []
+    for question_id in sorted(submitted, key=lambda q: (answer_key[q]['subject'], int(q))):
+        entry = answer_key[question_id]
+        pattern.append([entry['subject'], question_id, entry['question'], entry['correctAnswer'],
+                        submitted[question_id] == entry['correctAnswer']])
+    payload = json.dumps([mocktest_id, specialization_name, pattern], separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def render_feedback(template, name):
+    return template.replace(NAME_PLACEHOLDER, name)
+
+
+def _render_stream(parts, name):
+    # Hold back a trailing piece that may be the start of a placeholder split across parts.
+    pending = ''
+    for part in parts:
+        pending = render_feedback(pending + part, name)
+        keep = next((size for size in range(min(len(pending), len(NAME_PLACEHOLDER) - 1), 0, -1)
+                     if NAME_PLACEHOLDER.startswith(pending[-size:])), 0)
+        text, pending = (pending[:-keep], pending[-keep:]) if keep else (pending, '')
+        if text:
+            yield text
+    if pending:
+        yield pending
+
+
+def complete_feedback(messages, fingerprint=None, name=''):
+    """
+    Feedback for a prompt, reusing the text generated for an earlier student with the same
+    fingerprint. The text is stored with its name placeholder and rendered with name.
+    """
+    if fingerprint is None:
+        return render_feedback(request_completion(messages), name)
+    return render_feedback(feedback_memo.get_or_load(fingerprint, lambda: request_completion(messages)), name)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MOCKTEST_FEEDBACK_WORKERS,
+                thread_name_prefix='mocktest-feedback'
+            )
+        return _executor
+
+
+def generate_feedback(score_id, requested_at, messages, fingerprint=None, name=''):
+    # Only the newest request for a score may write, so a slow job from an
+    # earlier submission can't overwrite the feedback of a retake.
+    scores = MockTestScores.objects.filter(pk=score_id, feedback_requested_at=requested_at)
+    try:
+        feedback = complete_feedback(messages, fingerprint, name)
+    except Exception:
+        logger.exception('Feedback generation failed for score %s', score_id)
+        scores.update(feedback_status=MockTestScores.FEEDBACK_FAILED)
+        return
+    scores.update(feedback=feedback, feedback_status=MockTestScores.FEEDBACK_READY)
+
+
+def _run_in_worker(score_id, requested_at, messages, fingerprint, name):
+    close_old_connections()
+    try:
+        generate_feedback(score_id, requested_at, messages, fingerprint, name)
+    finally:
+        close_old_connections()
+
+
+def queue_feedback(score_id, requested_at, messages, fingerprint=None, name=''):
+    """Generate feedback for a score saved as pending once the surrounding transaction commits."""
+    if settings.MOCKTEST_FEEDBACK_ASYNC:
+        transaction.on_commit(
+            lambda: _get_executor().submit(_run_in_worker, score_id, requested_at, messages, fingerprint, name)
+        )
+    else:
+        transaction.on_commit(lambda: generate_feedback(score_id, requested_at, messages, fingerprint, name))
+
+
+def stream_feedback(score_id, requested_at, messages, fingerprint=None, name=''):
+    """
+    Yield the feedback for a pending score piece by piece and save the full text at the end.
+    A memoized text is yielded whole. If the client goes away mid-stream, the rest of the
+    work is handed to the feedback worker so the score doesn't stay pending.
+    """
+    scores = MockTestScores.objects.filter(pk=score_id, feedback_requested_at=requested_at)
+    template = feedback_memo.get(fingerprint) if fingerprint else None
+    if template is not None:
+        feedback = render_feedback(template, name)
+        scores.update(feedback=feedback, feedback_status=MockTestScores.FEEDBACK_READY)
+        yield feedback
+        return
+
+    parts = []
+
+    def completion():
+        for part in stream_completion(messages):
+            parts.append(part)
+            yield part
+
+    try:
+        yield from _render_stream(completion(), name)
+    except GeneratorExit:
+        _get_executor().submit(_run_in_worker, score_id, requested_at, messages, fingerprint, name)
+        raise
+    except Exception:
+        scores.update(feedback_status=MockTestScores.FEEDBACK_FAILED)
+        raise
+    template = ''.join(parts)
+    if fingerprint:
+        feedback_memo.set(fingerprint, template)
+    scores.update(feedback=render_feedback(template, name), feedback_status=MockTestScores.FEEDBACK_READY)
+
+
+def stale_feedback(stale_after=None):
+    """Scores whose feedback is still pending stale_after seconds (MOCKTEST_FEEDBACK_STALE_AFTER) after it was requested."""
+    stale_after = settings.MOCKTEST_FEEDBACK_STALE_AFTER if stale_after is None else stale_after
+    cutoff = timezone.now() - timezone.timedelta(seconds=stale_after)
+    return MockTestScores.objects.filter(
+        feedback_status=MockTestScores.FEEDBACK_PENDING, feedback_requested_at__lt=cutoff
+    ).select_related('student__specialization').order_by('feedback_requested_at')
+
+
+def requeue_feedback(score):
+    """
+    Generate the feedback of a score left pending (its worker died or the job was lost) from
+    the stored answers. The request is claimed first by moving feedback_requested_at, so a
+    late original job can't write over it and another sweep skips it. Returns False if
+    another sweep claimed it first.
+    """
+    requested_at = timezone.now()
+    claimed = MockTestScores.objects.filter(
+        pk=score.pk, feedback_status=MockTestScores.FEEDBACK_PENDING, feedback_requested_at=score.feedback_requested_at
+    ).update(feedback_requested_at=requested_at)
+    if not claimed:
+        return False
+
+    student = score.student
+    specialization_name = student.specialization.name
+    student_name = f"{student.first_name} {student.last_name}"
+    answer_key = load_answer_key(score.mocktest_id_id)
+    # Questions deleted since the submission are left out.
+    answers = {question_id: answer for question_id, answer in (score.answers or {}).items() if str(question_id) in answer_key}
+    messages = build_feedback_messages(specialization_name, grade_answers(answer_key, answers))
+    fingerprint = feedback_fingerprint(score.mocktest_id_id, specialization_name, answer_key, answers)
+    generate_feedback(score.pk, requested_at, messages, fingerprint, student_name)
+    return True
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import MockQuestions, MockTestScores, MockTestScoreBreakdown
+from User.mastery import record_mastery
+from .breakdown import build_breakdown, subject_results
+from .bitmaps import encode_bitmap
+from .caching import TieredCache
+from .versions import load_version
+from .history import record_attempts
+
+answer_keys = TieredCache(
+    'mocktest-answer-key',
+    maxsize=settings.MOCKTEST_ANSWER_KEY_CACHE_SIZE,
+    ttl=settings.MOCKTEST_ANSWER_KEY_CACHE_TTL,
+    shared_alias=settings.MOCKTEST_SHARED_CACHE,
+    version_loader=load_version,
+)
+
+
+class GradeResult:
+    def __init__(self, score, total_questions, correct_ids, correct_bitmap, correct_answers, wrong_answers, breakdown):
+        self.score = score
+        self.total_questions = total_questions
+        self.correct_ids = correct_ids
+        self.correct_bitmap = correct_bitmap
+        self.correct_answers = correct_answers
+        self.wrong_answers = wrong_answers
+        self.breakdown = breakdown
+
+
+def fetch_answer_key(mocktest_id):
+    # One query for the whole test: question id -> everything grading and feedback need.
+    rows = MockQuestions.objects.filter(mocktest_id=mocktest_id).values_list(
+        'id', 'correctAnswer', 'question', 'subject', 'difficulty__name'
+    )
+    return {
+        str(question_id): {
+            'correctAnswer': correct_answer,
+            'question': question,
+            'subject': subject,
+            'difficulty': difficulty,
+        }
+        for question_id, correct_answer, question, subject, difficulty in rows
+    }
+
+
+def load_answer_key(mocktest_id):
+    # Cached per worker; the returned dict is shared, so callers must not mutate it.
+    mocktest_id = int(mocktest_id)
+    return answer_keys.get_or_load(mocktest_id, lambda: fetch_answer_key(mocktest_id))
+
+
+def invalidate_answer_key(mocktest_id):
+    answer_keys.invalidate(int(mocktest_id))
+
+
+def grade_answers(answer_key, answers):
+    correct_ids = []
+    correct_answers = []
+    wrong_answers = []
+
+    for question_id, submitted_answer in answers.items():
+        entry = answer_key.get(str(question_id))
+        if entry is None:
+            raise ValueError(f"Question {question_id} is not part of this mock test.")
+
+        item = {
+            "question": entry['question'],
+            "submittedAnswer": submitted_answer,
+            "correctAnswer": entry['correctAnswer'],
+            "subject": entry['subject'],
+        }
+        if submitted_answer == entry['correctAnswer']:
+            correct_ids.append(int(question_id))
+            correct_answers.append(item)
+        else:
+            wrong_answers.append(item)
+
+    return GradeResult(
+        score=len(correct_ids),
+        total_questions=len(answer_key),
+        correct_ids=correct_ids,
+        correct_bitmap=encode_bitmap(correct_ids, answer_key),
+        correct_answers=correct_answers,
+        wrong_answers=wrong_answers,
+        breakdown=build_breakdown(answer_key, correct_ids),
+    )
+
+
+def save_grade(mocktest, student, answers, result, feedback=None):
+    # Without feedback text the score is saved as pending for the feedback worker.
+    now = timezone.now()
+    defaults = {
+        'score': result.score,
+        'totalQuestions': result.total_questions,
+        'mocktestDateTaken': now,
+        'answers': answers,
+        'correct_bitmap': result.correct_bitmap,
+    }
+    if feedback is None:
+        defaults.update(feedback='', feedback_status=MockTestScores.FEEDBACK_PENDING, feedback_requested_at=now)
+    else:
+        defaults.update(feedback=feedback, feedback_status=MockTestScores.FEEDBACK_READY)
+
+    with transaction.atomic():
+        mocktest_score, created = MockTestScores.objects.update_or_create(
+            mocktest_id=mocktest,
+            student=student,
+            defaults=defaults
+        )
+
+        if not created:
+            MockTestScoreBreakdown.objects.filter(mocktest_score=mocktest_score).delete()
+
+        for row in result.breakdown:
+            row.mocktest_score = mocktest_score
+        MockTestScoreBreakdown.objects.bulk_create(result.breakdown)
+        record_attempts([(mocktest.pk, mocktest_score.student_id, result.score, result.total_questions,
+                          result.correct_bitmap, result.breakdown, now)])
+        record_mastery({mocktest_score.student_id: subject_results(result.breakdown)})
+
+    return mocktest_score
@@ -0,0 +1,53 @@
+from .models import MockTestAttempt, MockTestScoreBreakdown
+
+
+def compact_breakdown(rows):
+    breakdown = {MockTestScoreBreakdown.DIFFICULTY: {}, MockTestScoreBreakdown.SUBJECT: {}}
+    for row in rows:
+        breakdown[row.category][row.label] = [row.correct, row.total]
+    return breakdown
+
+
+def record_attempts(attempts):
+    """Append one history row per (mocktest id, student id, score, total, bitmap, breakdown rows, taken at)."""
+    MockTestAttempt.objects.bulk_create([
+        MockTestAttempt(mocktest_id=mocktest_id, student_id=student_id, score=score, totalQuestions=total,
+                        correct_bitmap=bitmap, breakdown=compact_breakdown(rows), taken_at=taken_at)
+        for mocktest_id, student_id, score, total, bitmap, rows, taken_at in attempts
+    ], batch_size=500)
+
+
+def _attempts(student_id, mocktest_id):
+    # Served by the (student, mocktest, taken_at) index as one range scan.
+    return MockTestAttempt.objects.filter(student_id=student_id, mocktest_id=mocktest_id).order_by('taken_at')
+
+
+def score_trajectory(student_id, mocktest_id):
+    attempts = list(_attempts(student_id, mocktest_id).values('id', 'score', 'totalQuestions', 'taken_at'))
+    previous = None
+    for number, attempt in enumerate(attempts, start=1):
+        attempt['attempt'] = number
+        attempt['percentage'] = round(100 * attempt['score'] / attempt['totalQuestions'], 2) if attempt['totalQuestions'] else None
+        attempt['change'] = attempt['score'] - previous if previous is not None else None
+        previous = attempt['score']
+    return attempts
+
+
+def subject_improvement(student_id, mocktest_id):
+    """Per subject: first and latest attempt accuracy, best accuracy and the change since the first attempt."""
+    subjects = {}
+    attempts = 0
+    for breakdown in _attempts(student_id, mocktest_id).values_list('breakdown', flat=True):
+        attempts += 1
+        for subject, (correct, total) in breakdown.get(MockTestScoreBreakdown.SUBJECT, {}).items():
+            accuracy = round(100 * correct / total, 2) if total else None
+            entry = subjects.setdefault(subject, {'subject': subject, 'attempts': 0, 'first': accuracy, 'best': accuracy})
+            entry['attempts'] += 1
+            entry['latest'] = accuracy
+            if accuracy is not None and (entry['best'] is None or accuracy > entry['best']):
+                entry['best'] = accuracy
+
+    for entry in subjects.values():
+        has_both = entry['first'] is not None and entry['latest'] is not None
+        entry['change'] = round(entry['latest'] - entry['first'], 2) if has_both else None
+    return attempts, sorted(subjects.values(), key=lambda entry: entry['subject'])
@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from .models import MockQuestions
+from .questions import load_difficulty_ids, load_difficulty_names, index_written_questions
+from .grading import invalidate_answer_key
+from .adaptive import invalidate_item_bank_for_mocktest
+from .paper import rebuild_paper
+from .versions import bump_version
+from .dedup import find_duplicates
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+TEXT_FIELDS = ('question', 'choiceA', 'choiceB', 'choiceC', 'choiceD', 'subject', 'correctAnswer')
+MAX_LENGTHS = {field: MockQuestions._meta.get_field(field).max_length for field in TEXT_FIELDS}
+
+
+def import_format(filename, requested=None):
+    """The import format from an explicit choice or the file extension, or None if unsupported."""
+    name = (requested or filename.rsplit('.', 1)[-1]).lower()
+    if name == 'ndjson':
+        name = 'jsonl'
+    return name if name in IMPORT_FORMATS else None
+
+
+def read_rows(stream, fmt):
+    """
+    Lazily yield (row number, row, parse error) from a binary CSV or JSON Lines stream,
+    so a large upload is never held in memory. CSV files need a header row.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            if None in row:
+                yield number, None, 'Row has more columns than the header.'
+            else:
+                yield number, row, None
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, 'Each line must be a JSON object.'
+
+
+def validate_row(row, difficulty_ids, difficulty_names):
+    """Field values for one MockQuestions row and a {field: message} dict of problems."""
+    values = {}
+    errors = {}
+    for field in TEXT_FIELDS:
+        value = row.get(field)
+        value = '' if value is None else str(value).strip()
+        if not value:
+            errors[field] = 'This field is required.'
+        elif len(value) > MAX_LENGTHS[field]:
+            errors[field] = f'Ensure this field has no more than {MAX_LENGTHS[field]} characters.'
+        values[field] = value
+
+    # Difficulties can be given by id or by name.
+    difficulty = row.get('difficulty')
+    difficulty = '' if difficulty is None else str(difficulty).strip()
+    if difficulty.isdigit() and int(difficulty) in difficulty_ids:
+        values['difficulty_id'] = int(difficulty)
+    elif difficulty.lower() in difficulty_names:
+        values['difficulty_id'] = difficulty_names[difficulty.lower()]
+    else:
+        errors['difficulty'] = f'Invalid difficulty "{difficulty}".' if difficulty else 'This field is required.'
+    return values, errors
+
+
+def import_questions(mocktest, rows, partial=False, chunk_size=None, max_errors=None):
+    """
+    Validate (row number, row, parse error) triples in chunks and bulk insert the valid
+    rows into the mock test, all in one transaction. Unless partial, any invalid row
+    rolls the whole import back; the report still covers every row. Valid rows that look
+    like already indexed questions are imported but flagged. Returns {'created',
+    'error_count', 'errors', 'duplicate_count', 'duplicates'} with at most max_errors
+    per-row errors and duplicates.
+    """
+    chunk_size = chunk_size or settings.MOCKTEST_IMPORT_CHUNK_SIZE
+    max_errors = settings.MOCKTEST_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    difficulty_ids = load_difficulty_ids()
+    difficulty_names = load_difficulty_names()
+    rows = iter(rows)
+    created = 0
+    error_count = 0
+    errors = []
+    duplicate_count = 0
+    duplicates = []
+
+    with transaction.atomic():
+        # bulk_create doesn't set primary keys on every backend, so each chunk's rows are read back.
+        last_pk = MockQuestions.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            questions = []
+            for number, row, parse_error in chunk:
+                if parse_error:
+                    row_errors = {'non_field_errors': parse_error}
+                else:
+                    values, row_errors = validate_row(row, difficulty_ids, difficulty_names)
+                if row_errors:
+                    error_count += 1
+                    if len(errors) < max_errors:
+                        errors.append({'row': number, 'errors': row_errors})
+                    continue
+                questions.append(MockQuestions(mocktest=mocktest, **values))
+                matches = find_duplicates(values['question'])
+                if matches:
+                    duplicate_count += 1
+                    if len(duplicates) < max_errors:
+                        duplicates.append({'row': number, 'duplicates': matches})
+            # Once an all-or-nothing import has failed, keep validating but stop writing.
+            if questions and (partial or not error_count):
+                MockQuestions.objects.bulk_create(questions)
+                created += len(questions)
+                written = list(MockQuestions.objects.filter(mocktest=mocktest, pk__gt=last_pk).order_by('pk').values_list('pk', 'question'))
+                if written:
+                    last_pk = written[-1][0]
+                    # The search journal and duplicate index hear of the chunk once the import commits.
+                    transaction.on_commit(lambda written=written: index_written_questions(written))
+
+        if error_count and not partial:
+            transaction.set_rollback(True)
+            created = 0
+        elif created:
+            # bulk_create skips the MockQuestions signals.
+            mocktest_id = mocktest.pk
+            bump_version(mocktest_id)
+            transaction.on_commit(lambda: invalidate_answer_key(mocktest_id))
+            transaction.on_commit(lambda: invalidate_item_bank_for_mocktest(mocktest_id))
+            rebuild_paper(mocktest_id)
+
+    return {'created': created, 'error_count': error_count, 'errors': errors,
+            'duplicate_count': duplicate_count, 'duplicates': duplicates}
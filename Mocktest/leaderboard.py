@@ -0,0 +1,63 @@
+from django.db.models import Count, Max, Q, Subquery
+from Class.models import Class
+from .models import MockTestScores
+
+# Rankings are read straight from MockTestScores (one row per student and test) through
+# its (mocktest, -score, mocktestDateTaken) index.
+
+
+def _scores(mocktest_id, class_id=None):
+    scores = MockTestScores.objects.filter(mocktest_id=mocktest_id)
+    if class_id:
+        # Resolved through the (class, student) unique index of the membership table.
+        members = Class.students.through.objects.filter(class_id=class_id).values('student_id')
+        scores = scores.filter(student_id__in=Subquery(members))
+    return scores
+
+
+def top_scores(mocktest_id, limit, class_id=None):
+    rows = _scores(mocktest_id, class_id).order_by('-score', 'mocktestDateTaken').values(
+        'student_id', 'student__first_name', 'student__last_name', 'score', 'mocktestDateTaken'
+    )[:limit]
+
+    leaders = []
+    rank = 0
+    previous = None
+    for position, row in enumerate(rows, start=1):
+        if row['score'] != previous:
+            rank = position
+            previous = row['score']
+        leaders.append({
+            'rank': rank,
+            'student': row['student_id'],
+            'studentName': f"{row['student__first_name']} {row['student__last_name']}",
+            'score': row['score'],
+            'achieved_at': row['mocktestDateTaken'],
+        })
+    return leaders
+
+
+def student_standing(mocktest_id, student_id, class_id=None):
+    """
+    Rank (ties share the better rank) and percentile rank of one student, in one query
+    counting the index range above the student's score.
+    """
+    scores = _scores(mocktest_id, class_id)
+    mine = Subquery(MockTestScores.objects.filter(mocktest_id=mocktest_id, student_id=student_id).values('score')[:1])
+    counts = scores.aggregate(
+        my_score=Max('score', filter=Q(student_id=student_id)),
+        above=Count('pk', filter=Q(score__gt=mine)),
+        equal=Count('pk', filter=Q(score=mine)),
+        total=Count('pk'),
+    )
+    if counts['my_score'] is None:
+        return None
+
+    below = counts['total'] - counts['above'] - counts['equal']
+    return {
+        'student': student_id,
+        'score': counts['my_score'],
+        'rank': counts['above'] + 1,
+        'total': counts['total'],
+        'percentile': round(100 * (below + 0.5 * counts['equal']) / counts['total'], 2),
+    }
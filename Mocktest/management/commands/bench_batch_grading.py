@@ -0,0 +1,64 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from Mocktest.models import MockTest, MockQuestions, Difficulty
+from Mocktest.grading import fetch_answer_key
+from Mocktest.batch import grade_sheets, save_batch
+from User.models import Student, Specialization
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Times vectorized grading and bulk persistence of a batch of answer sheets (data is rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sheets', type=int, default=1000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--no-save', action='store_true', help='Only time the in-memory grading.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, options):
+        random.seed(0)
+        difficulties = [Difficulty.objects.get_or_create(name=name)[0] for name in ('Easy', 'Medium', 'Hard')]
+        specialization, _ = Specialization.objects.get_or_create(name='Civil Engineering')
+        mocktest = MockTest.objects.create(mocktestName='Bench batch', mocktestDescription='bench')
+        MockQuestions.objects.bulk_create([
+            MockQuestions(
+                mocktest=mocktest, question=f'Question {i}?', choiceA='A', choiceB='B', choiceC='C', choiceD='D',
+                subject=f'Subject {i % 6}', difficulty=difficulties[i % 3], correctAnswer=random.choice('ABCD')
+            )
+            for i in range(options['questions'])
+        ])
+        answer_key = fetch_answer_key(mocktest.pk)
+        sheets = [
+            {question_id: random.choice('ABCD') for question_id in answer_key}
+            for _ in range(options['sheets'])
+        ]
+
+        started = time.perf_counter()
+        graded = grade_sheets(answer_key, sheets)
+        grading = time.perf_counter() - started
+        self.stdout.write(f"graded {len(sheets)} sheets x {len(answer_key)} questions in {grading * 1000:.1f} ms "
+                          f"(mean score {graded.scores.mean():.1f})")
+        if options['no_save']:
+            return
+
+        user_names = [f'bench-batch-{i}' for i in range(len(sheets))]
+        for user_name in user_names:
+            Student(user_name=user_name, password='x', first_name='Bench', last_name='Batch',
+                    email='bench@example.com', specialization=specialization).save()
+        started = time.perf_counter()
+        save_batch(mocktest, user_names, sheets, graded)
+        saving = time.perf_counter() - started
+        self.stdout.write(f"saved scores, correctness and breakdown rows in {saving * 1000:.1f} ms")
@@ -0,0 +1,64 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from Mocktest.models import MockTest, MockQuestions, Difficulty
+from Mocktest.grading import load_answer_key, grade_answers, save_grade
+from User.models import Student, Specialization
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Counts the queries one mock test submission costs for growing test sizes (all data is rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 50, 100, 250, 500])
+
+    def handle(self, *args, **options):
+        rows = []
+        try:
+            with transaction.atomic():
+                difficulty, _ = Difficulty.objects.get_or_create(name='Easy')
+                specialization, _ = Specialization.objects.get_or_create(name='Civil Engineering')
+                student = Student.objects.create(
+                    user_name='bench-grading-student', password='x', first_name='Bench', last_name='Student',
+                    email='bench@example.com', specialization=specialization
+                )
+                for size in options['sizes']:
+                    rows.append(self.run_size(size, student, difficulty))
+                raise Rollback()
+        except Rollback:
+            pass
+
+        self.stdout.write(f"{'questions':>10} {'first':>7} {'resubmit':>9} {'ms':>9}")
+        for size, first, resubmit, elapsed in rows:
+            self.stdout.write(f"{size:>10} {first:>7} {resubmit:>9} {elapsed:>9.2f}")
+
+        if len({first for _, first, _, _ in rows}) > 1 or len({resubmit for _, _, resubmit, _ in rows}) > 1:
+            raise CommandError('Query count grows with the number of questions.')
+        self.stdout.write(self.style.SUCCESS('Query count is constant across test sizes.'))
+
+    def run_size(self, size, student, difficulty):
+        mocktest = MockTest.objects.create(mocktestName=f'Bench {size}', mocktestDescription='bench')
+        MockQuestions.objects.bulk_create([
+            MockQuestions(
+                mocktest=mocktest, question=f'Question {i}?', choiceA='a', choiceB='b', choiceC='c', choiceD='d',
+                subject=f'Subject {i % 5}', difficulty=difficulty, correctAnswer='a'
+            )
+            for i in range(size)
+        ])
+        question_ids = MockQuestions.objects.filter(mocktest=mocktest).values_list('id', flat=True)
+        answers = {str(question_id): 'a' if i % 3 else 'b' for i, question_id in enumerate(question_ids)}
+
+        counts = []
+        started = time.perf_counter()
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as context:
+                result = grade_answers(load_answer_key(mocktest.pk), answers)
+                save_grade(mocktest, student, answers, result, '')
+            counts.append(len(context.captured_queries))
+        elapsed = (time.perf_counter() - started) * 1000 / 2
+        return size, counts[0], counts[1], elapsed
@@ -0,0 +1,43 @@
+import random
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from Mocktest.dedup import MOCKTEST, DuplicateIndex, signature
+
+WORDS = ('beam', 'load', 'flow', 'pipe', 'water', 'pressure', 'velocity', 'moment', 'shear', 'stress', 'column',
+         'head', 'loss', 'friction', 'channel', 'weir', 'pump', 'soil', 'bearing', 'capacity', 'slab', 'truss')
+
+
+class Command(BaseCommand):
+    help = 'Times near-duplicate lookups against an in-memory index of synthetic questions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=20000)
+        parser.add_argument('--lookups', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        texts = [
+            f"What is the {' '.join(random.choices(WORDS, k=12))} of a {random.randint(2, 90)} m {random.choice(WORDS)}?"
+            for _ in range(options['questions'])
+        ]
+        started = time.perf_counter()
+        index = DuplicateIndex()
+        for question_id, text in enumerate(texts, start=1):
+            index.add(MOCKTEST, question_id, signature(text))
+        self.stdout.write(f"indexed {len(index)} questions in {time.perf_counter() - started:.2f} s")
+
+        # Half of the lookups are light edits of indexed questions, half are new text.
+        probes = []
+        for i in range(options['lookups']):
+            text = random.choice(texts)
+            probes.append(text.replace('What is', 'Find') if i % 2 else ' '.join(reversed(text.split())))
+        timings = []
+        found = 0
+        for text in probes:
+            started = time.perf_counter()
+            found += bool(index.query(signature(text), 0.8))
+            timings.append(time.perf_counter() - started)
+        timings = np.array(timings) * 1000
+        self.stdout.write(f"{len(probes)} lookups: median {np.median(timings):.3f} ms, p99 {np.percentile(timings, 99):.3f} ms, "
+                          f"{found} flagged as duplicates")
@@ -0,0 +1,68 @@
+import csv
+import io
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from Mocktest.models import MockTest, MockQuestions, Difficulty
+from Mocktest.serializer import MockQuestionsSerializer
+from Mocktest.imports import TEXT_FIELDS, read_rows, import_questions
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Times the streaming question import against one-at-a-time creates (data is rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=5000)
+        parser.add_argument('--baseline', type=int, default=200, help='Questions to create one at a time for comparison.')
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, options):
+        random.seed(0)
+        difficulties = [Difficulty.objects.get_or_create(name=name)[0] for name in ('Easy', 'Medium', 'Hard')]
+        mocktest = MockTest.objects.create(mocktestName='Bench import', mocktestDescription='bench')
+        rows = [
+            {
+                'question': f'Question {i}?', 'choiceA': 'A', 'choiceB': 'B', 'choiceC': 'C', 'choiceD': 'D',
+                'subject': f'Subject {i % 6}', 'difficulty': difficulties[i % 3].name, 'correctAnswer': random.choice('ABCD'),
+            }
+            for i in range(options['questions'])
+        ]
+        text = io.StringIO()
+        writer = csv.DictWriter(text, fieldnames=[*TEXT_FIELDS, 'difficulty'])
+        writer.writeheader()
+        writer.writerows(rows)
+        data = text.getvalue().encode()
+
+        started = time.perf_counter()
+        report = import_questions(mocktest, read_rows(io.BytesIO(data), 'csv'), chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"imported {report['created']} questions ({len(data) / 1024:.0f} KiB CSV) in "
+                          f"{elapsed * 1000:.1f} ms: {report['created'] / elapsed:.0f} rows/s")
+
+        # The previous path: one serializer create, with a Difficulty fetch, per question.
+        baseline = rows[:options['baseline']]
+        started = time.perf_counter()
+        for row in baseline:
+            serializer = MockQuestionsSerializer(data={
+                **row, 'mocktest': mocktest.pk, 'difficulty': Difficulty.objects.get(name=row['difficulty']).pk
+            })
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        elapsed = time.perf_counter() - started
+        if baseline:
+            self.stdout.write(f"created {len(baseline)} questions one at a time in {elapsed * 1000:.1f} ms: "
+                              f"{len(baseline) / elapsed:.0f} rows/s")
+        self.stdout.write(f"{MockQuestions.objects.filter(mocktest=mocktest).count()} questions in the bench test")
@@ -0,0 +1,107 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from Mocktest.models import MockTest, MockQuestions, MockTestScores, CorrectQuestions, Difficulty, MockTestScoreBreakdown
+from Mocktest.aggregation import aggregate_breakdowns, annotate_group_concat
+from Mocktest.bitmaps import encode_bitmap
+from User.models import Student, Specialization
+
+
+class Rollback(Exception):
+    pass
+
+
+def subject_strings(rows):
+    subjects = {f'{row.label}:{row.total}' for row in rows if row.category == MockTestScoreBreakdown.SUBJECT}
+    correct = {f'{row.label}:{row.correct}' for row in rows if row.category == MockTestScoreBreakdown.SUBJECT and row.correct}
+    return subjects, correct
+
+
+def split(value):
+    return set(value.split(',')) if value else set()
+
+
+class Command(BaseCommand):
+    help = 'Times the portable scores aggregation against the MySQL GROUP_CONCAT annotations (data is rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scores', type=int, default=2000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--subjects', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, options):
+        random.seed(0)
+        difficulties = [Difficulty.objects.get_or_create(name=name)[0] for name in ('Easy', 'Medium', 'Hard')]
+        specialization, _ = Specialization.objects.get_or_create(name='Civil Engineering')
+        mocktest = MockTest.objects.create(mocktestName='Bench aggregation', mocktestDescription='bench')
+        MockQuestions.objects.bulk_create([
+            MockQuestions(
+                mocktest=mocktest, question=f'Question {i}?', choiceA='a', choiceB='b', choiceC='c', choiceD='d',
+                subject=f'Subject {i % options["subjects"]}', difficulty=difficulties[i % 3], correctAnswer='a'
+            )
+            for i in range(options['questions'])
+        ])
+        question_ids = list(MockQuestions.objects.filter(mocktest=mocktest).values_list('id', flat=True))
+
+        for i in range(options['scores']):
+            Student(
+                user_name=f'bench-aggregation-{i}', password='x', first_name='Bench', last_name=str(i),
+                email='bench@example.com', specialization=specialization
+            ).save()
+        MockTestScores.objects.bulk_create([
+            MockTestScores(mocktest_id=mocktest, student_id=f'bench-aggregation-{i}', score=0, feedback='',
+                           totalQuestions=len(question_ids))
+            for i in range(options['scores'])
+        ])
+        scores = list(MockTestScores.objects.filter(mocktest_id=mocktest))
+        # The bitmaps feed the portable path; the join rows only the MySQL reference annotations.
+        correct = {score.pk: random.sample(question_ids, random.randint(0, len(question_ids))) for score in scores}
+        for score in scores:
+            score.correct_bitmap = encode_bitmap(correct[score.pk], question_ids)
+        MockTestScores.objects.bulk_update(scores, ['correct_bitmap'], batch_size=500)
+        CorrectQuestions.objects.bulk_create([
+            CorrectQuestions(mocktest_score=score, mockquestion_id=question_id)
+            for score in scores
+            for question_id in correct[score.pk]
+        ], batch_size=5000)
+
+        self.stdout.write(f"{len(scores)} scores x {len(question_ids)} questions on {connection.vendor}")
+
+        portable = self.time(lambda: aggregate_breakdowns(scores), options['repeat'])
+        self.stdout.write(f"bitmap aggregation:            {portable * 1000:9.1f} ms")
+
+        if connection.vendor != 'mysql':
+            self.stdout.write('GROUP_CONCAT path skipped: it only runs on MySQL.')
+            return
+
+        queryset = annotate_group_concat(MockTestScores.objects.filter(mocktest_id=mocktest))
+        legacy = self.time(lambda: list(queryset.all()), options['repeat'])
+        self.stdout.write(f"MySQL GROUP_CONCAT annotation: {legacy * 1000:9.1f} ms")
+
+        breakdowns = aggregate_breakdowns(scores)
+        matches = 0
+        legacy_rows = list(queryset.all())
+        for score in legacy_rows:
+            subjects, correct = subject_strings(breakdowns[score.pk])
+            matches += subjects == split(score.subjects) and correct == split(score.subjects_correct)
+        self.stdout.write(f"subject totals/correct agree on {matches}/{len(legacy_rows)} scores")
+
+    @staticmethod
+    def time(function, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from Mocktest.models import MockTest
+from Mocktest.calibration import calibrate_mocktest
+from Mocktest.adaptive import invalidate_item_bank
+
+
+class Command(BaseCommand):
+    help = 'Fits item response parameters for mock test questions from the attempt history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', help='Only calibrate the mock tests of this course.')
+        parser.add_argument('--min-responses', type=int, default=30)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--rasch', action='store_true', help='Fit difficulties only (discrimination fixed at 1).')
+
+    def handle(self, *args, **options):
+        mocktests = MockTest.objects.order_by('pk')
+        if options['course']:
+            mocktests = mocktests.filter(course_id=options['course'])
+
+        courses = set()
+        for mocktest_id, course_id in mocktests.values_list('pk', 'course_id'):
+            used = calibrate_mocktest(mocktest_id, options['min_responses'], options['iterations'], options['rasch'])
+            if used:
+                courses.add(course_id)
+                self.stdout.write(f'Mock test {mocktest_id}: calibrated from {used} attempt(s).')
+            else:
+                self.stdout.write(f'Mock test {mocktest_id}: skipped, fewer than {options["min_responses"]} usable attempts.')
+
+        for course_id in courses:
+            if course_id:
+                invalidate_item_bank(course_id)
+        self.stdout.write(self.style.SUCCESS(f'Calibrated the questions of {len(courses)} course(s).'))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from Mocktest.models import MockTest
+from Mocktest.imports import IMPORT_FORMATS, import_format, read_rows, import_questions
+
+
+class Command(BaseCommand):
+    help = 'Imports mock test questions from a CSV (with a header row) or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mocktest_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--partial', action='store_true', help='Import the valid rows even if some rows are invalid.')
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            mocktest = MockTest.objects.get(pk=options['mocktest_id'])
+        except MockTest.DoesNotExist:
+            raise CommandError(f'MockTest {options["mocktest_id"]} does not exist.')
+        fmt = import_format(options['path'], options['format'])
+        if fmt is None:
+            raise CommandError('Pass --format for files without a .csv or .jsonl extension.')
+
+        with open(options['path'], 'rb') as stream:
+            report = import_questions(mocktest, read_rows(stream, fmt), options['partial'], options['chunk_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f'Row {error["row"]}: ' + '; '.join(f'{field}: {message}' for field, message in error['errors'].items()))
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f'... and {report["error_count"] - len(report["errors"])} more invalid row(s).')
+        for duplicate in report['duplicates']:
+            self.stderr.write(f'Row {duplicate["row"]} looks like ' + ', '.join(
+                f'{match["type"]} question {match["id"]} ({match["similarity"]:.0%})' for match in duplicate['duplicates']
+            ))
+        if report['duplicate_count'] > len(report['duplicates']):
+            self.stderr.write(f'... and {report["duplicate_count"] - len(report["duplicates"])} more possible duplicate(s).')
+        if report['error_count'] and not options['partial']:
+            raise CommandError(f'{report["error_count"]} invalid row(s); nothing was imported.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report["created"]} question(s) into mock test {mocktest.pk} ({report["error_count"]} skipped).'
+        ))
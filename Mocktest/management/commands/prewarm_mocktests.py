@@ -0,0 +1,45 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from Mocktest.caching import shared_cache
+from Mocktest.schedule import due_for_prewarm, prewarm_mocktest
+
+
+class Command(BaseCommand):
+    help = ('Pre-warms the paper, answer key and roster caches of mock tests opening soon. Run it every minute '
+            'from cron, or keep it running with --watch. Warming reaches the workers through the shared cache, '
+            'so MOCKTEST_SHARED_CACHE must name one every worker can see.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead', type=int, default=settings.MOCKTEST_PREWARM_LEAD,
+                            help='Seconds before opening to warm a mock test.')
+        parser.add_argument('--mocktest', type=int, action='append', help='Warm these mock tests now, whatever their window.')
+        parser.add_argument('--watch', action='store_true', help='Keep checking for upcoming mock tests.')
+        parser.add_argument('--interval', type=int, default=30)
+
+    def handle(self, *args, **options):
+        if shared_cache() is None:
+            # A per-process cache would only warm this command, and forget its markers between runs.
+            raise CommandError('Set MOCKTEST_SHARED_CACHE to a cache shared by the workers (e.g. Redis or Memcached).')
+        if options['mocktest']:
+            self.warm(options['mocktest'])
+            return
+        while True:
+            self.warm(due_for_prewarm(options['lead']))
+            if not options['watch']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def warm(self, mocktest_ids):
+        for mocktest_id in mocktest_ids:
+            started = time.perf_counter()
+            warmed = prewarm_mocktest(mocktest_id)
+            if warmed is None:
+                self.stderr.write(f'Mock test {mocktest_id} does not exist.')
+                continue
+            self.stdout.write(
+                f"Mock test {mocktest_id}: warmed {warmed['questions']} question(s), {warmed['students']} student(s), "
+                f"{warmed['paper_bytes']} byte paper in {(time.perf_counter() - started) * 1000:.0f} ms."
+            )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from Mocktest.dedup import course_duplicates
+
+
+class Command(BaseCommand):
+    help = "Reports groups of near-duplicate questions among a course's mock test and exercise questions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id')
+        parser.add_argument('--threshold', type=float, help='Minimum estimated Jaccard similarity of the question text.')
+
+    def handle(self, *args, **options):
+        groups = course_duplicates(options['course_id'], options['threshold'])
+        for group in groups:
+            self.stdout.write(f"{len(group['questions'])} questions, similarity up to {group['similarity']}:")
+            for question in group['questions']:
+                self.stdout.write(f"  {question['type']} {question['id']}: {question['question'][:100]}")
+        self.stdout.write(self.style.SUCCESS(f'{len(groups)} duplicate group(s) in course {options["course_id"]}.'))
@@ -0,0 +1,17 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Mocktest.dedup import build_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the near-duplicate question index from the question tables and saves it for the workers.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = build_index()
+        index.save(settings.QUESTION_DEDUP_INDEX_PATH)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {len(index)} question(s) in {time.perf_counter() - started:.1f} s; '
+            f'saved to {settings.QUESTION_DEDUP_INDEX_PATH}.'
+        ))
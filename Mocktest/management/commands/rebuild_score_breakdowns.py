@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from Mocktest.models import MockTestScores, MockTestScoreBreakdown
+from Mocktest.aggregation import aggregate_breakdowns
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored per-attempt score breakdowns from the correctness bitmaps.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mocktest', type=int, help='Only rebuild the scores of this mock test.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        scores = MockTestScores.objects.only('mocktestScoreID', 'mocktest_id', 'correct_bitmap').order_by('pk')
+        if options['mocktest']:
+            scores = scores.filter(mocktest_id=options['mocktest'])
+
+        batch_size = options['batch_size']
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            batch = list(scores.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            breakdowns = aggregate_breakdowns(batch)
+            with transaction.atomic():
+                MockTestScoreBreakdown.objects.filter(mocktest_score_id__in=list(breakdowns)).delete()
+                MockTestScoreBreakdown.objects.bulk_create(
+                    [row for rows in breakdowns.values() for row in rows], batch_size=1000
+                )
+            rebuilt += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the breakdown of {rebuilt} score(s).'))
@@ -0,0 +1,26 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from Mocktest.feedback import requeue_feedback, stale_feedback
+
+
+class Command(BaseCommand):
+    help = ('Generates the feedback of scores left pending longer than MOCKTEST_FEEDBACK_STALE_AFTER, e.g. because '
+            'the worker that queued it was restarted. Run it every few minutes from cron, or keep it running with --watch.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=settings.MOCKTEST_FEEDBACK_STALE_AFTER,
+                            help='Seconds after the request a pending feedback counts as lost.')
+        parser.add_argument('--limit', type=int, default=100, help='Scores handled per pass.')
+        parser.add_argument('--watch', action='store_true', help='Keep checking for stale feedback.')
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = sum(requeue_feedback(score) for score in stale_feedback(options['stale_after'])[:options['limit']])
+            self.stdout.write(f'Generated the feedback of {requeued} stale score(s).')
+            if not options['watch']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
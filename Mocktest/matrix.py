@@ -0,0 +1,33 @@
+import numpy as np
+
+UNANSWERED = -1
+
+
+def label_masks(values):
+    labels, inverse = np.unique(np.array(values, dtype=object).astype(str), return_inverse=True)
+    masks = np.zeros((len(values), len(labels)), dtype=np.int32)
+    masks[np.arange(len(values)), inverse] = 1
+    return labels.tolist(), masks
+
+
+def encode_sheets(answer_key, sheets):
+    """
+    Encode answer dicts as a students x questions matrix of integer answer codes.
+    Codes 0..k-1 are the distinct correct answers of the key; other answers get
+    further codes, unanswered cells are UNANSWERED and unknown questions are skipped.
+    """
+    question_ids = sorted(answer_key, key=int)
+    column = {question_id: j for j, question_id in enumerate(question_ids)}
+
+    codes = {}
+    key_codes = np.array(
+        [codes.setdefault(answer_key[question_id]['correctAnswer'], len(codes)) for question_id in question_ids],
+        dtype=np.int32
+    )
+    submitted = np.full((len(sheets), len(question_ids)), UNANSWERED, dtype=np.int32)
+    for row, answers in enumerate(sheets):
+        for question_id, answer in answers.items():
+            j = column.get(str(question_id))
+            if j is not None and answer is not None:
+                submitted[row, j] = codes.setdefault(answer, len(codes))
+    return question_ids, codes, key_codes, submitted
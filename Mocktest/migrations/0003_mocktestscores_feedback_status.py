@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktestscores',
+            name='feedback_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mocktestscores',
+            name='feedback_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.4 on 2026-10-18 08:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0003_mocktestscores_feedback_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockTestScoreBreakdown',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('difficulty', 'Difficulty'), ('subject', 'Subject')], max_length=10)),
+                ('label', models.CharField(max_length=255)),
+                ('total', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('mocktest_score', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='breakdown', to='Mocktest.mocktestscores')),
+            ],
+            options={
+                'unique_together': {('mocktest_score', 'category', 'label')},
+            },
+        ),
+    ]
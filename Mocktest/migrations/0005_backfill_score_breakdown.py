@@ -0,0 +1,44 @@
+# Generated by Django 4.2.4 on 2026-10-18 08:52
+
+from django.db import migrations
+
+
+def backfill_breakdown(apps, schema_editor):
+    MockQuestions = apps.get_model('Mocktest', 'MockQuestions')
+    MockTestScores = apps.get_model('Mocktest', 'MockTestScores')
+    MockTestScoreBreakdown = apps.get_model('Mocktest', 'MockTestScoreBreakdown')
+    CorrectQuestions = apps.get_model('Mocktest', 'CorrectQuestions')
+
+    answer_keys = {}
+    for question_id, mocktest_id, subject, difficulty in MockQuestions.objects.values_list(
+            'id', 'mocktest_id', 'subject', 'difficulty__name').iterator():
+        answer_keys.setdefault(mocktest_id, {})[question_id] = (difficulty, subject)
+
+    correct = {}
+    for score_id, question_id in CorrectQuestions.objects.values_list('mocktest_score_id', 'mockquestion_id').iterator():
+        correct.setdefault(score_id, set()).add(question_id)
+
+    rows = []
+    for score_id, mocktest_id in MockTestScores.objects.values_list('mocktestScoreID', 'mocktest_id_id').iterator():
+        counts = {}
+        correct_ids = correct.get(score_id, set())
+        for question_id, (difficulty, subject) in answer_keys.get(mocktest_id, {}).items():
+            for key in (('difficulty', difficulty), ('subject', subject)):
+                total, right = counts.get(key, (0, 0))
+                counts[key] = (total + 1, right + (question_id in correct_ids))
+        rows.extend(
+            MockTestScoreBreakdown(mocktest_score_id=score_id, category=category, label=label, total=total, correct=right)
+            for (category, label), (total, right) in counts.items()
+        )
+    MockTestScoreBreakdown.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0004_mocktestscorebreakdown'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_breakdown, migrations.RunPython.noop),
+    ]
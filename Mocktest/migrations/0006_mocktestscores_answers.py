@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0005_backfill_score_breakdown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktestscores',
+            name='answers',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
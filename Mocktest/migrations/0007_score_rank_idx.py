@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 08:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0006_mocktestscores_answers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mocktestscores',
+            index=models.Index(fields=['mocktest_id', '-score', 'mocktestDateTaken'], name='score_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0001_initial'),
+        ('Mocktest', '0007_score_rank_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockTestAttemptDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.JSONField(blank=True, default=dict)),
+                ('answered_at', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mocktest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drafts', to='Mocktest.mocktest')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mocktest_drafts', to='User.student')),
+            ],
+            options={
+                'unique_together': {('mocktest', 'student')},
+            },
+        ),
+    ]
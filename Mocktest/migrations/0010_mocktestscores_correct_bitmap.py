@@ -0,0 +1,26 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0009_mocktestattemptdraft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40, unique=True)),
+                ('question_ids', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mocktestscores',
+            name='correct_bitmap',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:06
+
+import hashlib
+from django.db import migrations
+
+
+# Same layout as Mocktest.bitmaps.encode_bitmap, frozen here for the migration.
+def question_set_id(QuestionSet, sets, question_ids):
+    if not question_ids:
+        return 0
+    digest = hashlib.sha1(','.join(str(question_id) for question_id in question_ids).encode()).hexdigest()
+    if digest not in sets:
+        sets[digest] = QuestionSet.objects.get_or_create(digest=digest, defaults={'question_ids': question_ids})[0].pk
+    return sets[digest]
+
+
+def encode(correct_ids, set_id, question_ids):
+    position = {question_id: i for i, question_id in enumerate(question_ids)}
+    bits = bytearray((len(question_ids) + 7) // 8)
+    for question_id in correct_ids:
+        bits[position[question_id] // 8] |= 1 << (position[question_id] % 8)
+    return set_id.to_bytes(8, 'big') + bytes(bits)
+
+
+def backfill_bitmaps(apps, schema_editor):
+    MockQuestions = apps.get_model('Mocktest', 'MockQuestions')
+    MockTestScores = apps.get_model('Mocktest', 'MockTestScores')
+    CorrectQuestions = apps.get_model('Mocktest', 'CorrectQuestions')
+    QuestionSet = apps.get_model('Mocktest', 'QuestionSet')
+
+    # The questions a test had when a score was graded aren't known; its current questions
+    # stand in for them.
+    questions = {}
+    for mocktest_id, question_id in MockQuestions.objects.values_list('mocktest_id', 'id').iterator():
+        questions.setdefault(mocktest_id, set()).add(question_id)
+
+    correct = {}
+    for score_id, question_id in CorrectQuestions.objects.values_list('mocktest_score_id', 'mockquestion_id').iterator():
+        correct.setdefault(score_id, []).append(question_id)
+
+    sets = {}
+    scores = []
+    for score in MockTestScores.objects.only('mocktestScoreID', 'mocktest_id').iterator():
+        score_correct = correct.get(score.pk, [])
+        question_ids = sorted(questions.get(score.mocktest_id_id, set()).union(score_correct))
+        score.correct_bitmap = encode(score_correct, question_set_id(QuestionSet, sets, question_ids), question_ids)
+        scores.append(score)
+    MockTestScores.objects.bulk_update(scores, ['correct_bitmap'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0010_mocktestscores_correct_bitmap'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_bitmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0001_initial'),
+        ('Mocktest', '0011_backfill_correct_bitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockTestAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('totalQuestions', models.IntegerField(default=0)),
+                ('correct_bitmap', models.BinaryField(blank=True, null=True)),
+                ('breakdown', models.JSONField(blank=True, default=dict)),
+                ('taken_at', models.DateTimeField()),
+                ('mocktest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='Mocktest.mocktest')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mocktest_attempts', to='User.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'mocktest', 'taken_at'], name='attempt_history_idx')],
+            },
+        ),
+    ]
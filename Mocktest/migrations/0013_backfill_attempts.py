@@ -0,0 +1,41 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:20
+
+import datetime
+from django.db import migrations
+from django.utils import timezone
+
+
+def backfill_attempts(apps, schema_editor):
+    MockTestScores = apps.get_model('Mocktest', 'MockTestScores')
+    MockTestScoreBreakdown = apps.get_model('Mocktest', 'MockTestScoreBreakdown')
+    MockTestAttempt = apps.get_model('Mocktest', 'MockTestAttempt')
+
+    # Only the latest attempt of each student survived the old update_or_create.
+    breakdowns = {}
+    for score_id, category, label, correct, total in MockTestScoreBreakdown.objects.values_list(
+            'mocktest_score_id', 'category', 'label', 'correct', 'total').iterator():
+        breakdowns.setdefault(score_id, {'difficulty': {}, 'subject': {}})[category][label] = [correct, total]
+
+    attempts = [
+        MockTestAttempt(
+            mocktest_id=score.mocktest_id_id, student_id=score.student_id, score=score.score,
+            totalQuestions=score.totalQuestions, correct_bitmap=score.correct_bitmap,
+            breakdown=breakdowns.get(score.pk, {'difficulty': {}, 'subject': {}}),
+            taken_at=timezone.make_aware(datetime.datetime.combine(score.mocktestDateTaken, datetime.time.min)),
+        )
+        for score in MockTestScores.objects.only(
+            'mocktestScoreID', 'mocktest_id', 'student', 'score', 'totalQuestions', 'correct_bitmap', 'mocktestDateTaken'
+        ).iterator()
+    ]
+    MockTestAttempt.objects.bulk_create(attempts, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0012_mocktestattempt'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_attempts, migrations.RunPython.noop),
+    ]
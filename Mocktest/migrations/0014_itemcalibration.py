@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0013_backfill_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemCalibration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.FloatField(default=0.0)),
+                ('discrimination', models.FloatField(default=1.0)),
+                ('responses', models.IntegerField(default=0)),
+                ('calibrated_at', models.DateTimeField(auto_now=True)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calibration', to='Mocktest.mockquestions')),
+            ],
+        ),
+    ]
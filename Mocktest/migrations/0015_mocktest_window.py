@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0014_itemcalibration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='closes_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mocktest',
+            name='opens_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0015_mocktest_window'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0016_mocktest_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktestattemptdraft',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Course', '0005_gap_ranks'),
+        ('User', '0003_backfill_subject_mastery'),
+        ('Mocktest', '0018_draft_submitted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdaptiveSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('subject', models.CharField(blank=True, max_length=255, null=True)),
+                ('length', models.IntegerField()),
+                ('log_posterior', models.JSONField(default=list)),
+                ('administered', models.JSONField(default=list)),
+                ('responses', models.JSONField(default=list)),
+                ('current', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adaptive_sessions', to='Course.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adaptive_sessions', to='User.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'updated_at'], name='adaptive_session_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mocktest', '0020_adaptivesession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockquestions',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
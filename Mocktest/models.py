@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 
 class MockTest(models.Model):
@@ -7,10 +8,26 @@ class MockTest(models.Model):
     mocktestName = models.CharField(max_length=200)
     mocktestDescription = models.TextField()
     mocktestDateCreated = models.DateField(auto_now_add=True)
+    # Scheduled simulations only accept submissions in this window; either end may be open.
+    opens_at = models.DateTimeField(blank=True, null=True)
+    closes_at = models.DateTimeField(blank=True, null=True)
+    # Bumped whenever the mock test or its questions change; cached copies are keyed on it.
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.mocktestName
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding:
+            # Incremented in the database, so saving a stale instance can't write an older version back.
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super(MockTest, self).save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=['version'])
+
 class MockQuestions(models.Model):
     mocktest = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='mockquestions')
     question = models.TextField(max_length=512)
@@ -21,6 +38,8 @@ class MockQuestions(models.Model):
     subject = models.CharField(max_length=255)
     difficulty = models.ForeignKey('Difficulty', on_delete=models.CASCADE)
     correctAnswer = models.CharField(max_length=255, verbose_name="Correct Answer")
+    # Lets the duplicate index catch up on edited questions, see Mocktest.dedup.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.question} - {self.subject}"
@@ -37,13 +56,27 @@ class Difficulty(models.Model):
         return self.name
 
 class MockTestScores(models.Model):
+    FEEDBACK_PENDING = 'pending'
+    FEEDBACK_READY = 'ready'
+    FEEDBACK_FAILED = 'failed'
+    FEEDBACK_STATUS = [
+        (FEEDBACK_PENDING, 'Pending'),
+        (FEEDBACK_READY, 'Ready'),
+        (FEEDBACK_FAILED, 'Failed'),
+    ]
+
     mocktestScoreID = models.BigAutoField(primary_key=True)
     mocktest_id = models.ForeignKey('MockTest', on_delete=models.CASCADE, related_name='mocktest_scores')
     student = models.ForeignKey('User.Student', on_delete=models.CASCADE, related_name='student_scores')
     score = models.FloatField(null=False)
     feedback = models.TextField(null=False)
+    feedback_status = models.CharField(max_length=10, choices=FEEDBACK_STATUS, default=FEEDBACK_READY)
+    feedback_requested_at = models.DateTimeField(null=True, blank=True)
     mocktestDateTaken = models.DateField(auto_now_add=True)
     totalQuestions = models.IntegerField(default=0)
+    answers = models.JSONField(default=dict, blank=True)
+    # Which questions were answered correctly, see Mocktest.bitmaps.
+    correct_bitmap = models.BinaryField(null=True, blank=True)
     correct_questions = models.ManyToManyField(
         'MockQuestions',
         through='CorrectQuestions',
@@ -52,6 +85,10 @@ class MockTestScores(models.Model):
 
     class Meta:
         unique_together = ['mocktest_id', 'student']
+        indexes = [
+            # Leaderboards rank straight from this table.
+            models.Index(fields=['mocktest_id', '-score', 'mocktestDateTaken'], name='score_rank_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.mocktest_id}"
@@ -64,4 +101,108 @@ class CorrectQuestions(models.Model):
         unique_together = ('mocktest_score', 'mockquestion')
 
     def __str__(self):
-        return f"{self.mocktest_score} - {self.mockquestion}"
\ No newline at end of file
+        return f"{self.mocktest_score} - {self.mockquestion}"
+
+class MockTestScoreBreakdown(models.Model):
+    DIFFICULTY = 'difficulty'
+    SUBJECT = 'subject'
+    CATEGORIES = [
+        (DIFFICULTY, 'Difficulty'),
+        (SUBJECT, 'Subject'),
+    ]
+
+    mocktest_score = models.ForeignKey(MockTestScores, on_delete=models.CASCADE, related_name='breakdown')
+    category = models.CharField(max_length=10, choices=CATEGORIES)
+    label = models.CharField(max_length=255)
+    total = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('mocktest_score', 'category', 'label')
+
+    def __str__(self):
+        return f"{self.mocktest_score} - {self.label}: {self.correct}/{self.total}"
+
+
+class MockTestAttemptDraft(models.Model):
+    mocktest = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='drafts')
+    student = models.ForeignKey('User.Student', on_delete=models.CASCADE, related_name='mocktest_drafts')
+    answers = models.JSONField(default=dict, blank=True)
+    # Question id -> epoch seconds the answer was received, so merges keep the newest answer.
+    answered_at = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when the attempt is submitted, so answers buffered before then are not written back.
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('mocktest', 'student')
+
+    def __str__(self):
+        return f"Draft of {self.student} for {self.mocktest}"
+
+
+class QuestionSet(models.Model):
+    # The ascending question ids a correctness bitmap indexes by position, see Mocktest.bitmaps.
+    # Never changed once written; a different list of questions is a new set.
+    digest = models.CharField(max_length=40, unique=True)
+    question_ids = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"Question set {self.pk} ({len(self.question_ids)} questions)"
+
+
+class MockTestAttempt(models.Model):
+    # Append-only: one row per submission, unlike MockTestScores which keeps the latest.
+    mocktest = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='attempts')
+    student = models.ForeignKey('User.Student', on_delete=models.CASCADE, related_name='mocktest_attempts')
+    score = models.FloatField()
+    totalQuestions = models.IntegerField(default=0)
+    correct_bitmap = models.BinaryField(null=True, blank=True)
+    # {'difficulty': {label: [correct, total]}, 'subject': {label: [correct, total]}}
+    breakdown = models.JSONField(default=dict, blank=True)
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'mocktest', 'taken_at'], name='attempt_history_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.mocktest} @ {self.taken_at}"
+
+
+class ItemCalibration(models.Model):
+    # Item response theory parameters of a question, fitted offline by calibrate_items.
+    question = models.OneToOneField(MockQuestions, on_delete=models.CASCADE, related_name='calibration')
+    difficulty = models.FloatField(default=0.0)
+    discrimination = models.FloatField(default=1.0)
+    responses = models.IntegerField(default=0)
+    calibrated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.question_id}: b={self.difficulty:.2f}, a={self.discrimination:.2f}"
+
+
+class AdaptiveSession(models.Model):
+    # An adaptive practice session, see Mocktest.adaptive. Kept in the database so any
+    # worker can serve the next answer; sessions idle past MOCKTEST_ADAPTIVE_SESSION_TTL expire.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course = models.ForeignKey('Course.Course', on_delete=models.CASCADE, related_name='adaptive_sessions')
+    student = models.ForeignKey('User.Student', on_delete=models.CASCADE, related_name='adaptive_sessions')
+    subject = models.CharField(max_length=255, null=True, blank=True)
+    length = models.IntegerField()
+    # Log posterior over Mocktest.adaptive.GRID.
+    log_posterior = models.JSONField(default=list)
+    administered = models.JSONField(default=list)
+    responses = models.JSONField(default=list)
+    # The question waiting for an answer, or null once the session is finished.
+    current = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'updated_at'], name='adaptive_session_idx'),
+        ]
+
+    def __str__(self):
+        return f"Adaptive session of {self.student} in {self.course}"
@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from .models import MockTest, MockQuestions
+from .versions import load_version
+
+PAPER_FIELDS = ('id', 'question', 'choiceA', 'choiceB', 'choiceC', 'choiceD', 'subject', 'difficulty')
+
+
+class CompiledPaper:
+    def __init__(self, etag, body, gzipped):
+        self.etag = etag
+        self.body = body
+        self.gzipped = gzipped
+
+
+def _cache():
+    return caches[settings.MOCKTEST_SHARED_CACHE or 'default']
+
+
+def _cache_key(mocktest_id, version):
+    # Keyed on the version in the database, so an edit made through any worker is seen by all.
+    return f'mocktest-paper:{mocktest_id}:{version}'
+
+
+def compile_paper(mocktest_id):
+    """Serialize a mock test for students, without correct answers, once as JSON and once gzipped."""
+    mocktest = MockTest.objects.filter(pk=mocktest_id).values(
+        'mocktestID', 'mocktestName', 'mocktestDescription', 'course', 'classID'
+    ).first()
+    if mocktest is None:
+        return None
+    mocktest['questions'] = list(
+        MockQuestions.objects.filter(mocktest_id=mocktest_id).order_by('id').values(*PAPER_FIELDS)
+    )
+    body = json.dumps(mocktest, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    return CompiledPaper(etag, body, gzip.compress(body))
+
+
+def get_paper(mocktest_id):
+    """
+    Cached compiled paper, or None if the mock test doesn't exist. On a miss only the
+    worker holding the rebuild lock compiles it; the others wait for its result and
+    compile it themselves only if the wait runs out.
+    """
+    version = load_version(mocktest_id)
+    if version is None:
+        return None
+    cache = _cache()
+    key = _cache_key(mocktest_id, version)
+    paper = cache.get(key)
+    if paper is not None:
+        return paper
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.MOCKTEST_PAPER_LOCK_TIMEOUT):
+        try:
+            paper = compile_paper(mocktest_id)
+            if paper is not None:
+                cache.set(key, paper, settings.MOCKTEST_PAPER_CACHE_TTL)
+            return paper
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + settings.MOCKTEST_PAPER_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        paper = cache.get(key)
+        if paper is not None:
+            return paper
+        if cache.get(lock_key) is None:
+            break
+    return cache.get(key) or compile_paper(mocktest_id)
+
+
+def rebuild_paper(mocktest_id):
+    """Recompile the paper once the surrounding transaction commits, so the next reader doesn't have to."""
+    def rebuild():
+        version = load_version(mocktest_id)
+        paper = compile_paper(mocktest_id) if version is not None else None
+        if paper is not None:
+            _cache().set(_cache_key(mocktest_id, version), paper, settings.MOCKTEST_PAPER_CACHE_TTL)
+
+    transaction.on_commit(rebuild)
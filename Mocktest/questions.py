@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import MockQuestions, Difficulty
+from .caching import TieredCache
+from .versions import bump_version
+from .dedup import MOCKTEST, index_question, unindex_question
+from Search.index import record_changes
+
+QUESTION_FIELDS = ['question', 'choiceA', 'choiceB', 'choiceC', 'choiceD', 'subject', 'difficulty_id', 'correctAnswer']
+
+difficulties = TieredCache(
+    'mocktest-difficulty',
+    maxsize=2,
+    ttl=settings.MOCKTEST_ANSWER_KEY_CACHE_TTL,
+    shared_alias=settings.MOCKTEST_SHARED_CACHE,
+)
+
+
+def load_difficulty_ids():
+    return difficulties.get_or_load('ids', lambda: frozenset(Difficulty.objects.values_list('pk', flat=True)))
+
+
+def load_difficulty_names():
+    # Lowercased difficulty name -> id, for imports that name the difficulty instead of its id.
+    return difficulties.get_or_load('names', lambda: {
+        name.lower(): pk for pk, name in Difficulty.objects.values_list('pk', 'name')
+    })
+
+
+def invalidate_difficulty_ids():
+    difficulties.invalidate('ids')
+    difficulties.invalidate('names')
+
+
+def apply_question_diff(mocktest, rows):
+    """
+    Make the questions of a mock test match the validated rows: rows without an id are
+    created, rows whose fields changed are updated and questions missing from the rows
+    are deleted. Returns the created/updated/deleted counts.
+
+    Bulk writes skip the MockQuestions signals, so callers invalidate the caches themselves;
+    the version every worker checks its cached answer key against is bumped here, and
+    the search journal and duplicate index are told about every written question once
+    the transaction commits.
+    """
+    existing = {question.pk: question for question in MockQuestions.objects.filter(mocktest=mocktest)}
+    unknown = [row['id'] for row in rows if row.get('id') and row['id'] not in existing]
+    if unknown:
+        raise MockQuestions.DoesNotExist(f"Questions {unknown} are not part of this mock test.")
+
+    to_create = []
+    to_update = []
+    kept = set()
+    for row in rows:
+        values = {field: row[field] for field in QUESTION_FIELDS}
+        question = existing.get(row.get('id'))
+        if question is None:
+            to_create.append(MockQuestions(mocktest=mocktest, **values))
+            continue
+        kept.add(question.pk)
+        if any(getattr(question, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(question, field, value)
+            to_update.append(question)
+    deleted = [pk for pk in existing if pk not in kept]
+    # bulk_update skips auto_now, so the timestamp is set by hand.
+    now = timezone.now()
+    for question in to_update:
+        question.updated_at = now
+
+    with transaction.atomic():
+        MockQuestions.objects.bulk_create(to_create, batch_size=500)
+        MockQuestions.objects.bulk_update(to_update, QUESTION_FIELDS + ['updated_at'], batch_size=500)
+        if deleted:
+            MockQuestions.objects.filter(pk__in=deleted).delete()
+        if to_create or to_update or deleted:
+            bump_version(mocktest.pk)
+        # bulk_create doesn't set primary keys on every backend, so the new rows are read back.
+        written = [(question.pk, question.question) for question in to_update]
+        if to_create:
+            written.extend(MockQuestions.objects.filter(mocktest=mocktest).exclude(pk__in=existing).values_list('pk', 'question'))
+        if written or deleted:
+            transaction.on_commit(lambda: index_written_questions(written, deleted))
+
+    return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(deleted)}
+
+
+def index_written_questions(written, deleted=()):
+    """
+    Pass bulk-written (question id, text) pairs and deleted ids to the search journal and
+    the duplicate index. Both are idempotent, so rows the signals already covered don't matter.
+    """
+    record_changes('question', [pk for pk, _ in written] + list(deleted))
+    for pk, text in written:
+        index_question(MOCKTEST, pk, text)
+    for pk in deleted:
+        unindex_question(MOCKTEST, pk)
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from User.models import Student
+from .models import MockTest
+from .caching import TieredCache, shared_cache
+from .grading import load_answer_key
+from .paper import get_paper
+
+windows = TieredCache(
+    'mocktest-window',
+    maxsize=1024,
+    ttl=settings.MOCKTEST_WINDOW_CACHE_TTL,
+    shared_alias=settings.MOCKTEST_SHARED_CACHE,
+)
+
+rosters = TieredCache(
+    'mocktest-roster',
+    maxsize=64,
+    ttl=settings.MOCKTEST_ROSTER_CACHE_TTL,
+    shared_alias=settings.MOCKTEST_SHARED_CACHE,
+)
+
+STUDENT_FIELDS = ('user_name', 'first_name', 'last_name', 'specialization__name')
+
+
+class SubmissionClosed(Exception):
+    pass
+
+
+def load_window(mocktest_id):
+    """Cached (name, opens at, closes at) of a mock test, or None if it doesn't exist."""
+    mocktest_id = int(mocktest_id)
+    return windows.get_or_load(mocktest_id, lambda: MockTest.objects.filter(pk=mocktest_id).values_list(
+        'mocktestName', 'opens_at', 'closes_at'
+    ).first())
+
+
+def invalidate_window(mocktest_id):
+    windows.invalidate(int(mocktest_id))
+
+
+def check_window(window, now=None, closed_ok=False):
+    """Raise SubmissionClosed unless the window is open now (or, with closed_ok, has opened)."""
+    _, opens_at, closes_at = window
+    now = now or timezone.now()
+    if opens_at and now < opens_at:
+        raise SubmissionClosed(f"This mock test opens at {timezone.localtime(opens_at):%B %d, %Y %H:%M}.")
+    if closes_at and now >= closes_at and not closed_ok:
+        raise SubmissionClosed(f"This mock test closed at {timezone.localtime(closes_at):%B %d, %Y %H:%M}.")
+
+
+def fetch_roster(mocktest_id):
+    """user_name -> (first name, last name, specialization) of the students expected to sit the test."""
+    mocktest = MockTest.objects.filter(pk=mocktest_id).values('classID', 'course').first()
+    if mocktest is None:
+        return {}
+    if mocktest['classID']:
+        students = Student.objects.filter(classes=mocktest['classID'])
+    elif mocktest['course']:
+        students = Student.objects.filter(classes__course=mocktest['course'])
+    else:
+        return {}
+    return {row[0]: row[1:] for row in students.values_list(*STUDENT_FIELDS).distinct()}
+
+
+def load_roster(mocktest_id):
+    mocktest_id = int(mocktest_id)
+    return rosters.get_or_load(mocktest_id, lambda: fetch_roster(mocktest_id))
+
+
+def load_student(mocktest_id, user_name):
+    """
+    (first name, last name, specialization) of a student, from the roster or, for students
+    not on it (e.g. enrolled after it was cached), the database. None if there's no such student.
+    """
+    student = load_roster(mocktest_id).get(user_name)
+    if student is None:
+        row = Student.objects.filter(user_name=user_name).values_list(*STUDENT_FIELDS).first()
+        student = row[1:] if row else None
+    return student
+
+
+def prewarm_mocktest(mocktest_id):
+    """Fill the caches a sitting needs: window, compiled paper, answer key and roster."""
+    if load_window(mocktest_id) is None:
+        return None
+    paper = get_paper(mocktest_id)
+    return {
+        'questions': len(load_answer_key(mocktest_id)),
+        'students': len(load_roster(mocktest_id)),
+        'paper_bytes': len(paper.body) if paper else 0,
+    }
+
+
+def due_for_prewarm(lead=None, now=None):
+    """
+    Ids of mock tests opening within the lead time that haven't been warmed for that opening
+    yet. Needs the shared cache, which holds the markers.
+    """
+    lead = settings.MOCKTEST_PREWARM_LEAD if lead is None else lead
+    now = now or timezone.now()
+    upcoming = MockTest.objects.filter(
+        opens_at__gte=now, opens_at__lte=now + timezone.timedelta(seconds=lead)
+    ).filter(Q(closes_at__isnull=True) | Q(closes_at__gt=now)).values_list('pk', 'opens_at')
+    cache = shared_cache()
+    # One marker per opening, so a reschedule gets warmed again.
+    return [
+        mocktest_id for mocktest_id, opens_at in upcoming
+        if cache.add(f'mocktest-prewarmed:{mocktest_id}:{opens_at.timestamp()}', 1, lead * 2)
+    ]
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from Mocktest.models import MockTest, MockQuestions, MockTestScores, Difficulty
+from Mocktest.breakdown import summarize_breakdown
+from Mocktest.aggregation import aggregate_breakdowns
+from Mocktest.questions import load_difficulty_ids
 
 
 class DifficultySerializer(serializers.ModelSerializer):
@@ -15,27 +18,53 @@ class MockQuestionsSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class MockQuestionRowSerializer(serializers.ModelSerializer):
+    # Validates a question for a bulk edit without a query per row; difficulty is checked
+    # against the cached id set instead of a queryset lookup.
+    id = serializers.IntegerField(required=False, allow_null=True)
+    difficulty = serializers.IntegerField(source='difficulty_id')
+    class Meta:
+        model = MockQuestions
+        fields = ('id', 'question', 'choiceA', 'choiceB', 'choiceC', 'choiceD', 'subject', 'difficulty', 'correctAnswer')
+
+    def validate_difficulty(self, value):
+        if value not in load_difficulty_ids():
+            raise serializers.ValidationError(f"Invalid difficulty \"{value}\".")
+        return value
+
+
 class MockTestSerializer(serializers.ModelSerializer):
     question = MockQuestionsSerializer(many=True, read_only=True, source='mockquestions_set')
     class Meta:
         model = MockTest
         fields = '__all__'
 
+    def validate(self, data):
+        opens_at = data.get('opens_at', getattr(self.instance, 'opens_at', None))
+        closes_at = data.get('closes_at', getattr(self.instance, 'closes_at', None))
+        if opens_at and closes_at and closes_at <= opens_at:
+            raise serializers.ValidationError({'closes_at': 'Must be after opens_at.'})
+        return data
+
+
+class MockTestScoresListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        scores = list(data.all() if hasattr(data, 'all') else data)
+        # Breakdowns missing from the table are rebuilt for the whole page at once.
+        missing = {score.pk: score for score in scores if not score.breakdown.all()}
+        breakdowns = aggregate_breakdowns(list(missing.values()))
+        for score_id, score in missing.items():
+            score.aggregated_breakdown = breakdowns.get(score_id, [])
+        return super(MockTestScoresListSerializer, self).to_representation(scores)
+
 
 class MockTestScoresSerializer(serializers.ModelSerializer):
     studentName = serializers.SerializerMethodField()
-    easy_count = serializers.IntegerField(read_only=True)
-    medium_count = serializers.IntegerField(read_only=True)
-    hard_count = serializers.IntegerField(read_only=True)
-    easy_correct = serializers.IntegerField(read_only=True)
-    medium_correct = serializers.IntegerField(read_only=True)
-    hard_correct = serializers.IntegerField(read_only=True)
-    subjects_count = serializers.IntegerField(read_only=True)
     feedback = serializers.CharField(read_only=True)
-    subjects = serializers.CharField(read_only=True)
-    subjects_correct = serializers.CharField(read_only=True)
+    feedback_status = serializers.CharField(read_only=True)
     class Meta:
         model = MockTestScores
+        list_serializer_class = MockTestScoresListSerializer
         fields = ('mocktestScoreID',
                   'mocktest_id',
                   'student',
@@ -43,32 +72,22 @@ class MockTestScoresSerializer(serializers.ModelSerializer):
                   'mocktestDateTaken',
                   'totalQuestions',
                   'studentName',
-                  'easy_count',
-                  'medium_count',
-                  'hard_count',
-                  'easy_correct',
-                  'medium_correct',
-                  'hard_correct',
-                  'subjects_count',
                   'feedback',
-                  'subjects',
-                  'subjects_correct'
+                  'feedback_status',
                   )
 
     def to_representation(self, instance):
         representation = super(MockTestScoresSerializer, self).to_representation(instance)
         representation['mocktestName'] = instance.mocktest_id.mocktestName if instance.mocktest_id else None
         representation['mocktestDescription'] = instance.mocktest_id.mocktestDescription if instance.mocktest_id else None
-        representation['easy_count'] = instance.easy_count
-        representation['medium_count'] = instance.medium_count
-        representation['hard_count'] = instance.hard_count
-        representation['easy_correct'] = instance.easy_correct
-        representation['medium_correct'] = instance.medium_correct
-        representation['hard_correct'] = instance.hard_correct
-        representation['subjects_count'] = instance.subjects_count
-        representation['feedback'] = instance.feedback
+        rows = instance.breakdown.all()
+        if not rows:
+            # Scores written outside the grading engine have no stored breakdown yet.
+            rows = getattr(instance, 'aggregated_breakdown', None)
+            if rows is None:
+                rows = aggregate_breakdowns([instance])[instance.pk]
+        representation.update(summarize_breakdown(rows))
         return representation
 
     def get_studentName(self, obj):
         return f"{obj.student.first_name} {obj.student.last_name}"
-
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from Course.models import ExerciseQuestions
+from .models import MockTest, MockQuestions, Difficulty
+from .grading import invalidate_answer_key
+from .questions import invalidate_difficulty_ids
+from .adaptive import invalidate_item_bank_for_mocktest
+from .schedule import invalidate_window
+from .versions import bump_version, bump_difficulty_versions
+from .dedup import MOCKTEST, EXERCISE, index_question, unindex_question
+
+
+@receiver([post_save, post_delete], sender=MockQuestions)
+def invalidate_mocktest_caches(sender, instance, **kwargs):
+    mocktest_id = instance.mocktest_id
+    bump_version(mocktest_id)
+    invalidate_answer_key(mocktest_id)
+    invalidate_item_bank_for_mocktest(mocktest_id)
+    # Drop it again once the write is visible, in case a reader re-cached the old key in between.
+    transaction.on_commit(lambda: invalidate_answer_key(mocktest_id))
+
+
+@receiver([post_save, post_delete], sender=Difficulty)
+def invalidate_difficulty_cache(sender, instance, **kwargs):
+    # Answer keys carry difficulty names.
+    bump_difficulty_versions(instance.pk)
+    invalidate_difficulty_ids()
+    transaction.on_commit(invalidate_difficulty_ids)
+
+
+@receiver([post_save, post_delete], sender=MockTest)
+def invalidate_mocktest_window(sender, instance, **kwargs):
+    # Cached papers are keyed on the version MockTest.save bumps.
+    invalidate_window(instance.pk)
+    transaction.on_commit(lambda: invalidate_window(instance.pk))
+
+
+@receiver(post_save, sender=MockQuestions)
+@receiver(post_save, sender=ExerciseQuestions)
+def index_question_text(sender, instance, **kwargs):
+    index_question(MOCKTEST if sender is MockQuestions else EXERCISE, instance.pk, instance.question)
+
+
+@receiver(post_delete, sender=MockQuestions)
+@receiver(post_delete, sender=ExerciseQuestions)
+def unindex_question_text(sender, instance, **kwargs):
+    unindex_question(MOCKTEST if sender is MockQuestions else EXERCISE, instance.pk)
@@ -0,0 +1,18 @@
+from django.db.models import F
+from .models import MockTest, MockQuestions
+
+
+def bump_version(mocktest_id):
+    """Mark a mock test's questions as changed, for every worker, once the transaction commits."""
+    MockTest.objects.filter(pk=mocktest_id).update(version=F('version') + 1)
+
+
+def bump_difficulty_versions(difficulty_id):
+    MockTest.objects.filter(
+        pk__in=MockQuestions.objects.filter(difficulty_id=difficulty_id).values('mocktest_id')
+    ).update(version=F('version') + 1)
+
+
+def load_version(mocktest_id):
+    """The mock test's current version, or None if it doesn't exist."""
+    return MockTest.objects.filter(pk=mocktest_id).values_list('version', flat=True).first()
@@ -1,20 +1,40 @@
-import os, environ
-from rest_framework import viewsets, status
+import json
+import logging
+from rest_framework import viewsets, status, parsers
 from rest_framework.decorators import api_view, action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
-from django.db.models import Count, Case, When, Value, F, Q, OuterRef, Subquery, Aggregate, IntegerField, CharField
-from django.db.models.functions import Coalesce, Concat
-from django.db import connection, transaction
-from django.db.models.functions import Coalesce
-from .models import MockTest, MockQuestions, MockTestScores, Difficulty, CorrectQuestions
-from User.models import Student, Teacher, User, Specialization
-from Mocktest.serializer import MockTestSerializer, MockQuestionsSerializer, MockTestScoresSerializer, DifficultySerializer
-from openai import OpenAI
-
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from .models import MockTest, MockQuestions, MockTestScores, Difficulty
+from User.models import Student
+from Mocktest.serializer import MockTestSerializer, MockQuestionsSerializer, MockQuestionRowSerializer, MockTestScoresSerializer, DifficultySerializer
+from Mocktest.grading import load_answer_key, grade_answers, save_grade, invalidate_answer_key, answer_keys
+from Mocktest.feedback import build_feedback_messages, feedback_fingerprint, feedback_memo, queue_feedback, stream_feedback
+from Mocktest.batch import grade_sheets, validate_sheets, save_batch
+from Mocktest.analysis import get_item_analysis
+from Mocktest.leaderboard import top_scores, student_standing
+from Mocktest.history import score_trajectory, subject_improvement
+from Mocktest.adaptive import start_session, load_session, answer_item, invalidate_item_bank_for_mocktest
+from Mocktest.questions import apply_question_diff
+from Mocktest.imports import import_format, read_rows, import_questions
+from Mocktest.dedup import MOCKTEST, find_duplicates, course_duplicates
+from Mocktest.paper import get_paper, rebuild_paper
+from Mocktest.drafts import buffer as draft_buffer, student_exists, load_draft, discard_draft
+from Mocktest.schedule import SubmissionClosed, load_window, check_window, load_student
+
+
+logger = logging.getLogger(__name__)
+
+
+def _mocktest_id(pk):
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        return None
 
 
 class MockTestViewSet(viewsets.ModelViewSet):
@@ -41,7 +61,6 @@ class MockTestViewSet(viewsets.ModelViewSet):
         try:
             mocktest = MockTest.objects.get(course=course_id)
             serializer = MockTestSerializer(mocktest)
-            print(course_id)
             return Response(serializer.data)
         except MockTest.DoesNotExist:
             return Response({'error': 'MockTest not found for the given course.'}, status=status.HTTP_404_NOT_FOUND)
@@ -54,37 +73,260 @@ class MockTestViewSet(viewsets.ModelViewSet):
             mocktest = MockTest.objects.get(course=course_id)
             mocktest_serializer = self.get_serializer(mocktest, data=request.data)
             mocktest_serializer.is_valid(raise_exception=True)
-            mocktest_serializer.save()
-
-            current_question_ids = set(MockQuestions.objects.filter(mocktest=mocktest).values_list('id', flat=True))
-
-            questions_data = request.data.get('questions', [])
-            for question_data in questions_data:
-                question_id = question_data.get('id')
-                if question_id:
-                    question_instance = MockQuestions.objects.get(id=question_id, mocktest=mocktest)
-                    question_serializer = MockQuestionsSerializer(instance=question_instance, data=question_data)
-                else:
-                    question_serializer = MockQuestionsSerializer(data=question_data)
-
-                question_serializer.is_valid(raise_exception=True)
-                question_serializer.save(mocktest=mocktest)
-
-                if question_id:
-                    current_question_ids.discard(question_id)
-
-            MockQuestions.objects.filter(id__in=current_question_ids).delete()
-
-            updated_mocktest_serializer = MockTestSerializer(instance=mocktest)
+            questions_serializer = MockQuestionRowSerializer(data=request.data.get('questions', []), many=True)
+            questions_serializer.is_valid(raise_exception=True)
+
+            with transaction.atomic():
+                mocktest_serializer.save()
+                counts = apply_question_diff(mocktest, questions_serializer.validated_data)
+                invalidate_answer_key(mocktest.pk)
+                invalidate_item_bank_for_mocktest(mocktest.pk)
+                rebuild_paper(mocktest.pk)
+
+            data = dict(MockTestSerializer(instance=mocktest).data)
+            data.update(counts)
             print('MockTest and questions updated successfully')
-            return Response(updated_mocktest_serializer.data)
+            return Response(data)
         except MockTest.DoesNotExist:
             return Response({'error': 'MockTest not found.'}, status=status.HTTP_404_NOT_FOUND)
-        except MockQuestions.DoesNotExist:
-            return Response({'error': 'Question not found.'}, status=status.HTTP_404_NOT_FOUND)
+        except MockQuestions.DoesNotExist as e:
+            return Response({'error': str(e) or 'Question not found.'}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return Response({'error': e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['post'], url_path='grade-batch')
+    def grade_batch(self, request, pk=None):
+        mocktest = get_object_or_404(MockTest, pk=pk)
+        sheets = request.data.get('sheets')
+        if not isinstance(sheets, list) or not sheets:
+            return Response({'error': 'Provide a non-empty list of answer sheets.'}, status=status.HTTP_400_BAD_REQUEST)
+        with_feedback = bool(request.data.get('feedback', False))
+
+        answer_key = load_answer_key(mocktest.pk)
+        user_names = {sheet.get('user_name') for sheet in sheets if isinstance(sheet, dict)}
+        students = {
+            row[0]: row for row in Student.objects.filter(user_name__in=user_names).values_list(
+                'user_name', 'first_name', 'last_name', 'specialization__name'
+            )
+        }
+        valid, errors = validate_sheets(answer_key, sheets, students)
+        if not valid:
+            return Response({'error': 'No gradable answer sheets.', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        graded_names = [user_name for user_name, _ in valid]
+        graded_sheets = [answers for _, answers in valid]
+        graded = grade_sheets(answer_key, graded_sheets)
+        score_ids, taken_at = save_batch(mocktest, graded_names, graded_sheets, graded, pending_feedback=with_feedback)
+
+        if with_feedback:
+            for user_name, answers in valid:
+                _, first_name, last_name, specialization_name = students[user_name]
+                student_name = f"{first_name} {last_name}"
+                messages = build_feedback_messages(specialization_name, grade_answers(answer_key, answers))
+                fingerprint = feedback_fingerprint(mocktest.pk, specialization_name, answer_key, answers)
+                queue_feedback(score_ids[user_name], taken_at, messages, fingerprint, student_name)
+
+        results = [
+            {
+                'user_name': user_name,
+                'mocktestScoreID': score_ids[user_name],
+                'score': int(graded.scores[row]),
+                'total_questions': len(graded.question_ids),
+            }
+            for row, user_name in enumerate(graded_names)
+        ]
+        return Response({
+            'graded': len(results),
+            'feedbackStatus': MockTestScores.FEEDBACK_PENDING if with_feedback else None,
+            'results': results,
+            'errors': errors,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='import-questions',
+            parser_classes=[parsers.MultiPartParser, parsers.FormParser])
+    def import_questions(self, request, pk=None):
+        mocktest = get_object_or_404(MockTest, pk=pk)
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'No file uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = import_format(upload.name, request.data.get('format'))
+        if fmt is None:
+            return Response({'error': 'Upload a .csv or .jsonl file.'}, status=status.HTTP_400_BAD_REQUEST)
+        partial = str(request.data.get('partial', '')).lower() in ('1', 'true', 'yes')
+
+        # Large uploads are spooled to disk by Django and parsed as a stream.
+        report = import_questions(mocktest, read_rows(upload, fmt), partial=partial)
+        if report['error_count'] and not partial:
+            return Response({'error': 'No questions were imported.', **report}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='item-analysis')
+    def item_analysis(self, request, pk=None):
+        mocktest = get_object_or_404(MockTest, pk=pk)
+        return Response(get_item_analysis(mocktest.pk, load_answer_key(mocktest.pk)))
+
+    @action(detail=True, methods=['get'])
+    def paper(self, request, pk=None):
+        mocktest_id = _mocktest_id(pk)
+        if mocktest_id is None:
+            return Response({'error': 'Invalid mock test id.'}, status=status.HTTP_400_BAD_REQUEST)
+        window = load_window(mocktest_id)
+        if window is None:
+            return Response({'error': 'MockTest not found.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            # The paper stays available for review after closing, but not before opening.
+            check_window(window, closed_ok=True)
+        except SubmissionClosed as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        compiled = get_paper(mocktest_id)
+        if compiled is None:
+            return Response({'error': 'MockTest not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if request.headers.get('If-None-Match') == compiled.etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(compiled.gzipped, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(compiled.body, content_type='application/json')
+        response['ETag'] = compiled.etag
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    @action(detail=True, methods=['get', 'post'])
+    def autosave(self, request, pk=None):
+        mocktest_id = _mocktest_id(pk)
+        if mocktest_id is None:
+            return Response({'error': 'Invalid mock test id.'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.method == 'GET':
+            user_name = request.query_params.get('user_name')
+            if not user_name:
+                return Response({'error': 'User name not provided.'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'mocktest_id': mocktest_id, 'user_name': user_name, 'answers': load_draft(mocktest_id, user_name)})
+
+        user_name = request.data.get('user_name')
+        answers = request.data.get('answers')
+        if not user_name or not isinstance(answers, dict):
+            return Response({'error': 'Provide a user_name and an answers object.'}, status=status.HTTP_400_BAD_REQUEST)
+        window = load_window(mocktest_id)
+        if window is None:
+            return Response({'error': 'MockTest not found.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            check_window(window)
+        except SubmissionClosed as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        answer_key = load_answer_key(mocktest_id)
+        if not answer_key:
+            return Response({'error': 'MockTest not found.'}, status=status.HTTP_404_NOT_FOUND)
+        unknown = [question_id for question_id in answers if str(question_id) not in answer_key]
+        if unknown:
+            return Response({'error': f"Questions {unknown} are not part of this mock test."}, status=status.HTTP_400_BAD_REQUEST)
+        if not student_exists(user_name):
+            return Response({'error': 'Student does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+
+        draft_buffer.save(mocktest_id, user_name, answers)
+        return Response({'saved': len(answers)}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def attempts(self, request, pk=None):
+        mocktest_id = _mocktest_id(pk)
+        if mocktest_id is None:
+            return Response({'error': 'Invalid mock test id.'}, status=status.HTTP_400_BAD_REQUEST)
+        student_id = request.query_params.get('student_id')
+        if not student_id:
+            return Response({'error': 'student_id is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'mocktest_id': mocktest_id, 'student': student_id, 'attempts': score_trajectory(student_id, mocktest_id)})
+
+    @action(detail=True, methods=['get'])
+    def improvement(self, request, pk=None):
+        mocktest_id = _mocktest_id(pk)
+        if mocktest_id is None:
+            return Response({'error': 'Invalid mock test id.'}, status=status.HTTP_400_BAD_REQUEST)
+        student_id = request.query_params.get('student_id')
+        if not student_id:
+            return Response({'error': 'student_id is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        attempts, subjects = subject_improvement(student_id, mocktest_id)
+        return Response({'mocktest_id': mocktest_id, 'student': student_id, 'attempts': attempts, 'subjects': subjects})
+
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        mocktest = get_object_or_404(MockTest, pk=pk)
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            return Response({'error': 'limit must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        class_id = request.query_params.get('class_id')
+        return Response({
+            'mocktest_id': mocktest.pk,
+            'class_id': class_id,
+            'leaders': top_scores(mocktest.pk, max(limit, 1), class_id),
+        })
+
+    @action(detail=True, methods=['get'], url_path='leaderboard/me')
+    def leaderboard_me(self, request, pk=None):
+        student_id = request.query_params.get('student_id')
+        if not student_id:
+            return Response({'error': 'student_id is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        standing = student_standing(pk, student_id, request.query_params.get('class_id'))
+        if standing is None:
+            return Response({'error': 'No score on this leaderboard for this student.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(standing)
+
+    @action(detail=False, methods=['post'], url_path='adaptive/start')
+    def adaptive_start(self, request):
+        course_id = request.data.get('course_id')
+        user_name = request.data.get('user_name')
+        if not course_id or not user_name:
+            return Response({'error': 'Provide a course_id and a user_name.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not Student.objects.filter(user_name=user_name).exists():
+            return Response({'error': 'Student does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            length = int(request.data['length']) if request.data.get('length') else None
+        except ValueError:
+            return Response({'error': 'length must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        started = start_session(course_id, user_name, request.data.get('subject'), length)
+        if started is None:
+            return Response({'error': 'No questions available for this course and subject.'}, status=status.HTTP_404_NOT_FOUND)
+        session, question = started
+        return Response({
+            'session': session.pk.hex,
+            'length': session.length,
+            'question': question,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='adaptive/answer')
+    def adaptive_answer(self, request):
+        session_id = request.data.get('session')
+        session = load_session(session_id) if session_id else None
+        if session is None:
+            return Response({'error': 'Adaptive session not found or expired.'}, status=status.HTTP_404_NOT_FOUND)
+        if session.current is None:
+            return Response({'error': 'This adaptive session is finished.'}, status=status.HTTP_400_BAD_REQUEST)
+        if str(request.data.get('question_id')) != str(session.current):
+            return Response({'error': 'Answer the current question of the session.', 'question_id': session.current},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        answered = answer_item(session, request.data.get('answer'))
+        if answered is None:
+            return Response({'error': 'This question was already answered.'}, status=status.HTTP_409_CONFLICT)
+        correct, theta, standard_error, question = answered
+        return Response({
+            'correct': correct,
+            'ability': round(theta, 3),
+            'standard_error': round(standard_error, 3),
+            'answered': len(session.administered),
+            'score': sum(session.responses),
+            'finished': question is None,
+            'question': question,
+        })
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        return Response({'answer_keys': answer_keys.stats(), 'feedback': feedback_memo.stats()})
+
     @action(detail=False, methods=['delete'])
     def destroy_by_course(self, request, course_id):
         try:
@@ -126,7 +368,9 @@ class MockQuestionsViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        data = dict(serializer.data)
+        data['duplicates'] = find_duplicates(serializer.instance.question, exclude=(MOCKTEST, serializer.instance.pk))
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
         data = request.data.copy()
@@ -144,17 +388,19 @@ class MockQuestionsViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get', 'post'])
+    def duplicates(self, request):
+        # POST checks a draft question against every bank; GET reports duplicate groups in a course.
+        if request.method == 'POST':
+            question = request.data.get('question')
+            if not question:
+                return Response({'error': 'Question text not provided.'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'duplicates': find_duplicates(question)})
 
-class GroupConcatWithCount(Aggregate):
-    function = 'GROUP_CONCAT'
-    template = '%(function)s(DISTINCT CONCAT(%(expressions)s))'
-
-    def __init__(self, expression, **extra):
-        super(GroupConcatWithCount, self).__init__(
-            expression,
-            output_field=CharField(),
-            **extra
-        )
+        course_id = request.query_params.get('course_id')
+        if not course_id:
+            return Response({'error': 'Course ID not provided.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'course_id': course_id, 'groups': course_duplicates(course_id)})
 
 
 class MockTestScoresViewSet(viewsets.ModelViewSet):
@@ -175,186 +421,143 @@ class MockTestScoresViewSet(viewsets.ModelViewSet):
         if mocktest_id:
             queryset = queryset.filter(mocktest_id=mocktest_id)
 
-        def correct_questions_count(difficulty_name):
-            return Coalesce(
-                Subquery(
-                    CorrectQuestions.objects.filter(
-                        mocktest_score_id=OuterRef('pk'),
-                        mockquestion__difficulty__name=difficulty_name
-                    ).values('mocktest_score_id')
-                    .annotate(count=Count('pk')).values('count'),
-                    output_field=IntegerField()
-                ),
-                Value(0)
-            )
-
-        def count_per_subject_correct():
-            correct_questions_count = Subquery(
-                CorrectQuestions.objects.filter(
-                    mocktest_score_id=OuterRef('pk'),
-                    mockquestion__subject=OuterRef('correct_questions__subject')
-                ).values('mockquestion__subject')
-                .annotate(count=Count('pk')).values('count'),
-                output_field=IntegerField()
-            )
-
-            return Case(
-                When(correct_questions__isnull=True, then=Value(None)),
-                default=GroupConcatWithCount(
-                    Concat(
-                        'correct_questions__subject',
-                        Value(':'),
-                        Coalesce(correct_questions_count, Value(0))
-                    )
-                ),
-                output_field=CharField()
-            )
-
-        queryset = queryset.annotate(
-            easy_count=Count('mocktest_id__mockquestions__id',
-                             filter=Q(mocktest_id__mockquestions__difficulty__name='Easy')),
-            medium_count=Count('mocktest_id__mockquestions__id',
-                               filter=Q(mocktest_id__mockquestions__difficulty__name='Medium')),
-            hard_count=Count('mocktest_id__mockquestions__id',
-                             filter=Q(mocktest_id__mockquestions__difficulty__name='Hard')),
-            easy_correct=correct_questions_count('Easy'),
-            medium_correct=correct_questions_count('Medium'),
-            hard_correct=correct_questions_count('Hard'),
-            subjects_count=Count('mocktest_id__mockquestions__subject', distinct=True),
-            subjects=GroupConcatWithCount(
-                Concat(
-                    'mocktest_id__mockquestions__subject',
-                    Value(':'),
-                    Subquery(
-                        MockQuestions.objects.filter(
-                            subject=OuterRef('mocktest_id__mockquestions__subject'),
-                            mocktest=OuterRef('mocktest_id')
-                        ).order_by().values('subject')
-                        .annotate(count=Count('pk')).values('count'),
-                        output_field=IntegerField()
-                    )
-                )
-            ),
-            subjects_correct=count_per_subject_correct()
-        )
+        queryset = queryset.select_related('mocktest_id', 'student').prefetch_related('breakdown')
         # try:
         #     student_id = int(student_id)
         # except:
         #     return queryset.none()
         return queryset
 
+    @action(detail=True, methods=['get'])
+    def feedback(self, request, pk=None):
+        mocktest_score = MockTestScores.objects.filter(pk=pk).values('mocktestScoreID', 'feedback', 'feedback_status').first()
+        if mocktest_score is None:
+            return Response({'error': 'Score not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        ready = mocktest_score['feedback_status'] == MockTestScores.FEEDBACK_READY
+        return Response({
+            'mocktestScoreID': mocktest_score['mocktestScoreID'],
+            'status': mocktest_score['feedback_status'],
+            'feedback': mocktest_score['feedback'] if ready else None,
+        })
+
 class DifficultyViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Difficulty.objects.all()
     serializer_class = DifficultySerializer
 
+def _save_submission(request, mocktest_id):
+    """
+    Grade a submission and save its score with feedback pending. Returns the response
+    data and the (score id, requested at, messages, fingerprint, student name) feedback job.
+    """
+    user_name = request.data.get('user_name')
+    if not user_name:
+        raise ValidationError('User name not provided.')
+
+    # Cached lookups only, so closed tests are turned away before any grading or feedback work.
+    window = load_window(mocktest_id)
+    if window is None:
+        raise MockTest.DoesNotExist()
+    check_window(window)
+    profile = load_student(mocktest_id, user_name)
+    if profile is None:
+        raise Student.DoesNotExist()
+    first_name, last_name, specialization_name = profile
+    # Only the keys are needed to save the grade.
+    mocktest = MockTest(mocktestID=int(mocktest_id), mocktestName=window[0])
+    student = Student(pk=user_name, first_name=first_name, last_name=last_name)
+    mocktest_name = mocktest.mocktestName
+    answers = request.data.get('answers')
+    student_name = first_name + " " + last_name
+
+    if request.data.get('from_draft'):
+        # Answers sent with the submission win over the autosaved ones.
+        answers = {**load_draft(mocktest.pk, student.pk), **(answers if isinstance(answers, dict) else {})}
+    if not isinstance(answers, dict):
+        raise ValidationError('Answers not provided.')
+
+    answer_key = load_answer_key(mocktest.pk)
+    result = grade_answers(answer_key, answers)
+    messages = build_feedback_messages(specialization_name, result)
+    fingerprint = feedback_fingerprint(mocktest.pk, specialization_name, answer_key, answers)
+    mocktest_score = save_grade(mocktest, student, answers, result)
+    discard_draft(mocktest.pk, student.pk)
+
+    response_data = {
+        'mocktestScoreID': mocktest_score.pk,
+        'score': result.score,
+        'total_questions': result.total_questions,
+        'feedback': mocktest_score.feedback,
+        'feedbackStatus': mocktest_score.feedback_status,
+        'mocktestName': mocktest_name,
+        'studentName': student_name,
+        'mocktestDateTaken': timezone.now().strftime('%B %d, %Y'),
+        'message': 'Mock test submitted successfully'
+    }
+    job = (mocktest_score.pk, mocktest_score.feedback_requested_at, messages, fingerprint, student_name)
+    return response_data, job
+
+
+def _submission_error(e):
+    if isinstance(e, ValidationError):
+        return Response({'error': e.detail[0]}, status=400)
+    logger.exception('Mock test submission failed')
+    return Response({'error': str(e)}, status=400)
+
+
 @api_view(['POST'])
 def submit_mocktest(request, mocktest_id):
     try:
-        env = environ.Env(
-            DEBUG=(bool, False)
-        )
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
-        client = OpenAI(
-            api_key=env('OPENAI_API_KEY'),
-        )
-
-
-        user_name = request.data.get('user_name')
-        if not user_name:
-            return Response({'error': 'User name not provided.'}, status=400)
-
-        user = get_object_or_404(User, user_name=user_name)
-        student = get_object_or_404(Student, user_name=user.user_name)
-        mocktest = get_object_or_404(MockTest, pk=mocktest_id)
-        mocktest_name = mocktest.mocktestName
-        answers = request.data.get('answers')
-        specialization_name = student.specialization.name
-        student_name = student.first_name + " " + student.last_name
-
-        correct_answers = MockQuestions.objects.filter(mocktest=mocktest).values_list('id', 'correctAnswer')
-        correct_answers_dict = {str(question_id): correct for question_id, correct in correct_answers}
-
-        score = sum(answer == correct_answers_dict.get(str(question_id)) for question_id, answer in answers.items())
-        total_questions = len(correct_answers)
-
-        correct_answers_list = []
-        wrong_answers_list = []
-
-        for question_id, submitted_answer in answers.items():
-            correct_answer = correct_answers_dict.get(str(question_id))
-            question_text = MockQuestions.objects.get(id=question_id).question
-            subject_text = MockQuestions.objects.get(id=question_id).subject
-
-            if submitted_answer == correct_answer:
-                correct_answers_list.append({"question": question_text, "submittedAnswer": submitted_answer,"correctAnswer": correct_answer, "subject": subject_text})
-            else:
-                wrong_answers_list.append({"question": question_text, "submittedAnswer": submitted_answer, "correctAnswer": correct_answer, "subject": subject_text})
+        response_data, job = _save_submission(request, mocktest_id)
+        queue_feedback(*job)
+        return Response(response_data, status=status.HTTP_201_CREATED)
 
-        if correct_answers_list.__len__() > 0:
-            correct_answers_paragraph = "Here are the questions where I got the correct answer:\n"
-        else:
-            correct_answers_paragraph = "I got all the questions wrong.\n"
-        for item in correct_answers_list:
-            correct_answers_paragraph += f"Question: {item['question']} - Submitted Answer: {item['submittedAnswer']}, Subject: {item['subject']}\n"
+    except MockTest.DoesNotExist:
+        return Response({'error': 'No MockTest matches the given query.'}, status=404)
+    except SubmissionClosed as e:
+        return Response({'error': str(e)}, status=403)
+    except Student.DoesNotExist:
+        return Response({'error': 'Student does not exist.'}, status=404)
+    except Exception as e:
+        return _submission_error(e)
 
-        if wrong_answers_list.__len__() > 0:
-            wrong_answers_paragraph = "Here are the questions where I got the wrong answer:\n"
-        else:
-            wrong_answers_paragraph = "I got all the questions correct.\n"
-        for item in wrong_answers_list:
-            wrong_answers_paragraph += f"Question: {item['question']} - Submitted Answer: {item['submittedAnswer']}, Correct Answer: {item['correctAnswer']}, Subject: {item['subject']}\n"
-
-        completion = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are Preppy, BoardPrep's Engineering Companion and an excellent and critical engineer, tasked with providing constructive feedback on mock test performances of your students. In giving a feedback, you don't thank the student for sharing the details, instead you congratulate the student first for finishing the mock test, then you provide your feedbacks. After providing your feedbacks, you then put your signature at the end of your response"},
-                {"role": "user", "content": f"I am {student_name}, a {specialization_name} major, and here are the details of my test. {correct_answers_paragraph}\n\n{wrong_answers_paragraph}\n\nBased on these results, can you provide some feedback and suggestions for improvement, like what subjects to focus on, which field i excel, and some strategies? Address me directly, and don't put any placeholders as this will be displayed directly in unformatted text form."}
-            ]
-        )
-
-        feedback = completion.choices[0].message.content
-
-        with transaction.atomic():
-            mocktest_score, created = MockTestScores.objects.update_or_create(
-                mocktest_id=mocktest,
-                student=student,
-                defaults={
-                    'score': score,
-                    'totalQuestions': total_questions,
-                    'mocktestDateTaken': timezone.now(),
-                    'feedback': feedback
-                }
-            )
 
-            if not created:
-                mocktest_score.correct_questions.clear()
-
-            for question_id in answers:
-                if answers[question_id] == correct_answers_dict.get(str(question_id)):
-                    correct_question = MockQuestions.objects.get(id=question_id)
-                    mocktest_score.correct_questions.add(correct_question)
-
-        response_data = {
-            'score': score,
-            'total_questions': total_questions,
-            'feedback': feedback,
-            'mocktestName': mocktest_name,
-            'studentName': f"{user.first_name} {user.last_name}",
-            'mocktestDateTaken': timezone.now().strftime('%B %d, %Y'),
-            'message': 'Mock test submitted successfully'
-        }
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
 
-        return Response(response_data, status=status.HTTP_201_CREATED)
 
+@api_view(['POST'])
+def submit_mocktest_stream(request, mocktest_id):
+    """
+    Same as submit_mocktest, but answers with a server-sent event stream: a 'score' event
+    right away, 'feedback' events as the completion is generated and a final 'done'.
+    """
+    try:
+        response_data, job = _save_submission(request, mocktest_id)
     except MockTest.DoesNotExist:
         return Response({'error': 'No MockTest matches the given query.'}, status=404)
+    except SubmissionClosed as e:
+        return Response({'error': str(e)}, status=403)
     except Student.DoesNotExist:
         return Response({'error': 'Student does not exist.'}, status=404)
     except Exception as e:
-        print(f"Error: {e}")
-        print(f"Request data: {request.data}")
-        return Response({'error': str(e)}, status=400)
+        return _submission_error(e)
+
+    def events():
+        yield _sse('score', response_data)
+        try:
+            for part in stream_feedback(*job):
+                yield _sse('feedback', {'text': part})
+        except Exception:
+            logger.exception('Feedback streaming failed for score %s', job[0])
+            yield _sse('error', {'mocktestScoreID': job[0], 'feedbackStatus': MockTestScores.FEEDBACK_FAILED})
+            return
+        yield _sse('done', {'mocktestScoreID': job[0], 'feedbackStatus': MockTestScores.FEEDBACK_READY})
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream', status=status.HTTP_201_CREATED)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @api_view(['GET'])
 def get_mocktest_by_course(request, course_id):
@@ -366,6 +569,5 @@ def get_mocktest_by_course(request, course_id):
     except MockTest.DoesNotExist:
         return Response({'error': 'No MockTest found for the given course.'}, status=404)
     except Exception as e:
-        print(f"Error: {e}")
-        print(f"Request data: {request.data}")
+        logger.exception('Mock test lookup failed for course %s', course_id)
         raise ValidationError({'error': str(e)})
\ No newline at end of file
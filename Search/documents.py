@@ -0,0 +1,59 @@
+from Course.models import Course, Lesson, Page
+from Mocktest.models import MockQuestions
+from Discussion.models import Post
+from .text import html_to_text
+
+# Every searchable type: its model, the queryset documents are read from, and a function
+# turning one row into (title, plain text, meta). Results are keyed by (type, primary key).
+
+
+def course_document(course):
+    return course.course_title, f'{course.short_description}\n{html_to_text(course.long_description)}', {
+        'course_id': course.pk,
+    }
+
+
+def lesson_document(lesson):
+    return lesson.lesson_title, '', {'lesson_id': lesson.pk, 'course_id': lesson.syllabus.course_id}
+
+
+def page_document(page):
+    # Pages saved before their plain text was stored are rendered in memory.
+    page.render()
+    return page.title or page.lesson.lesson_title, page.plain_text, {'lesson_id': page.lesson_id, 'course_id': page.syllabus.course_id}
+
+
+def question_document(question):
+    return question.question, '\n'.join((question.subject, question.choiceA, question.choiceB,
+                                         question.choiceC, question.choiceD)), {
+        'mocktest_id': question.mocktest_id, 'subject': question.subject, 'course_id': question.mocktest.course_id,
+    }
+
+
+def post_document(post):
+    return post.title, f'{html_to_text(post.content)}\n{post.tags}', {'post_id': post.pk}
+
+
+SOURCES = {
+    'course': (Course, lambda: Course.objects.defer('image'), course_document),
+    'lesson': (Lesson, lambda: Lesson.objects.select_related('syllabus'), lesson_document),
+    'page': (Page, lambda: Page.objects.select_related('lesson', 'syllabus').defer('rendered_html'), page_document),
+    'question': (MockQuestions, lambda: MockQuestions.objects.select_related('mocktest'), question_document),
+    'post': (Post, lambda: Post.objects.all(), post_document),
+}
+TYPES = tuple(SOURCES)
+MODEL_TYPES = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def load_document(kind, pk):
+    """(title, text, meta) of one document as it is now, or None if it no longer exists."""
+    _, queryset, document = SOURCES[kind]
+    row = queryset().filter(pk=pk).first()
+    return document(row) if row is not None else None
+
+
+def iter_documents():
+    """((type, primary key), (title, text, meta)) for every searchable row."""
+    for kind, (_, queryset, document) in SOURCES.items():
+        for row in queryset().iterator(chunk_size=2000):
+            yield (kind, row.pk), document(row)
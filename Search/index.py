@@ -0,0 +1,297 @@
+import math
+import os
+import pickle
+import threading
+import time
+from collections import Counter
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .documents import SOURCES, TYPES, iter_documents, load_document
+from .models import SearchChange
+from .text import ANALYZER_VERSION, tokenize
+
+# Okapi BM25. Title terms are counted TITLE_WEIGHT times, so a match in a title outranks
+# the same match in body text.
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2
+SNIPPET_LENGTH = 200
+FORMAT = (ANALYZER_VERSION, TITLE_WEIGHT, SNIPPET_LENGTH)
+
+# Every indexed change is journaled as a SearchChange row, whose id is its generation, so
+# other workers can replay it by re-reading the document instead of reloading the index.
+# Past this many pending changes a rebuild is cheaper than replaying them one by one.
+MAX_REPLAY = 5000
+
+
+def snippet(text):
+    text = ' '.join(text.split())
+    return text if len(text) <= SNIPPET_LENGTH else text[:SNIPPET_LENGTH].rsplit(' ', 1)[0] + '…'
+
+
+class SearchIndex:
+    """
+    In-memory inverted index of documents keyed by (type, primary key). Each document gets
+    an integer slot; postings map term -> {slot: term frequency} and are turned into numpy
+    arrays (cached until the term changes) so a query scores every match in a few vector ops.
+    """
+
+    def __init__(self, generation=0, synced_at=None):
+        self.postings = {}
+        self.documents = {}
+        self.keys = []
+        self.free = []
+        self.lengths = np.zeros(0, dtype=np.float64)
+        self.kinds = np.zeros(0, dtype=np.int8)
+        self.total_length = 0
+        self.generation = generation
+        self.synced_at = synced_at or timezone.now()
+        self.waiting_for = None
+        self.arrays = {}
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _slot(self, key):
+        if self.free:
+            slot = self.free.pop()
+            self.keys[slot] = key
+            return slot
+        slot = len(self.keys)
+        self.keys.append(key)
+        if slot >= len(self.lengths):
+            capacity = max(1024, slot * 2)
+            self.lengths = np.resize(self.lengths, capacity)
+            self.kinds = np.resize(self.kinds, capacity)
+        return slot
+
+    def add(self, key, title, text, meta=None):
+        terms = Counter(tokenize(title) * TITLE_WEIGHT + tokenize(text))
+        with self.lock:
+            self.remove(key)
+            if not terms:
+                return
+            slot = self._slot(key)
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, {})[slot] = frequency
+                self.arrays.pop(term, None)
+            length = sum(terms.values())
+            self.lengths[slot] = length
+            self.kinds[slot] = TYPES.index(key[0])
+            self.documents[key] = (slot, tuple(terms), title, snippet(text), meta or {})
+            self.total_length += length
+
+    def remove(self, key):
+        with self.lock:
+            document = self.documents.pop(key, None)
+            if document is None:
+                return
+            slot, terms = document[:2]
+            for term in terms:
+                postings = self.postings[term]
+                del postings[slot]
+                self.arrays.pop(term, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= int(self.lengths[slot])
+            self.lengths[slot] = 0
+            self.keys[slot] = None
+            self.free.append(slot)
+
+    def _arrays(self, term):
+        arrays = self.arrays.get(term)
+        if arrays is None:
+            postings = self.postings[term]
+            arrays = self.arrays[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+        return arrays
+
+    def search(self, query, types=None, limit=20, offset=0):
+        """
+        (number of matches, {type: matches}, results) for documents matching any query term,
+        best first. Facets count every match; types only narrows the results and their number.
+        """
+        terms = set(tokenize(query))
+        with self.lock:
+            count = len(self.documents)
+            if not terms or not count:
+                return 0, {}, []
+            average_length = self.total_length / count
+            scores = np.zeros(len(self.keys))
+            for term in terms:
+                if term not in self.postings:
+                    continue
+                slots, frequencies = self._arrays(term)
+                idf = math.log(1 + (count - len(slots) + 0.5) / (len(slots) + 0.5))
+                norms = K1 * (1 - B + B * self.lengths[slots] / average_length)
+                scores[slots] += idf * frequencies * (K1 + 1) / (frequencies + norms)
+
+            matches = np.flatnonzero(scores)
+            kinds = self.kinds[matches]
+            facets = {TYPES[code]: int(total) for code, total in enumerate(np.bincount(kinds, minlength=len(TYPES))) if total}
+            if types:
+                matches = matches[np.isin(kinds, [TYPES.index(kind) for kind in types])]
+            total = len(matches)
+            wanted = offset + limit
+            if len(matches) > wanted:
+                matches = matches[np.argpartition(-scores[matches], wanted - 1)[:wanted]]
+            top = matches[np.argsort(-scores[matches], kind='stable')][offset:]
+            results = []
+            for slot in top.tolist():
+                kind, pk = key = self.keys[slot]
+                _, _, title, text, meta = self.documents[key]
+                results.append({'type': kind, 'id': pk, 'title': title, 'snippet': text,
+                                'score': round(float(scores[slot]), 4), **meta})
+        return total, facets, results
+
+    def save(self, path):
+        with self.lock:
+            data = pickle.dumps({
+                'format': FORMAT, 'generation': self.generation, 'synced_at': self.synced_at, 'postings': self.postings,
+                'documents': self.documents, 'keys': self.keys, 'free': self.free,
+                'lengths': self.lengths, 'kinds': self.kinds, 'total_length': self.total_length,
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so workers never load a half-written file.
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as stream:
+            stream.write(data)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """The saved index, or None if it was built with a different analyzer or format."""
+        with open(path, 'rb') as stream:
+            data = pickle.load(stream)
+        if data.get('format') != FORMAT:
+            return None
+        index = cls(data['generation'], data['synced_at'])
+        for name in ('postings', 'documents', 'keys', 'free', 'lengths', 'kinds', 'total_length'):
+            setattr(index, name, data[name])
+        return index
+
+
+def reindex(index, kind, pk):
+    document = load_document(kind, pk)
+    if document is None:
+        index.remove((kind, pk))
+    else:
+        index.add((kind, pk), *document)
+
+
+def _latest_generation():
+    return SearchChange.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def build_index():
+    # Changes journaled while the tables are read are replayed on top by the next sync.
+    index = SearchIndex(_latest_generation())
+    for key, document in iter_documents():
+        index.add(key, *document)
+    return index
+
+
+def sync(index):
+    """
+    Replay journaled changes the index hasn't seen. Returns False if the journal can't
+    bring it up to date (too many changes, or older ones already pruned) and it must be rebuilt.
+    """
+    now = timezone.now()
+    with index.lock:
+        if now - index.synced_at > timezone.timedelta(seconds=settings.SEARCH_JOURNAL_TTL):
+            return False
+        changes = list(SearchChange.objects.filter(pk__gt=index.generation).order_by('pk').values_list(
+            'pk', 'kind', 'object_id'
+        )[:MAX_REPLAY + 1])
+        if len(changes) > MAX_REPLAY:
+            return False
+        for number, kind, object_id in changes:
+            if number > index.generation + 1 and index.waiting_for != index.generation + 1:
+                # The rows in between may not be committed yet; wait one sync before skipping them
+                # (ids are also skipped for good by rolled back inserts).
+                index.waiting_for = index.generation + 1
+                break
+            reindex(index, kind, SOURCES[kind][0]._meta.pk.to_python(object_id))
+            index.generation = number
+        index.synced_at = now
+    return True
+
+
+def prune_journal():
+    """Delete journal rows older than SEARCH_JOURNAL_TTL; indexes that old are rebuilt instead."""
+    cutoff = timezone.now() - timezone.timedelta(seconds=settings.SEARCH_JOURNAL_TTL)
+    return SearchChange.objects.filter(changed_at__lt=cutoff).delete()[0]
+
+
+_index = None
+_index_mtime = None
+_synced_at = 0.0
+_state_lock = threading.Lock()
+
+
+def _saved_mtime():
+    try:
+        return os.stat(settings.SEARCH_INDEX_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load_saved():
+    try:
+        return SearchIndex.load(settings.SEARCH_INDEX_PATH)
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+        return None
+
+
+def get_index():
+    """
+    This worker's index: loaded from the saved file (rebuilt from the tables only if there
+    is none, or the journal can't catch it up), reloaded when the file is replaced and
+    synced with the journal at most every SEARCH_SYNC_INTERVAL seconds.
+    """
+    global _index, _index_mtime, _synced_at
+    with _state_lock:
+        mtime = _saved_mtime()
+        if _index is None or (mtime is not None and mtime != _index_mtime):
+            index = _load_saved() if mtime is not None else None
+            if index is None or not sync(index):
+                index = build_index()
+                index.save(settings.SEARCH_INDEX_PATH)
+                mtime = _saved_mtime()
+            _index, _index_mtime = index, mtime
+            _synced_at = time.monotonic()
+        elif time.monotonic() - _synced_at > settings.SEARCH_SYNC_INTERVAL:
+            if not sync(_index):
+                _index = build_index()
+                _index.save(settings.SEARCH_INDEX_PATH)
+                _index_mtime = _saved_mtime()
+            _synced_at = time.monotonic()
+        return _index
+
+
+def record_change(kind, pk):
+    """Journal a saved or deleted document for every worker, and apply it to this worker's index."""
+    generation = SearchChange.objects.create(kind=kind, object_id=str(pk)).pk
+    index = _index
+    if index is not None:
+        with index.lock:
+            reindex(index, kind, pk)
+            if index.generation == generation - 1:
+                index.generation = generation
+
+
+def record_changes(kind, pks):
+    """
+    Journal many saved or deleted documents of one type with a single insert, for bulk
+    writes that skip the model signals. Every worker, this one included, applies them on
+    its next sync.
+    """
+    SearchChange.objects.bulk_create([SearchChange(kind=kind, object_id=str(pk)) for pk in pks], batch_size=1000)
+
+
+def search(query, types=None, limit=20, offset=0):
+    return get_index().search(query, types, limit, offset)
@@ -0,0 +1,58 @@
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from Search.documents import TYPES
+from Search.index import SearchIndex
+
+WORDS = ('beam', 'load', 'flow', 'pipe', 'water', 'pressure', 'velocity', 'moment', 'shear', 'stress', 'column',
+         'head', 'loss', 'friction', 'channel', 'weir', 'pump', 'soil', 'bearing', 'capacity', 'slab', 'truss',
+         'concrete', 'steel', 'footing', 'settlement', 'deflection', 'torsion', 'buckling', 'hydraulic', 'survey',
+         'traverse', 'elevation', 'discharge', 'reservoir', 'tension', 'compression', 'modulus', 'strain', 'yield')
+
+
+class Command(BaseCommand):
+    help = 'Times searches against an in-memory index of synthetic documents, plus saving and loading it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--words', type=int, default=150, help='Average words per document.')
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        # Zipf-like vocabulary: a few very common terms and a long tail of rare ones.
+        vocabulary = list(WORDS) + [f'term{i}' for i in range(20000)]
+        cumulative = np.cumsum([1 / rank for rank in range(1, len(vocabulary) + 1)]).tolist()
+
+        def text(words):
+            return ' '.join(random.choices(vocabulary, cum_weights=cumulative, k=words))
+
+        documents = [((random.choice(TYPES), pk), text(8), text(random.randint(1, options['words'] * 2)))
+                     for pk in range(options['documents'])]
+        started = time.perf_counter()
+        index = SearchIndex()
+        for key, title, body in documents:
+            index.add(key, title, body)
+        self.stdout.write(f"indexed {len(index)} documents, {len(index.postings)} terms in {time.perf_counter() - started:.2f} s")
+
+        path = os.path.join(tempfile.mkdtemp(), 'search_index.pickle')
+        started = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        SearchIndex.load(path)
+        self.stdout.write(f"saved {os.path.getsize(path) / 2 ** 20:.1f} MiB in {saved:.2f} s, loaded in {time.perf_counter() - started:.2f} s")
+        os.remove(path)
+
+        queries = [text(random.randint(1, 4)) for _ in range(options['queries'])]
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, limit=20)
+            timings.append(time.perf_counter() - started)
+        timings = np.array(timings) * 1000
+        self.stdout.write(f"{len(queries)} queries: median {np.median(timings):.2f} ms, p95 {np.percentile(timings, 95):.2f} ms, "
+                          f"p99 {np.percentile(timings, 99):.2f} ms")
@@ -0,0 +1,19 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Search.index import build_index, prune_journal
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the full-text search index from the content tables and saves it for the workers, and '
+            'prunes journaled changes older than SEARCH_JOURNAL_TTL.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = build_index()
+        index.save(settings.SEARCH_INDEX_PATH)
+        pruned = prune_journal()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {len(index)} document(s), {len(index.postings)} term(s) in {time.perf_counter() - started:.1f} s; '
+            f'saved to {settings.SEARCH_INDEX_PATH}; pruned {pruned} journaled change(s).'
+        ))
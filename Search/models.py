@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class SearchChange(models.Model):
+    """
+    Journal of saved or deleted documents. Every worker replays the rows past the last one
+    its index has seen, by re-reading those documents.
+    """
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=255)
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
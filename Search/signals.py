@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from Course.models import Course, Lesson, Page
+from Mocktest.models import MockQuestions
+from Discussion.models import Post
+from .documents import MODEL_TYPES
+from .index import record_change
+
+
+def _record_on_commit(kind, pk):
+    transaction.on_commit(lambda: record_change(kind, pk))
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Lesson)
+@receiver([post_save, post_delete], sender=Page)
+@receiver([post_save, post_delete], sender=MockQuestions)
+@receiver([post_save, post_delete], sender=Post)
+def index_document(sender, instance, **kwargs):
+    _record_on_commit(MODEL_TYPES[sender], instance.pk)
+
+
+@receiver(post_save, sender=Lesson)
+def index_lesson_pages(sender, instance, **kwargs):
+    # Page results are titled after their lesson.
+    for page_id in instance.pages.values_list('pk', flat=True):
+        _record_on_commit('page', page_id)
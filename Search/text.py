@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+from bs4 import BeautifulSoup
+
+# Bump when tokenize or stem change, so saved indexes built with the old analyzer are rebuilt.
+ANALYZER_VERSION = 1
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset('''
+a an and are as at be been but by can could did do does for from had has have how if in into is it its
+may might must no not of on or our shall should so such than that the their them then there these they
+this those to was we were what when where which while who whom why will with would you your
+'''.split())
+
+# Longest matching suffix wins; each maps to its replacement. A light Porter-style pass,
+# enough to fold plurals, tenses and common derivations of technical vocabulary together.
+SUFFIXES = sorted({
+    'ational': 'ate', 'ization': 'ize', 'fulness': 'ful', 'iveness': 'ive', 'ousness': 'ous',
+    'ations': 'ate', 'ation': 'ate', 'ities': '', 'ity': '', 'ments': '', 'ment': '', 'ness': '',
+    'ings': '', 'ing': '', 'eed': 'eed', 'ied': 'y', 'ies': 'y', 'sses': 'ss', 'ed': '', 's': '',
+}.items(), key=lambda item: -len(item[0]))
+MIN_STEM = 3
+
+
+def html_to_text(html):
+    if not html or '<' not in html:
+        return html or ''
+    return BeautifulSoup(html, 'html.parser').get_text(' ')
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    if len(word) <= MIN_STEM or word.isdigit():
+        return word
+    for suffix, replacement in SUFFIXES:
+        if not word.endswith(suffix):
+            continue
+        if suffix == 's':
+            if word.endswith(('ss', 'us', 'is')):
+                return word
+            if word.endswith(('xes', 'zes', 'ches', 'shes')):
+                suffix = 'es'
+        stemmed = word[:-len(suffix)] + replacement
+        if len(stemmed) < MIN_STEM:
+            continue
+        # "running" -> "runn" -> "run"
+        if suffix in ('ing', 'ings', 'ed') and stemmed[-1] == stemmed[-2] and stemmed[-1] not in 'lsz':
+            stemmed = stemmed[:-1]
+        return stemmed
+    return word
+
+
+def tokenize(text):
+    """Lowercased, stemmed terms of plain text, without stopwords."""
+    terms = []
+    for token in TOKEN.findall((text or '').lower()):
+        token = token.split("'", 1)[0]
+        if token not in STOPWORDS:
+            terms.append(stem(token))
+    return terms
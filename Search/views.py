@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from .documents import TYPES
+from .index import search as search_index
+
+
+@api_view(['GET'])
+def search(request):
+    """
+    Full-text search over courses, lessons, pages, mock test questions and discussion posts.
+    ?q= is required; ?type= narrows the results to one or more comma-separated types, while
+    the facets still count the matches of every type.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    types = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+    unknown = [kind for kind in types if kind not in TYPES]
+    if unknown:
+        return Response({'error': f"Unknown type(s): {', '.join(unknown)}. Use {', '.join(TYPES)}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), settings.SEARCH_MAX_LIMIT)
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response({'error': 'limit and offset must be numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    count, facets, results = search_index(query, types, limit, offset)
+    return Response({
+        'query': query,
+        'count': count,
+        'facets': {kind: facets.get(kind, 0) for kind in TYPES},
+        'results': results,
+    })
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import SubjectMastery
+
+
+def apply_result(mastery, correct, total):
+    accuracy = correct / total
+    alpha = settings.MASTERY_EWMA_ALPHA
+    mastery.ewma_accuracy = accuracy if not mastery.attempts else alpha * accuracy + (1 - alpha) * mastery.ewma_accuracy
+    mastery.last_accuracy = accuracy
+    mastery.attempts += 1
+    mastery.answered += total
+    mastery.correct += correct
+
+
+def record_mastery(results):
+    """
+    Fold one submission per student into their mastery rows.
+    results is {student id: {subject: (correct, total)}}.
+    """
+    results = {
+        student_id: {subject: counts for subject, counts in subjects.items() if counts[1]}
+        for student_id, subjects in results.items()
+    }
+    keys = {(student_id, subject) for student_id, subjects in results.items() for subject in subjects}
+    if not keys:
+        return
+
+    with transaction.atomic():
+        SubjectMastery.objects.bulk_create(
+            [SubjectMastery(student_id=student_id, subject=subject) for student_id, subject in keys],
+            ignore_conflicts=True
+        )
+        rows = SubjectMastery.objects.select_for_update().filter(
+            student_id__in={student_id for student_id, _ in keys},
+            subject__in={subject for _, subject in keys}
+        )
+        now = timezone.now()
+        updated = []
+        for mastery in rows:
+            counts = results[mastery.student_id].get(mastery.subject)
+            if counts is None:
+                continue
+            apply_result(mastery, *counts)
+            mastery.updated_at = now
+            updated.append(mastery)
+        SubjectMastery.objects.bulk_update(
+            updated, ['attempts', 'answered', 'correct', 'ewma_accuracy', 'last_accuracy', 'updated_at'], batch_size=500
+        )
+
+
+def student_mastery(student_id):
+    rows = SubjectMastery.objects.filter(student_id=student_id).order_by('subject').values(
+        'subject', 'attempts', 'answered', 'correct', 'ewma_accuracy', 'last_accuracy', 'updated_at'
+    )
+    mastery = []
+    for row in rows:
+        row['accuracy'] = round(row['correct'] / row['answered'], 4) if row['answered'] else None
+        row['ewma_accuracy'] = round(row['ewma_accuracy'], 4)
+        mastery.append(row)
+    return mastery
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.4 on 2026-10-18 10:05
+
+import datetime
+from django.conf import settings
+from django.db import migrations
+
+
+def exercise_results(apps):
+    """(taken at, student id, {subject: (correct, total)}) for every exercise score."""
+    ExerciseQuestions = apps.get_model('Course', 'ExerciseQuestions')
+    ExerciseScores = apps.get_model('Course', 'ExerciseScores')
+    CorrectExerciseQuestions = apps.get_model('Course', 'CorrectExerciseQuestions')
+
+    subjects = {}
+    for exercise_id, question_id, subject in ExerciseQuestions.objects.values_list('exercise_id', 'id', 'subject').iterator():
+        subjects.setdefault(exercise_id, {})[question_id] = subject
+    correct = {}
+    for score_id, question_id in CorrectExerciseQuestions.objects.values_list(
+            'exercise_score_id', 'exercisequestion_id').iterator():
+        correct.setdefault(score_id, set()).add(question_id)
+
+    # Same attribution as Course.views.exercise_mastery: per question when the correct questions
+    # were recorded, otherwise from the score for single-subject exercises only.
+    for score_id, exercise_id, student_id, score, total_questions, taken_on in ExerciseScores.objects.values_list(
+            'pk', 'exercise_id', 'student_id', 'score', 'totalQuestions', 'exerciseDateTaken').iterator():
+        questions = subjects.get(exercise_id, {})
+        results = {}
+        if score_id in correct:
+            for question_id, subject in questions.items():
+                right, total = results.get(subject, (0, 0))
+                results[subject] = (right + (question_id in correct[score_id]), total + 1)
+        elif len(set(questions.values())) == 1 and total_questions:
+            results[next(iter(questions.values()))] = (min(int(score), total_questions), total_questions)
+        taken_at = datetime.datetime.combine(taken_on, datetime.time.min, tzinfo=datetime.timezone.utc)
+        yield taken_at, student_id, results
+
+
+def backfill_subject_mastery(apps, schema_editor):
+    MockTestAttempt = apps.get_model('Mocktest', 'MockTestAttempt')
+    SubjectMastery = apps.get_model('User', 'SubjectMastery')
+
+    results = [
+        (taken_at, student_id, {subject: tuple(counts) for subject, counts in breakdown.get('subject', {}).items()})
+        for taken_at, student_id, breakdown in MockTestAttempt.objects.order_by('taken_at', 'id').values_list(
+            'taken_at', 'student_id', 'breakdown').iterator()
+    ]
+    results.extend(exercise_results(apps))
+
+    # Replay mock test attempts and exercises in order so the weighted accuracy matches live updates.
+    # Exercise scores only keep their date (and the latest attempt), so they count from that midnight.
+    alpha = settings.MASTERY_EWMA_ALPHA
+    mastery = {}
+    for _, student_id, subjects in sorted(results, key=lambda result: result[0]):
+        for subject, (correct, total) in subjects.items():
+            if not total:
+                continue
+            row = mastery.get((student_id, subject))
+            if row is None:
+                row = mastery[(student_id, subject)] = SubjectMastery(student_id=student_id, subject=subject)
+            accuracy = correct / total
+            row.ewma_accuracy = accuracy if not row.attempts else alpha * accuracy + (1 - alpha) * row.ewma_accuracy
+            row.last_accuracy = accuracy
+            row.attempts += 1
+            row.answered += total
+            row.correct += correct
+    SubjectMastery.objects.bulk_create(mastery.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0002_subjectmastery'),
+        ('Mocktest', '0013_backfill_attempts'),
+        ('Course', '0002_exercise_models'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_subject_mastery, migrations.RunPython.noop),
+    ]
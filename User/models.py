@@ -66,4 +66,22 @@ class ContentCreator(User):
 
     def save(self, *args, **kwargs):
         self.user_type = 'C'
-        super(ContentCreator, self).save(*args, **kwargs)
\ No newline at end of file
+        super(ContentCreator, self).save(*args, **kwargs)
+
+
+class SubjectMastery(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='subject_mastery')
+    subject = models.CharField(max_length=255)
+    attempts = models.IntegerField(default=0)
+    answered = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    # Exponentially weighted accuracy over submissions, so recent work counts most.
+    ewma_accuracy = models.FloatField(default=0.0)
+    last_accuracy = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'subject')
+
+    def __str__(self):
+        return f"{self.student} - {self.subject}: {self.ewma_accuracy:.2f}"
@@ -11,6 +11,7 @@ from rest_framework.authentication import SessionAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from .serializers import StudentSerializer, TeacherSerializer, UserSerializer, ContentCreatorSerializer
 from .models import Student, Teacher, User, Specialization, ContentCreator
+from .mastery import student_mastery
 import jwt, datetime
 
 class StudentViewSet(viewsets.ModelViewSet):
@@ -24,6 +25,14 @@ class StudentViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=201)  # Successful creation
         return Response(serializer.errors, status=400)
 
+    @action(detail=True, methods=['get'])
+    def mastery(self, request, pk=None):
+        # Served by the (student, subject) unique index; the student is only looked up when there are no rows.
+        mastery = student_mastery(pk)
+        if not mastery and not Student.objects.filter(pk=pk).exists():
+            return Response({'error': 'Student not found.'}, status=404)
+        return Response({'student': pk, 'subjects': mastery})
+
 class TeacherViewSet(viewsets.ModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'Class',
     'Mocktest',
     'Discussion',
+    'Search',
     'rest_framework',
     # 'storages', -- for deployment (dont erase)
     'django_ckeditor_5', 
@@ -104,6 +105,9 @@ CKEDITOR_UPLOAD_PATH = 'uploads/'
 CKEDITOR_IMAGE_BACKEND = "pillow"
 # remove after testing
 SITE_URL = 'http://localhost:8000'
+# Pages per response of lessons/<id>/pages/ (clients may ask for up to LESSON_PAGE_WINDOW_MAX with ?window=).
+LESSON_PAGE_WINDOW = 3
+LESSON_PAGE_WINDOW_MAX = 20
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 # SITE_URL = 'https://' + os.environ.get('WEBSITE_HOSTNAME', 'localhost:8000') -- for deployment (dont erase)
 
@@ -174,6 +178,69 @@ DATABASES = {
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_51OKTa5IqhJdy9d5WdauhRZMnPyLF69FK634SNfovUNs3iYUSzEJ3v1abIk9tqJYAIWf15ydGhhumWZr70HPJx6dQ00gRsv52xj')
 # STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY') -- for deployment (dont erase)
 
+# Mock test AI feedback runs on a per-process worker pool after the score is saved.
+# Set MOCKTEST_FEEDBACK_BACKEND to 'fake' to use the offline client (tests, local dev).
+MOCKTEST_FEEDBACK_BACKEND = os.environ.get('MOCKTEST_FEEDBACK_BACKEND', 'openai')
+MOCKTEST_FEEDBACK_WORKERS = int(os.environ.get('MOCKTEST_FEEDBACK_WORKERS', 4))
+MOCKTEST_FEEDBACK_ASYNC = True
+# Generated feedback is reused for submissions with the same right/wrong pattern.
+MOCKTEST_FEEDBACK_MEMO_SIZE = 4096
+MOCKTEST_FEEDBACK_MEMO_TTL = 60 * 60 * 24
+# Feedback still pending this long after it was requested was lost with its worker and is
+# generated again by the requeue_feedback command.
+MOCKTEST_FEEDBACK_STALE_AFTER = 60 * 10
+
+# Compiled answer keys are cached per worker; name a CACHES alias in
+# MOCKTEST_SHARED_CACHE (e.g. a Redis/Memcached cache) to share them across workers.
+MOCKTEST_ANSWER_KEY_CACHE_SIZE = 256
+MOCKTEST_ANSWER_KEY_CACHE_TTL = 60 * 10
+MOCKTEST_SHARED_CACHE = os.environ.get('MOCKTEST_SHARED_CACHE') or None
+
+# Compiled test papers (questions without answers) live in the shared cache, or 'default'.
+MOCKTEST_PAPER_CACHE_TTL = 60 * 60 * 24
+MOCKTEST_PAPER_LOCK_TIMEOUT = 30
+MOCKTEST_PAPER_LOCK_WAIT = 5
+
+# Item analyses are cached under the version of the scores and questions they were computed from.
+MOCKTEST_ITEM_ANALYSIS_CACHE_TTL = 60 * 60
+
+# Autosaved answers are buffered per worker and written to the drafts table in batches.
+MOCKTEST_DRAFT_FLUSH_INTERVAL = 5
+MOCKTEST_DRAFT_FLUSH_SIZE = 500
+
+# Adaptive practice sessions stop after this many items or once the ability is this precise.
+MOCKTEST_ADAPTIVE_LENGTH = 20
+MOCKTEST_ADAPTIVE_MIN_STANDARD_ERROR = 0.3
+MOCKTEST_ADAPTIVE_SESSION_TTL = 60 * 60 * 2
+
+# Scheduled mock tests: caches are pre-warmed this long before opening (see prewarm_mocktests),
+# and window/roster lookups used to vet submissions are cached per worker.
+MOCKTEST_PREWARM_LEAD = 60 * 10
+MOCKTEST_WINDOW_CACHE_TTL = 60
+MOCKTEST_ROSTER_CACHE_TTL = 60 * 60
+
+# Question imports are validated and inserted this many rows at a time; error reports are capped.
+MOCKTEST_IMPORT_CHUNK_SIZE = 500
+MOCKTEST_IMPORT_MAX_ERRORS = 1000
+
+# Near-duplicate question detection: the MinHash/LSH index is saved here so workers don't
+# rebuild it from the question tables, and caught up on newly inserted questions periodically.
+QUESTION_DEDUP_INDEX_PATH = os.environ.get('QUESTION_DEDUP_INDEX_PATH') or os.path.join(BASE_DIR, 'var', 'question_dedup.npz')
+QUESTION_DEDUP_THRESHOLD = 0.8
+QUESTION_DEDUP_REFRESH_INTERVAL = 60
+
+# Full-text search: the index is saved here so workers don't rebuild it at startup (refresh it
+# with rebuild_search_index, e.g. nightly and after bulk imports, which skip the save signals).
+# Saves and deletes are journaled in the SearchChange table and replayed by each worker; rows
+# older than SEARCH_JOURNAL_TTL are pruned by rebuild_search_index, and indexes that stale rebuilt.
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH') or os.path.join(BASE_DIR, 'var', 'search_index.pickle')
+SEARCH_SYNC_INTERVAL = 2
+SEARCH_JOURNAL_TTL = 60 * 60 * 24 * 2
+SEARCH_MAX_LIMIT = 50
+
+# Weight of the newest submission in a student's per-subject mastery.
+MASTERY_EWMA_ALPHA = 0.3
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
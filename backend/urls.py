@@ -5,7 +5,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from Course.views import CourseListViewSet, CourseDetailViewSet, SyllabusViewSet, LessonViewSet, FileUploadViewSet, PageViewSet, ExerciseViewSet, ExerciseQuestionsViewSet, ExerciseScoresViewSet, CorrectExerciseQuestionsViewSet
 from Class.views import ClassViewSet, PostViewSet, CommentViewSet, JoinRequestViewSet, ActivityViewSet, SubmissionViewSet, AttachmentViewSet
-from Mocktest.views import MockTestViewSet, MockQuestionsViewSet, MockTestScoresViewSet, DifficultyViewSet, submit_mocktest
+from Mocktest.views import MockTestViewSet, MockQuestionsViewSet, MockTestScoresViewSet, DifficultyViewSet, submit_mocktest, submit_mocktest_stream
 from User.views import StudentViewSet, TeacherViewSet
 from Course import views
 
@@ -48,8 +48,10 @@ urlpatterns = [
     path('ckeditor/', include('ckeditor_uploader.urls')),
     path('', include('User.urls')),
     path('', include('Discussion.urls')),
+    path('', include('Search.urls')),
     re_path(r'^syllabi/(?P<course_id>[^/.]+)/$', SyllabusViewSet.as_view({'get': 'by_course'})),
     path('mocktest/<int:mocktest_id>/submit', submit_mocktest, name='submit_mocktest'),
+    path('mocktest/<int:mocktest_id>/submit/stream', submit_mocktest_stream, name='submit_mocktest_stream'),
     path('mocktest/<int:course_id>/', MockTestViewSet.as_view({'get': 'retrieve'}), name='mocktest-course'),
     path('mocktest/<int:classID>/', MockTestViewSet.as_view({'get': 'retrieve'}), name='mocktest-class'),
     path('mocktest/delete_by_course/<str:course_id>/', MockTestViewSet.as_view({'delete': 'destroy_by_course'}), name='delete-mocktest-by-course'),